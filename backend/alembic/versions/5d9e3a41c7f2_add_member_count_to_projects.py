@@ -0,0 +1,57 @@
+"""add member_count to projects
+
+Revision ID: 5d9e3a41c7f2
+Revises: 8c2f1d7a9b3e
+Create Date: 2026-10-19 10:04:17.553902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d9e3a41c7f2'
+down_revision: Union[str, None] = '8c2f1d7a9b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Constant default: no table rewrite on PostgreSQL 11+
+    op.add_column('projects', sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Duplicate memberships would be counted twice; keep the oldest row of each pair
+    op.execute("""
+        DELETE FROM project_members a
+        USING project_members b
+        WHERE a.user_id = b.user_id AND a.project_id = b.project_id AND a.id > b.id
+    """)
+    op.create_unique_constraint('uq_project_members_user_id_project_id', 'project_members', ['user_id', 'project_id'])
+
+    # Backfill in id ranges, one short transaction per batch
+    conn = op.get_bind()
+    max_id = conn.execute(sa.text("SELECT coalesce(max(id), 0) FROM projects")).scalar()
+    with op.get_context().autocommit_block():
+        for low in range(1, max_id + 1, BATCH_SIZE):
+            conn.execute(sa.text("""
+                UPDATE projects p
+                SET member_count = m.n
+                FROM (
+                    SELECT project_id, count(*) AS n
+                    FROM project_members
+                    WHERE project_id >= :low AND project_id < :high
+                    GROUP BY project_id
+                ) m
+                WHERE p.id = m.project_id
+            """), {"low": low, "high": low + BATCH_SIZE})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_project_members_user_id_project_id', 'project_members', type_='unique')
+    op.drop_column('projects', 'member_count')
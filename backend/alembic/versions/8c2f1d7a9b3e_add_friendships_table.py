@@ -0,0 +1,43 @@
+"""add friendships table
+
+Revision ID: 8c2f1d7a9b3e
+Revises: 44ac4de23ee2
+Create Date: 2026-10-19 09:12:41.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2f1d7a9b3e'
+down_revision: Union[str, None] = '44ac4de23ee2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('friendships',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('friend_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.CheckConstraint('user_id <> friend_id', name='ck_friendships_not_self'),
+    sa.ForeignKeyConstraint(['friend_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'friend_id', name='uq_friendships_user_id_friend_id')
+    )
+    op.create_index(op.f('ix_friendships_friend_id'), 'friendships', ['friend_id'], unique=False)
+    op.create_index(op.f('ix_friendships_id'), 'friendships', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_friendships_id'), table_name='friendships')
+    op.drop_index(op.f('ix_friendships_friend_id'), table_name='friendships')
+    op.drop_table('friendships')
@@ -0,0 +1,50 @@
+"""add cache invalidation triggers
+
+Revision ID: a4f8d2e6c1b9
+Revises: e3a7c5b19d40
+Create Date: 2026-10-19 13:41:22.905117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f8d2e6c1b9'
+down_revision: Union[str, None] = 'e3a7c5b19d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("users", "projects")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Payload is '<table>:<id>'; NOTIFY is only delivered if the transaction commits
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_cache_invalidation() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('cache_invalidation', TG_TABLE_NAME || ':' || OLD.id);
+            ELSE
+                PERFORM pg_notify('cache_invalidation', TG_TABLE_NAME || ':' || NEW.id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_cache_invalidation
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_cache_invalidation ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_cache_invalidation()")
@@ -0,0 +1,56 @@
+"""add stats materialized views
+
+Revision ID: b71e4c0d92a6
+Revises: 5d9e3a41c7f2
+Create Date: 2026-10-19 11:26:03.771940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e4c0d92a6'
+down_revision: Union[str, None] = '5d9e3a41c7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Each view needs a unique index for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_project_leaderboard AS
+        SELECT p.id AS project_id, p.title, count(pm.id) AS member_count
+        FROM projects p
+        LEFT JOIN project_members pm ON pm.project_id = p.id
+        GROUP BY p.id, p.title
+    """)
+    op.execute("CREATE UNIQUE INDEX ix_mv_project_leaderboard_project_id ON mv_project_leaderboard (project_id)")
+    op.execute("CREATE INDEX ix_mv_project_leaderboard_member_count ON mv_project_leaderboard (member_count DESC, project_id)")
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_tech_stack_popularity AS
+        SELECT lower(tech) AS tech, count(*) AS project_count
+        FROM projects, unnest(tech_stack) AS tech
+        GROUP BY lower(tech)
+    """)
+    op.execute("CREATE UNIQUE INDEX ix_mv_tech_stack_popularity_tech ON mv_tech_stack_popularity (tech)")
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_daily_signups AS
+        SELECT (created_at AT TIME ZONE 'UTC')::date AS day, count(*) AS signups
+        FROM users
+        WHERE created_at IS NOT NULL
+        GROUP BY 1
+    """)
+    op.execute("CREATE UNIQUE INDEX ix_mv_daily_signups_day ON mv_daily_signups (day)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_daily_signups")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_tech_stack_popularity")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_project_leaderboard")
@@ -0,0 +1,42 @@
+"""add autocomplete indexes
+
+Revision ID: c58e1b7d3f20
+Revises: a4f8d2e6c1b9
+Create Date: 2026-10-19 16:21:08.552914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c58e1b7d3f20'
+down_revision: Union[str, None] = 'a4f8d2e6c1b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm ships with Postgres (contrib); creating it needs a role that may create extensions
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Prefix matches: byte-order ("C") btree, so LIKE 'abc%' is a range scan already in
+    # ORDER BY order. Substring / fuzzy matches: trigram GIN.
+    # CONCURRENTLY keeps writes running while the indexes build.
+    with op.get_context().autocommit_block():
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_username_prefix ON users ((lower(username) COLLATE "C"))')
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_username_trgm ON users USING gin (lower(username) gin_trgm_ops)")
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_projects_title_prefix ON projects ((lower(title) COLLATE "C"))')
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_projects_title_trgm ON projects USING gin (lower(title) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_projects_title_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_projects_title_prefix")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_username_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_username_prefix")
+    # pg_trgm is left installed (other objects may use it)
@@ -0,0 +1,134 @@
+"""add project archive tables
+
+Revision ID: d7b3e9a1c4f6
+Revises: c58e1b7d3f20
+Create Date: 2026-10-19 17:02:33.904117
+
+"""
+import time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b3e9a1c4f6'
+down_revision: Union[str, None] = 'c58e1b7d3f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+PAUSE_SECONDS = 0.05  # Between batches, to leave room for regular traffic (and replicas)
+
+PROJECT_COLUMNS = (
+    "id, title, short_description, detailed_description, difficulty, status, closed_at, "
+    "max_team_members, member_count, tags, tech_stack, repository_url, live_demo_url, created_at, owner_id"
+)
+MEMBER_COLUMNS = "id, user_id, project_id, role, joined_at"
+
+# One batch of closed projects and their members, in one short statement. Rows locked by
+# a request (e.g. a join in progress) are skipped, not waited for.
+MOVE_BATCH = f"""
+    WITH batch AS (
+        SELECT id FROM projects
+        WHERE status = 'closed'
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), members AS (
+        DELETE FROM project_members m USING batch WHERE m.project_id = batch.id
+        RETURNING {', '.join('m.' + c for c in MEMBER_COLUMNS.split(', '))}
+    ), archived_members AS (
+        INSERT INTO project_members_archive ({MEMBER_COLUMNS}) SELECT {MEMBER_COLUMNS} FROM members
+    ), moved AS (
+        DELETE FROM projects p USING batch WHERE p.id = batch.id
+        RETURNING {', '.join('p.' + c for c in PROJECT_COLUMNS.split(', '))}
+    )
+    INSERT INTO projects_archive ({PROJECT_COLUMNS}) SELECT {PROJECT_COLUMNS} FROM moved
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable, no default: a catalog-only change
+    op.add_column('projects', sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table('projects_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('short_description', sa.String(), nullable=False),
+    sa.Column('detailed_description', sa.Text(), nullable=True),
+    sa.Column('difficulty', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('max_team_members', sa.Integer(), nullable=True),
+    sa.Column('member_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('tags', postgresql.ARRAY(sa.String()), nullable=True),
+    sa.Column('tech_stack', postgresql.ARRAY(sa.String()), nullable=True),
+    sa.Column('repository_url', sa.String(), nullable=True),
+    sa.Column('live_demo_url', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_projects_archive_owner_id'), 'projects_archive', ['owner_id'], unique=False)
+    op.create_table('project_members_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(), nullable=True),
+    sa.Column('joined_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects_archive.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_project_members_archive_project_id'), 'project_members_archive', ['project_id'], unique=False)
+    op.create_index(op.f('ix_project_members_archive_user_id'), 'project_members_archive', ['user_id'], unique=False)
+
+    # Tech stack popularity keeps counting archived projects
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_tech_stack_popularity")
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_tech_stack_popularity AS
+        SELECT lower(tech) AS tech, count(*) AS project_count
+        FROM (
+            SELECT tech_stack FROM projects
+            UNION ALL
+            SELECT tech_stack FROM projects_archive
+        ) p, unnest(p.tech_stack) AS tech
+        GROUP BY lower(tech)
+    """)
+    op.execute("CREATE UNIQUE INDEX ix_mv_tech_stack_popularity_tech ON mv_tech_stack_popularity (tech)")
+
+    # Move the projects that are already closed, one short transaction per batch. The app's
+    # archiver (app/services/archive_service.py) takes over from here.
+    conn = op.get_bind()
+    with op.get_context().autocommit_block():
+        while conn.execute(sa.text(MOVE_BATCH), {"batch_size": BATCH_SIZE}).rowcount:
+            time.sleep(PAUSE_SECONDS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Put archived projects back before dropping the tables
+    op.execute(f"INSERT INTO projects ({PROJECT_COLUMNS}) SELECT {PROJECT_COLUMNS} FROM projects_archive")
+    op.execute(f"INSERT INTO project_members ({MEMBER_COLUMNS}) SELECT {MEMBER_COLUMNS} FROM project_members_archive")
+
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_tech_stack_popularity")
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_tech_stack_popularity AS
+        SELECT lower(tech) AS tech, count(*) AS project_count
+        FROM projects, unnest(tech_stack) AS tech
+        GROUP BY lower(tech)
+    """)
+    op.execute("CREATE UNIQUE INDEX ix_mv_tech_stack_popularity_tech ON mv_tech_stack_popularity (tech)")
+
+    op.drop_index(op.f('ix_project_members_archive_user_id'), table_name='project_members_archive')
+    op.drop_index(op.f('ix_project_members_archive_project_id'), table_name='project_members_archive')
+    op.drop_table('project_members_archive')
+    op.drop_index(op.f('ix_projects_archive_owner_id'), table_name='projects_archive')
+    op.drop_table('projects_archive')
+    op.drop_column('projects', 'closed_at')
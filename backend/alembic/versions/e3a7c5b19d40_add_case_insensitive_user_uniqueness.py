@@ -0,0 +1,35 @@
+"""add case-insensitive user uniqueness
+
+Revision ID: e3a7c5b19d40
+Revises: b71e4c0d92a6
+Create Date: 2026-10-19 12:04:47.318206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c5b19d40'
+down_revision: Union[str, None] = 'b71e4c0d92a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails if existing accounts differ only by case; merge or rename those first:
+    #   SELECT lower(email), array_agg(id) FROM users GROUP BY 1 HAVING count(*) > 1;
+    # CONCURRENTLY keeps signups and logins running while the indexes build.
+    with op.get_context().autocommit_block():
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_users_lower_email ON users (lower(email))")
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_users_lower_username ON users (lower(username))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_users_lower_username")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_users_lower_email")
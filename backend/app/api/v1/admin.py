@@ -0,0 +1,67 @@
+"""
+admin.py
+
+Admin API endpoints (require `X-Admin-Key`, see `dependencies.require_admin`).
+
+- GET /profiles: Recent request profiles on this worker, newest first
+- GET /profiles/{id}: One profile with its SQL statements and folded stacks
+- GET /profiles/{id}/folded: Folded stacks as text (flamegraph.pl, speedscope)
+- POST /profiles/sign: An `X-Profile` header value that profiles requests to a path
+- POST /ws/broadcast: Send a JSON message to every WebSocket on this worker
+
+Profiles live in process memory, so each worker only has its own. The `X-Profile-Id` of a
+profiled response starts with the worker's pid.
+"""
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.v1.dependencies import require_admin
+from app.core import profiling
+from app.websocket.connection_manager import manager
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+def _get_profile(profile_id: str) -> profiling.RequestProfile:
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found on this worker")
+    return profile
+
+@router.get("/profiles")
+def list_profiles():
+    """
+    Summaries of the profiles kept by this worker (newest first).
+    """
+    return [profile.summary() for profile in profiling.recent_profiles()]
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    """
+    One profile: timings, every SQL statement with its duration, and folded stacks.
+    """
+    return _get_profile(profile_id).detail()
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_folded(profile_id: str):
+    """
+    Folded stacks ("frame;frame;frame count" per line), e.g. `flamegraph.pl profile.folded > out.svg`.
+    """
+    return _get_profile(profile_id).folded()
+
+@router.post("/profiles/sign")
+def sign_profile_request(
+    path: str = Query(..., description="Request path to profile, e.g. /api/v1/projects/"),
+    ttl_seconds: int = Query(300, ge=1, le=3600),
+):
+    """
+    Header to send to have requests to `path` profiled (only works where profiling is enabled).
+    """
+    return {"header": "X-Profile", "value": profiling.sign_profile_header(path, ttl_seconds)}
+
+@router.post("/ws/broadcast")
+async def broadcast_to_websockets(message: dict = Body(...)):
+    """
+    Send `message` to every open WebSocket on this worker (announcements, load tests).
+    """
+    return {"sent": await manager.broadcast(message)}
@@ -4,9 +4,9 @@ auth.py
 API endpoints for authentication flows:
 - /register: Register a new user (email, username, password)
 - /login: Authenticate user and return JWT access & refresh tokens
-- /refresh: Exchange a valid refresh token for a new access token
+- /refresh: Exchange a valid refresh token for a new access token (rotates the refresh token)
 - /change-password: Change the current user's password (requires authentication)
-- /logout: Log out the current user (invalidate refresh token)
+- /logout: Log out the current user (revoke refresh tokens)
 
 How to use:
 - Register and login users via Swagger UI or frontend.
@@ -86,15 +86,13 @@ def api_login(
 
 # --- Refresh token endpoint ---
 @router.post("/refresh", response_model=Token)
-def api_refresh_token(
-    token_in: RefreshTokenRequest,
-    db: Session = Depends(get_db)
-):
+def api_refresh_token(token_in: RefreshTokenRequest):
     """
     Exchange a valid refresh token for a new access token.
+    - The refresh token is rotated: store the returned one, the old one stops working.
     """
-    access_token = refresh_access_token(db, token_in.refresh_token)
-    return Token(access_token=access_token, refresh_token=token_in.refresh_token)
+    access_token, refresh_token = refresh_access_token(token_in.refresh_token)
+    return Token(access_token=access_token, refresh_token=refresh_token)
 
 # --- Change password endpoint ---
 @router.post("/change-password", response_model=UserPublic)
@@ -1,19 +1,27 @@
 """
 dependencies.py
 
-Reusable dependencies for extracting the current user from JWT.
+Reusable dependencies for extracting the current user from JWT, checking the admin API key,
+and parsing `?ids=1,2,3` on batch endpoints.
 """
 
-from fastapi import Depends, HTTPException, status
+import hmac
+
+from fastapi import Depends, Header, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.db.models import User
+from app.services.user_service import get_user_for_auth
+from app.core.config import settings
 from app.core.security import decode_token
+from app.core.log import bind
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+MAX_BATCH_IDS = 100
+
 def get_db():
     db = SessionLocal()
     try:
@@ -31,10 +39,35 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     payload = decode_token(token)
-    if payload is None or "sub" not in payload:
+    if payload is None or "sub" not in payload or payload.get("type", "access") != "access":
         raise credentials_exception
     user_id = int(payload["sub"])
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_for_auth(db, user_id)
     if user is None or not user.is_active:
         raise credentials_exception
-    return user
\ No newline at end of file
+    bind(user_id=user.id)
+    return user
+
+def require_admin(x_admin_key: str = Header("")) -> None:
+    """
+    Allow the request only with `X-Admin-Key: <settings.ADMIN_API_KEY>`.
+    The admin API does not exist (404) while no key is configured.
+    """
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
+
+def batch_ids(ids: str = Query(..., description=f"Comma-separated ids (at most {MAX_BATCH_IDS})")) -> list[int]:
+    """
+    Parse `?ids=3,1,2` into [3, 1, 2] (duplicates dropped, order kept).
+    """
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return parsed
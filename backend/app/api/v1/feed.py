@@ -0,0 +1,34 @@
+"""
+feed.py
+
+API endpoint for the current user's activity feed.
+
+- GET /api/v1/feed/?offset=0&limit=20: newest events from the user's projects.
+- Served from precomputed Redis lists (see services/feed_service.py); no SQL per request.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from redis.exceptions import RedisError
+
+from app.schemas.feed import FeedPage
+from app.services.feed_service import get_feed
+from app.api.v1.dependencies import get_current_user
+from app.db.models import User
+
+router = APIRouter()
+
+@router.get("/", response_model=FeedPage)
+def api_get_feed(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a page of the current user's activity feed (requires authentication).
+    """
+    try:
+        items = get_feed(current_user.id, offset, limit)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Feed temporarily unavailable")
+    next_offset = offset + limit if len(items) == limit else None
+    return FeedPage(items=items, next_offset=next_offset)
@@ -0,0 +1,75 @@
+"""
+fieldsets.py
+
+Sparse fieldsets: `?fields=id,title,tags` returns only those fields.
+
+- `parse_fields(schema, fields, model)` validates the names against the response schema fields
+  that are also mapped columns of `model` (400 on anything else), and returns them in schema
+  order, so `title,id` and `id,title` share a cache entry.
+  Schema fields with no column (like `UserPublic.bio`) can't be selected on their own.
+- Services take the same tuple as `fields=` and pass it to `load_only`, so only those
+  columns are SELECTed.
+- `render(schema, fields, data)` serializes with a TypeAdapter built once per
+  (schema, field set) and cached, so a request only pays for validation and JSON encoding.
+
+How to use (in an endpoint):
+    selected = parse_fields(ProjectRead, fields, Project)
+    projects = get_all_projects(db, fields=selected)
+    if selected:
+        return render(ProjectRead, selected, projects)
+    return projects
+"""
+
+from functools import lru_cache
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+@lru_cache(maxsize=64)
+def selectable_fields(schema: type[BaseModel], model: type) -> tuple[str, ...]:
+    """
+    Schema fields that are also mapped columns of `model`, in schema order.
+    """
+    columns = sa.inspect(model).columns.keys()
+    return tuple(name for name in schema.model_fields if name in columns)
+
+def parse_fields(
+    schema: type[BaseModel], fields: Optional[str], model: type
+) -> Optional[tuple[str, ...]]:
+    """
+    Turn the raw `fields` query value into a tuple of schema field names (or None for all).
+    - Only fields backed by a column of `model` are allowed, since services pass them to `load_only`.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        return None
+    allowed = selectable_fields(schema, model)
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(sorted(unknown))}. "
+                   f"Allowed: {', '.join(allowed)}",
+        )
+    return tuple(name for name in allowed if name in requested)
+
+@lru_cache(maxsize=256)
+def _adapter(schema: type[BaseModel], fields: tuple[str, ...], many: bool) -> TypeAdapter:
+    partial = create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
+    return TypeAdapter(list[partial] if many else partial)
+
+def render(schema: type[BaseModel], fields: tuple[str, ...], data: Any) -> Response:
+    """
+    Serialize an ORM object (or a list of them) with only `fields`, as a JSON response.
+    """
+    adapter = _adapter(schema, fields, isinstance(data, list))
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return Response(content=body, media_type="application/json")
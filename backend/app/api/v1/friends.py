@@ -0,0 +1,94 @@
+"""
+friends.py
+
+API endpoints for friends (all require authentication).
+
+- GET /: List my friends
+- GET /requests: List friend requests sent to me
+- GET /suggestions: People I may know (mutual friends, shared projects)
+- GET /mutual/{user_id}: Friends I have in common with another user
+- POST /{user_id}: Send a friend request (accepts theirs if they already asked me)
+- POST /{user_id}/accept: Accept a friend request from a user
+- DELETE /{user_id}: Unfriend, or decline / cancel a request
+"""
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.db.session import SessionLocal
+from app.schemas.friend import FriendshipRead, FriendRead, FriendSuggestion
+from app.services.friend_service import (
+    send_friend_request, accept_friend_request, remove_friend, get_pending_requests,
+    get_friends, get_mutual_friends, suggest_friends
+)
+from app.api.v1.dependencies import get_current_user
+from app.db.models import User
+
+router = APIRouter()
+
+# --- Dependency to get DB session ---
+def get_db():
+    """
+    Yields a database session for use in endpoints.
+    Ensures the session is closed after the request.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/", response_model=List[FriendRead])
+def api_list_friends(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    List the current user's friends.
+    """
+    return get_friends(db, current_user.id)
+
+@router.get("/requests", response_model=List[FriendshipRead])
+def api_list_friend_requests(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    List pending friend requests sent to the current user.
+    """
+    return get_pending_requests(db, current_user.id)
+
+@router.get("/suggestions", response_model=List[FriendSuggestion])
+def api_friend_suggestions(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    People you may know, from mutual friends and shared projects.
+    """
+    return suggest_friends(db, current_user.id, limit)
+
+@router.get("/mutual/{user_id}", response_model=List[FriendRead])
+def api_mutual_friends(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Friends the current user has in common with another user.
+    """
+    return get_mutual_friends(db, current_user.id, user_id)
+
+@router.post("/{user_id}", response_model=FriendshipRead, status_code=status.HTTP_201_CREATED)
+def api_send_friend_request(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Send a friend request to another user.
+    """
+    return send_friend_request(db, current_user.id, user_id)
+
+@router.post("/{user_id}/accept", response_model=FriendshipRead)
+def api_accept_friend_request(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Accept the friend request `user_id` sent to the current user.
+    """
+    return accept_friend_request(db, current_user.id, user_id)
+
+@router.delete("/{user_id}")
+def api_remove_friend(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Unfriend a user, or decline / cancel a pending request.
+    """
+    remove_friend(db, current_user.id, user_id)
+    return {"detail": "Friendship removed"}
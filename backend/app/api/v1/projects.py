@@ -3,7 +3,8 @@ projects.py
 
 API endpoints for project management.
 
-- Exposes endpoints for creating, listing, viewing, and joining projects.
+- Exposes endpoints for creating, listing, viewing, joining, and opening/closing projects.
+- Streams live project updates as Server-Sent Events (`/{project_id}/events`).
 - Uses dependency injection for DB session and authentication.
 - Returns Pydantic schemas (never raw models).
 - All endpoints are grouped under `/api/v1/projects/`.
@@ -19,14 +20,21 @@ To extend:
 - Add analytics, comments, updates, etc.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.db.session import SessionLocal
-from app.schemas.project import ProjectCreate, ProjectRead
-from app.services.project_service import create_project, get_all_projects, get_project_by_id, join_project
-from app.api.v1.dependencies import get_current_user
-from app.db.models import User
+from app.schemas.project import ProjectCreate, ProjectRead, ProjectStatusUpdate, ProjectSuggestion
+from app.services.project_service import (
+    count_projects, create_project, get_all_projects, get_project_by_id, get_projects_by_ids, join_project,
+    update_project_status
+)
+from app.services.project_stream_service import project_event_stream
+from app.services.autocomplete_service import autocomplete_projects
+from app.api.v1.dependencies import batch_ids, get_current_user
+from app.api.v1.fieldsets import parse_fields, render
+from app.db.models import Project, User
 
 router = APIRouter()
 
@@ -58,23 +66,75 @@ def api_create_project(
 
 # --- List all projects (public) ---
 @router.get("/", response_model=List[ProjectRead])
-def api_list_projects(db: Session = Depends(get_db)):
+def api_list_projects(
+    response: Response,
+    only_open_slots: bool = False,
+    include_archived: bool = Query(False, description="Also list projects archived after being closed for a while"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size (all projects if omitted)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,tags,status"),
+    db: Session = Depends(get_db)
+):
     """
-    List all projects.
+    List all projects, or one page of them (`offset`/`limit`, in id order).
     - Public endpoint, no authentication required.
+    - `only_open_slots=true` keeps only projects whose team is not full yet.
+    - Projects closed for a while are archived and left out unless `include_archived=true`.
+    - `fields=` returns only those fields (and only SELECTs those columns).
+    - `X-Total-Count` has the total; `X-Total-Count-Type` says if it is `exact` or `approximate`.
+    """
+    selected = parse_fields(ProjectRead, fields, Project)
+    projects = get_all_projects(
+        db, only_open_slots=only_open_slots, fields=selected, include_archived=include_archived,
+        offset=offset, limit=limit,
+    )
+    total_headers = count_projects(db, only_open_slots, include_archived).headers()
+    if selected:
+        rendered = render(ProjectRead, selected, projects)
+        rendered.headers.update(total_headers)
+        return rendered
+    response.headers.update(total_headers)
+    return projects
+
+# --- Get several projects by ID (public); declared before /{project_id} ---
+@router.get("/batch", response_model=List[ProjectRead])
+def api_get_projects_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_db)):
+    """
+    Get several projects at once, e.g. `?ids=4,8,15` (one query).
+    - Results keep the order of `ids`; unknown ids are left out.
+    """
+    return get_projects_by_ids(db, ids)
+
+# --- Autocomplete project titles (public) ---
+@router.get("/autocomplete", response_model=List[ProjectSuggestion])
+def api_autocomplete_projects(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user typed so far"),
+    limit: int = Query(10, ge=1, le=25),
+    db: Session = Depends(get_db)
+):
+    """
+    Projects whose title starts with `q` (alphabetically), then ones containing or resembling it.
     """
-    return get_all_projects(db)
+    return autocomplete_projects(db, q, limit)
 
 # --- Get a single project by ID (public) ---
 @router.get("/{project_id}", response_model=ProjectRead)
-def api_get_project(project_id: int, db: Session = Depends(get_db)):
+def api_get_project(
+    project_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    db: Session = Depends(get_db)
+):
     """
     Get a single project by its ID.
     - Public endpoint, no authentication required.
+    - `fields=` returns only those fields.
     """
-    project = get_project_by_id(db, project_id)
+    selected = parse_fields(ProjectRead, fields, Project)
+    project = get_project_by_id(db, project_id, fields=selected)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    if selected:
+        return render(ProjectRead, selected, project)
     return project
 
 # --- Join a project as a member (auth required) ---
@@ -88,5 +148,41 @@ def api_join_project(
     Join a project as a member.
     - Only authenticated users can join projects.
     - The current user is added as a member.
+    - Returns 409 if the team is already full (`max_team_members`).
+    """
+    return join_project(db, user_id=current_user.id, project_id=project_id)
+
+# --- Open or close a project (owner only) ---
+@router.patch("/{project_id}/status", response_model=ProjectRead)
+def api_update_project_status(
+    project_id: int,
+    update: ProjectStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Open or close a project.
+    - Only the project owner can do this (403 otherwise).
+    - Members and `/events` listeners get a `status_changed` event.
+    """
+    return update_project_status(db, project_id, current_user.id, update.status)
+
+# --- Live project updates (Server-Sent Events, public) ---
+@router.get("/{project_id}/events")
+def api_project_events(project_id: int, last_event_id: Optional[str] = Header(None)):
+    """
+    Stream project updates (`member_joined`, `status_changed`, ...) as Server-Sent Events.
+    - Use instead of polling `GET /projects/{project_id}`.
+    - A comment line is sent every `SSE_HEARTBEAT_SECONDS` while nothing happens.
+    - Reconnects with `Last-Event-ID` (browsers do this automatically) replay missed events;
+      a `reset` event means some were too old to replay, so refetch the project.
     """
-    return join_project(db, user_id=current_user.id, project_id=project_id)
\ No newline at end of file
+    # Short-lived session: the stream itself can stay open for hours
+    with SessionLocal() as db:
+        if get_project_by_id(db, project_id, fields=("id",)) is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+    return StreamingResponse(
+        project_event_stream(project_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+stats.py
+
+Public API endpoints for platform statistics (dashboards).
+
+- GET /leaderboard: Most-joined projects
+- GET /tech-stacks: Most popular tech stack entries
+- GET /signups: New users per day
+
+Data comes from materialized views refreshed every `settings.STATS_REFRESH_INTERVAL_SECONDS`,
+so responses carry a `Cache-Control` header and can be cached by browsers and proxies.
+"""
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas.stats import ProjectLeaderboardEntry, TechStackPopularity, DailySignups
+from app.services.stats_service import get_project_leaderboard, get_tech_stack_popularity, get_daily_signups
+
+router = APIRouter()
+
+# --- Dependency to get DB session ---
+def get_db():
+    """
+    Yields a database session for use in endpoints.
+    Ensures the session is closed after the request.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _cacheable(response: Response) -> None:
+    response.headers["Cache-Control"] = f"public, max-age={settings.STATS_CACHE_MAX_AGE_SECONDS}"
+
+@router.get("/leaderboard", response_model=List[ProjectLeaderboardEntry])
+def api_project_leaderboard(response: Response, limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """
+    Projects with the most members.
+    """
+    _cacheable(response)
+    return get_project_leaderboard(db, limit)
+
+@router.get("/tech-stacks", response_model=List[TechStackPopularity])
+def api_tech_stack_popularity(response: Response, limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    """
+    Tech stack entries used by the most projects.
+    """
+    _cacheable(response)
+    return get_tech_stack_popularity(db, limit)
+
+@router.get("/signups", response_model=List[DailySignups])
+def api_daily_signups(response: Response, days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+    """
+    New user signups per day (UTC) for the last `days` days.
+    """
+    _cacheable(response)
+    return get_daily_signups(db, days)
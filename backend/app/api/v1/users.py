@@ -8,14 +8,21 @@ User API endpoints (CRUD + profile).
 - Returns Pydantic schemas (never raw models).
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.db.session import SessionLocal
-from app.schemas.user import UserCreate, UserRead, UserProfileUpdate, UserPublic
-from app.services.user_service import create_user, get_all_users, get_user_by_id, update_user_profile
-from app.api.v1.dependencies import get_current_user
+from app.schemas.user import UserCreate, UserRead, UserProfileUpdate, UserPublic, UserSuggestion
+from app.schemas.project import ProjectRead, RecommendedProject
+from app.services.project_service import get_projects_by_ids
+from app.services.recommendation_service import recommend_projects
+from app.services.autocomplete_service import autocomplete_users
+from app.services.user_service import (
+    count_users, create_user, get_all_users, get_user_by_id, get_users_by_ids, update_user_profile
+)
+from app.api.v1.dependencies import batch_ids, get_current_user
+from app.api.v1.fieldsets import parse_fields, render
 from app.db.models import User
 
 router = APIRouter()
@@ -40,11 +47,46 @@ def api_create_user(user_in: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=List[UserRead])
-def api_list_users(db: Session = Depends(get_db)):
+def api_list_users(
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size (all users if omitted)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,username"),
+    db: Session = Depends(get_db)
+):
+    """
+    List all users, or one page of them (`offset`/`limit`, in id order).
+    - `fields=` returns only those fields (and only SELECTs those columns).
+    - `X-Total-Count` has the total; `X-Total-Count-Type` says if it is `exact` or `approximate`.
+    """
+    selected = parse_fields(UserRead, fields, User)
+    users = get_all_users(db, fields=selected, offset=offset, limit=limit)
+    total_headers = count_users(db).headers()
+    if selected:
+        rendered = render(UserRead, selected, users)
+        rendered.headers.update(total_headers)
+        return rendered
+    response.headers.update(total_headers)
+    return users
+
+@router.get("/batch", response_model=List[UserPublic])
+def get_users_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_db)):
+    """
+    Get several public user profiles at once, e.g. `?ids=4,8,15` (one query).
+    - Results keep the order of `ids`; unknown ids are left out.
+    """
+    return get_users_by_ids(db, ids)
+
+@router.get("/autocomplete", response_model=List[UserSuggestion])
+def autocomplete_usernames(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user typed so far"),
+    limit: int = Query(10, ge=1, le=25),
+    db: Session = Depends(get_db)
+):
     """
-    List all users.
+    Users whose username starts with `q` (alphabetically), then ones containing or resembling it.
     """
-    return get_all_users(db)
+    return autocomplete_users(db, q, limit)
 
 @router.get("/me", response_model=UserPublic)
 def get_my_profile(current_user: User = Depends(get_current_user)):
@@ -65,12 +107,37 @@ def update_my_profile(
     user = update_user_profile(db, current_user, update.dict(exclude_unset=True))
     return user
 
+@router.get("/me/recommended-projects", response_model=List[RecommendedProject])
+def get_my_recommended_projects(
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Open projects ranked by tag / tech-stack overlap with the current user's projects.
+    """
+    ranked = recommend_projects(db, current_user.id, limit)
+    scores = dict(ranked)
+    projects = get_projects_by_ids(db, [project_id for project_id, _ in ranked])
+    return [
+        RecommendedProject(**ProjectRead.model_validate(p).model_dump(), score=scores[p.id])
+        for p in projects
+    ]
+
 @router.get("/{user_id}", response_model=UserPublic)
-def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+def get_user_profile(
+    user_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    db: Session = Depends(get_db)
+):
     """
     Get a public user profile by user ID.
+    - `fields=` returns only those fields.
     """
-    user = get_user_by_id(db, user_id)
+    selected = parse_fields(UserPublic, fields, User)
+    user = get_user_by_id(db, user_id, fields=selected)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if selected:
+        return render(UserPublic, selected, user)
     return user
\ No newline at end of file
@@ -1,19 +1,31 @@
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+
+from app.websocket.auth import authenticate, token_from_websocket
+from app.websocket.connection_manager import manager
 
 router = APIRouter()
 
-# Example WebSocket endpoint for presence (replace with real logic later)
 @router.websocket("/presence")
 async def websocket_presence(websocket: WebSocket):
     """
-    Example WebSocket endpoint for user presence.
-    Accepts a connection and echoes messages back.
+    WebSocket endpoint for user presence.
+    - Authenticated on handshake with an access token: `?token=<jwt>` or the subprotocols
+      `bearer, <jwt>`. Without a valid token the handshake is rejected (403).
+    - The socket is attached to its user while open, then echoes messages back.
     """
-    await websocket.accept()
+    token, subprotocol = token_from_websocket(websocket)
+    principal = await authenticate(token) if token else None
+    if principal is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept(subprotocol=subprotocol)
+    manager.connect(principal.user_id, websocket)
     try:
         while True:
             data = await websocket.receive_text()
             await websocket.send_text(f"Echo: {data}")
-    except Exception as e:
-        # Connection closed or error
-        pass
\ No newline at end of file
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(principal.user_id, websocket)
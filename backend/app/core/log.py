@@ -0,0 +1,232 @@
+"""
+log.py
+
+Structured (JSON) logging that never blocks the caller.
+
+- Every record goes through a `QueueHandler` on the root logger. The caller only resolves the
+  message, snapshots the request context and puts the record on a bounded queue.
+  A `QueueListener` thread does the formatting and the writing to stdout.
+- If the queue is full (the sink cannot keep up), records are dropped and counted instead of
+  blocking: `log_records_dropped_total{reason="queue_full"}`.
+- DEBUG calls are sampled at `settings.LOG_DEBUG_SAMPLE_RATE`. A call can set its own rate
+  with `extra={"sample_rate": 0.001}`. Kept records carry their `sample_rate`, so aggregators can
+  weight them back up. The decision is made in `SampledLogger.debug` / `.log`, before a record
+  is built, so a dropped call costs little more than DEBUG being off. `configure_logging()` makes
+  every named logger (`logging.getLogger(__name__)`) a `SampledLogger`; the root logger's
+  module-level `logging.debug()` is not sampled.
+- The request context (request id, method, path, route, user id, DB time) is attached to every
+  record logged while handling a request. `RequestLoggingMiddleware`
+  (app/middleware/request_logging.py) sets the context and logs one access line per request.
+- DB time is measured with engine cursor events and added to the current request's context.
+- `settings.DB_ECHO` logs SQL through the same queue. It replaces `create_engine(echo=True)`,
+  which writes to stdout synchronously.
+
+How to use:
+    logger = logging.getLogger(__name__)
+    logger.info("Project archived", extra={"project_id": project.id})
+    logger.debug("Cache miss", extra={"key": key})  # Sampled
+
+Call `configure_logging()` once at startup (main.py does it on import) and `shutdown_logging()`
+on shutdown to flush the queue.
+Overhead benchmark: `python -m scripts.bench_logging`.
+"""
+
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import Counter
+
+DROPPED = Counter("log_records_dropped_total", "Log records not written", ["reason"])
+
+# --- Request context ---
+# One mutable dict per request. The threadpool inherits the ContextVar, so sync endpoints and
+# dependencies update the same dict the middleware reads at the end of the request.
+request_context: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("request_context", default=None)
+
+def bind(**fields) -> None:
+    """
+    Add fields (e.g. `user_id`) to the current request's context, if there is one.
+    """
+    context = request_context.get()
+    if context is not None:
+        context.update(fields)
+
+# --- Formatting (runs on the listener thread) ---
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request"}
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, request context and `extra` fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        context = getattr(record, "request", None)
+        if context:
+            entry.update(context)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """
+    Human-readable lines for local development (`LOG_FORMAT=text`).
+    """
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = getattr(record, "request", None)
+        if context and "request_id" in context:
+            line = f"{line} [{context['request_id']}]"
+        return line
+
+# --- Sampling and queueing (run on the caller's thread; keep them cheap) ---
+class SampledLogger(logging.Logger):
+    """
+    Logger that keeps DEBUG calls with probability `debug_sample_rate` (or the call's own
+    `extra={"sample_rate": ...}`), deciding before the record is built.
+    """
+    debug_sample_rate = 1.0
+
+    def _keep_debug(self, kwargs: dict) -> bool:
+        extra = kwargs.get("extra")
+        rate = extra.get("sample_rate") if extra else None
+        if rate is None:
+            rate = self.debug_sample_rate
+        if rate >= 1.0 or random.random() < rate:
+            if not extra or "sample_rate" not in extra:
+                kwargs["extra"] = {**(extra or {}), "sample_rate": rate}
+            return True
+        DROPPED.inc(reason="sampled")
+        return False
+
+    def debug(self, msg, *args, **kwargs):
+        if self.isEnabledFor(logging.DEBUG) and self._keep_debug(kwargs):
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1  # Report the caller, not this method
+            super().debug(msg, *args, **kwargs)
+
+    def log(self, level, msg, *args, **kwargs):
+        if level == logging.DEBUG and not (self.isEnabledFor(logging.DEBUG) and self._keep_debug(kwargs)):
+            return
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+        super().log(level, msg, *args, **kwargs)
+
+def _sample_named_loggers(rate: float) -> None:
+    SampledLogger.debug_sample_rate = rate
+    logging.setLoggerClass(SampledLogger)
+    # Loggers created on import, before configure_logging() ran
+    for existing in list(logging.Logger.manager.loggerDict.values()):
+        if type(existing) is logging.Logger:
+            existing.__class__ = SampledLogger
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    `QueueHandler` that snapshots the request context and never blocks on a full queue.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that depends on the caller (args, traceback, context) before the
+        # record changes threads; the expensive formatting happens on the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        context = request_context.get()
+        if context is not None:
+            record.request = dict(context)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED.inc(reason="queue_full")
+
+# --- DB time per request ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if request_context.get() is not None:
+        conn.info.setdefault("log_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    request = request_context.get()
+    if request is None:
+        return
+    starts = conn.info.get("log_query_start")
+    if not starts:
+        return
+    request["db_ms"] = request.get("db_ms", 0.0) + (time.perf_counter() - starts.pop()) * 1000
+    request["db_queries"] = request.get("db_queries", 0) + 1
+
+# --- Setup ---
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging() -> None:
+    """
+    Route all logging through the queue. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    handler = ContextQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _sample_named_loggers(settings.LOG_DEBUG_SAMPLE_RATE)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    # uvicorn writes to stderr with its own handlers; send its records through the queue too.
+    # Its access log is replaced by the richer line from RequestLoggingMiddleware.
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+
+    if settings.DB_ECHO:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    """
+    Write out everything still queued and stop the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
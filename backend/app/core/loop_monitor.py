@@ -0,0 +1,67 @@
+"""
+loop_monitor.py
+
+Measures event-loop lag: how late the loop runs a callback that should run right away.
+
+- A task sleeps `settings.EVENT_LOOP_LAG_INTERVAL_SECONDS` at a time. Any extra time it takes
+  to wake up is time the loop spent on other callbacks (blocking code, heavy bursts of work).
+- Metrics:
+  - `event_loop_lag_seconds`: the last measurement.
+  - `event_loop_lag_max_seconds`: the worst measurement of the last 60.
+  - `event_loop_lag_observed_seconds_sum/_count`: running total, for averages.
+
+How to use (in main.py):
+    loop_monitor.start()  # on startup, inside the running loop
+    await loop_monitor.stop()  # on shutdown
+"""
+
+import asyncio
+from collections import deque
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import Gauge, Summary
+
+LAG = Summary("event_loop_lag_observed_seconds", "Event-loop lag measurements")
+
+class LoopLagMonitor:
+    def __init__(self, interval: float, window: int = 60):
+        self.interval = interval
+        self.lag = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def max_lag(self) -> float:
+        return max(self._recent, default=0.0)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(loop.time() - started - self.interval, 0.0)
+            self._recent.append(self.lag)
+            LAG.observe(self.lag)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Singleton monitor for the app's event loop
+loop_monitor = LoopLagMonitor(settings.EVENT_LOOP_LAG_INTERVAL_SECONDS)
+
+Gauge("event_loop_lag_seconds", "Last event-loop lag measurement", callback=lambda: {(): loop_monitor.lag})
+Gauge(
+    "event_loop_lag_max_seconds", "Worst event-loop lag of the last 60 measurements",
+    callback=lambda: {(): loop_monitor.max_lag},
+)
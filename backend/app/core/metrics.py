@@ -0,0 +1,108 @@
+"""
+metrics.py
+
+Minimal in-process metrics, rendered in the Prometheus text format at `/metrics`.
+
+- `Counter`: monotonically increasing value (e.g., jobs processed).
+- `Gauge`: current value, either set directly or computed at scrape time via a callback.
+- `Summary`: running sum and count (e.g., total queue lag and number of samples).
+
+All metrics support labels and are thread-safe (services run in the threadpool).
+
+How to use:
+    JOBS_DONE = Counter("jobs_processed_total", "Jobs processed", ["type"])
+    JOBS_DONE.inc(type="send_email")
+"""
+
+import threading
+from typing import Callable, Optional
+
+_registry: list["_Metric"] = []
+_registry_lock = threading.Lock()
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Optional[list[str]] = None):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels or ())
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def samples(self) -> list[tuple[str, tuple[str, ...], float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, description, labels=None, callback: Optional[Callable[[], dict]] = None):
+        """
+        `callback`, if given, returns {label values tuple: value} and is called at scrape time.
+        """
+        super().__init__(name, description, labels)
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.callback is not None:
+            return [(self.name, key, value) for key, value in self.callback().items()]
+        return super().samples()
+
+class Summary(_Metric):
+    kind = "summary"
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key + ("sum",)] = self._values.get(key + ("sum",), 0.0) + value
+            self._values[key + ("count",)] = self._values.get(key + ("count",), 0.0) + 1
+
+    def samples(self):
+        with self._lock:
+            return [(f"{self.name}_{key[-1]}", key[:-1], value) for key, value in self._values.items()]
+
+def render_prometheus() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    with _registry_lock:
+        metrics = list(_registry)
+    for metric in metrics:
+        try:
+            samples = metric.samples()
+        except Exception:
+            # A failing callback (e.g., Redis down) must not break the whole scrape
+            continue
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, key, value in samples:
+            lines.append(f"{name}{_format_labels(metric.label_names, key)} {value}")
+    return "\n".join(lines) + "\n"
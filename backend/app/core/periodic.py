@@ -0,0 +1,60 @@
+"""
+periodic.py
+
+Run maintenance functions on a fixed interval inside the app's event loop.
+
+- Each task is an asyncio loop that calls a *sync* function in a worker thread, so slow
+  DB work never blocks request handling.
+- Failures are logged and counted; the task keeps its schedule.
+- Metrics: `periodic_task_runs_total{task,outcome}` and `periodic_task_seconds{task}`.
+
+How to use (in main.py):
+    schedule("refresh_stats", settings.STATS_REFRESH_INTERVAL_SECONDS, refresh_stats_job)
+    ...
+    await cancel_all()  # on shutdown
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from app.core.metrics import Counter, Summary
+
+logger = logging.getLogger(__name__)
+
+RUNS = Counter("periodic_task_runs_total", "Periodic task runs", ["task", "outcome"])
+DURATION = Summary("periodic_task_seconds", "Time spent in periodic tasks", ["task"])
+
+_tasks: list[asyncio.Task] = []
+
+async def _run_forever(name: str, interval: float, func: Callable[[], None], run_immediately: bool) -> None:
+    if not run_immediately:
+        await asyncio.sleep(interval)
+    while True:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(func)
+        except Exception:
+            logger.exception("Periodic task %s failed", name)
+            RUNS.inc(task=name, outcome="error")
+        else:
+            RUNS.inc(task=name, outcome="ok")
+        DURATION.observe(time.perf_counter() - started, task=name)
+        await asyncio.sleep(interval)
+
+def schedule(name: str, interval: float, func: Callable[[], None], run_immediately: bool = False) -> None:
+    """
+    Call `func()` every `interval` seconds on the running event loop (0 or less disables it).
+    """
+    if interval <= 0:
+        return
+    _tasks.append(asyncio.get_running_loop().create_task(
+        _run_forever(name, interval, func, run_immediately), name=f"periodic:{name}"
+    ))
+
+async def cancel_all() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,256 @@
+"""
+profiling.py
+
+On-demand profiling of single requests: a sampling profiler plus the SQL the request ran.
+
+- A request is profiled when it carries a valid `X-Profile` header (signed with
+  `settings.ADMIN_API_KEY`, see `sign_profile_header`) or is picked by
+  `settings.PROFILE_SAMPLE_RATE`. The middleware is in app/middleware/profiling.py.
+- While at least one request is profiled, a sampler thread looks at every thread's stack every
+  `settings.PROFILE_INTERVAL_MS`. A sample belongs to the request if the stack runs through the
+  request's middleware frame (code on the event loop) or through its endpoint function (sync
+  code in the threadpool). Dependencies shared by most routes (`get_db`, `get_current_user`)
+  are not matched, so their sync part is not sampled. Concurrent requests to the same endpoint
+  on the same worker can add samples to each other's threadpool part.
+- SQL statements and their durations come from engine cursor events, matched to the request
+  through a ContextVar (which the threadpool inherits).
+- Finished profiles go into a per-worker ring buffer of `settings.PROFILE_BUFFER_SIZE`
+  entries, served by the admin API (app/api/v1/admin.py). Stacks are in the "folded" format
+  used by flamegraph.pl and speedscope.
+
+Nothing here runs unless `settings.PROFILING_ENABLED` is set (then main.py installs the
+middleware and `install_sql_hooks()`), so requests pay nothing when profiling is off.
+"""
+
+import collections
+import contextvars
+import hashlib
+import hmac
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Signed trigger header ---
+def _signature(expires: int, path: str) -> str:
+    message = f"{expires}:{path}".encode()
+    return hmac.new(settings.ADMIN_API_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+def sign_profile_header(path: str, ttl_seconds: int = 300) -> str:
+    """
+    Value for `X-Profile` that profiles requests to `path` for the next `ttl_seconds`.
+    """
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_signature(expires, path)}"
+
+def verify_profile_header(value: str, path: str) -> bool:
+    if not settings.ADMIN_API_KEY:
+        return False
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(int(expires), path))
+
+# --- One profiled request ---
+_ids = itertools.count(1)
+_SITE_PACKAGES = os.path.dirname(os.path.dirname(os.__file__))
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_SITE_PACKAGES):
+        filename = filename[len(_SITE_PACKAGES) + 1:]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+class RequestProfile:
+    def __init__(self, scope: dict, root_frame, trigger: str):
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.scope = scope  # The router adds the matched route to it
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.trigger = trigger  # "header" or "sampled"
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.root_frame = root_frame
+        self.codes: set = set()  # The endpoint function, once routed
+        self.stacks: collections.Counter = collections.Counter()
+        self.samples = 0
+        self.sql: list[dict] = []
+        self._started = time.perf_counter()
+
+    def resolve_route(self) -> None:
+        scope = self.scope  # finish() clears it from the request thread
+        route = scope.get("route") if scope is not None else None
+        if route is None:
+            return
+        self.route = getattr(route, "path", None)
+        # Only the endpoint's own code: dependencies like get_db run for nearly every route,
+        # so matching them would pull in samples from unrelated requests
+        code = getattr(getattr(route, "endpoint", None), "__code__", None)
+        if code is not None:
+            self.codes = {code}
+
+    def owns(self, frame) -> Optional[object]:
+        """
+        Return the frame to start the stack from if `frame`'s thread is working for this request.
+        """
+        while frame is not None:
+            if frame is self.root_frame:
+                return frame
+            if frame.f_code in self.codes:
+                # Keep the threadpool plumbing above the endpoint out of the flame graph
+                return frame
+            frame = frame.f_back
+        return None
+
+    def add_sample(self, frame, stop_at) -> None:
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame.f_code))
+            if frame is stop_at:
+                break
+            frame = frame.f_back
+        self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        if self.route is None:
+            self.resolve_route()
+        # Do not keep the request's frames and scope alive
+        self.root_frame = None
+        self.scope = None
+        self.codes = set()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": self.samples,
+            "sql_count": len(self.sql),
+            "sql_ms": round(sum(q["duration_ms"] for q in self.sql), 3),
+        }
+
+    def detail(self) -> dict:
+        return {**self.summary(), "sql": self.sql, "folded": self.folded()}
+
+current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+# --- Sampler (one thread per worker, only while something is being profiled) ---
+class Sampler:
+    def __init__(self):
+        self._active: set[RequestProfile] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self) -> None:
+        interval = settings.PROFILE_INTERVAL_MS / 1000
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = list(self._active)
+            try:
+                self._sample(me, active)
+            except Exception:
+                # Keep sampling: a dead thread would stay in _thread and end profiling for good
+                logger.exception("Profiler sample failed")
+            time.sleep(interval)
+
+    def _sample(self, me: int, active: list[RequestProfile]) -> None:
+        frames = sys._current_frames()
+        try:
+            for thread_id, frame in frames.items():
+                if thread_id == me:
+                    continue
+                for profile in active:
+                    if profile.route is None:
+                        profile.resolve_route()
+                    stop_at = profile.owns(frame)
+                    if stop_at is not None:
+                        profile.add_sample(frame, stop_at)
+        finally:
+            del frames  # Do not hold other threads' frames while sleeping
+
+sampler = Sampler()
+
+# --- Ring buffer of finished profiles ---
+_recent: collections.deque = collections.deque(maxlen=settings.PROFILE_BUFFER_SIZE)
+_recent_lock = threading.Lock()
+
+def store(profile: RequestProfile) -> None:
+    with _recent_lock:
+        _recent.append(profile)
+
+def recent_profiles() -> list[RequestProfile]:
+    with _recent_lock:
+        return list(reversed(_recent))
+
+def get_profile(profile_id: str) -> Optional[RequestProfile]:
+    with _recent_lock:
+        return next((p for p in _recent if p.id == profile_id), None)
+
+# --- SQL capture ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    starts = conn.info.get("profile_query_start")
+    if not starts:
+        return
+    profile.sql.append({
+        "statement": statement,
+        "duration_ms": round((time.perf_counter() - starts.pop()) * 1000, 3),
+        "executemany": executemany,
+    })
+
+_hooks_installed = False
+
+def install_sql_hooks() -> None:
+    """
+    Listen on every Engine (primary and replicas). Parameters are not recorded (they can hold PII).
+    """
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _hooks_installed = True
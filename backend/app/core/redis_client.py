@@ -0,0 +1,40 @@
+"""
+redis_client.py
+
+Shared Redis clients for the backend.
+
+- `get_redis()`: synchronous client (for services running in the threadpool).
+- `get_async_redis()`: asyncio client (for code running on the event loop).
+- Clients are created lazily on first use, so importing this module never connects.
+
+Clients use `settings.REDIS_URL` and return `str` values (decode_responses=True).
+"""
+
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+
+from app.core.config import settings
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    """
+    Return the process-wide synchronous Redis client (it manages its own pool).
+    """
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> redis.asyncio.Redis:
+    """
+    Return the process-wide asyncio Redis client. Only use it from the app's event loop.
+    - Bursts (e.g. thousands of WebSocket handshakes at once) wait for a free connection
+      instead of failing with "Too many connections".
+    """
+    pool = redis.asyncio.BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        max_connections=settings.REDIS_ASYNC_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+    )
+    return redis.asyncio.Redis(connection_pool=pool)
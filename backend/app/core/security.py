@@ -15,6 +15,8 @@ How to use:
 - Use `decode_token` to validate and extract data from JWTs.
 """
 
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -50,11 +52,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
-    Create a JWT refresh token (default expiry: 7 days).
+    Create a JWT refresh token (default expiry: settings.REFRESH_TOKEN_EXPIRE_DAYS).
+    - `jti` makes every refresh token unique, so it can be rotated and revoked.
+    - `iat` is a float, so a token issued right after a logout is not caught by its cutoff.
     """
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(days=7))
-    to_encode.update({"exp": expire})
+    expire = datetime.utcnow() + (expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex, "type": "refresh"})
     return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 def decode_token(token: str) -> Optional[dict]:
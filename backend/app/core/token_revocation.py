@@ -0,0 +1,169 @@
+"""
+token_revocation.py
+
+Refresh-token revocation backed by Redis, mirrored in process memory.
+
+Two kinds of state live in Redis:
+- `auth:refresh:used:<jti>`: set (NX) when a refresh token is rotated. A second attempt to
+  use the same token fails the NX and is treated as token reuse.
+- `auth:revoked:user:<user_id>`: a cutoff timestamp. Every refresh token for that user issued
+  before the cutoff is revoked (logout, password change, detected reuse).
+
+User cutoffs are small and rare, so every worker keeps a copy in a TTL map that is kept fresh
+by a pub/sub subscriber thread. Checking a refresh token against it needs no DB or network hop.
+Until the subscriber has synced (or while Redis is unreachable) checks fall back to Redis.
+
+How to use:
+- Call `revocation_store.start()` on app startup and `stop()` on shutdown.
+- `claim_refresh_token(payload)` during refresh, `revoke_user(user_id)` on logout.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "auth:revocations"
+USED_JTI_PREFIX = "auth:refresh:used:"
+USER_CUTOFF_PREFIX = "auth:revoked:user:"
+
+class RevocationStore:
+    def __init__(self):
+        # user_id -> (cutoff timestamp, local expiry timestamp)
+        self._cutoffs: dict[int, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def _ttl(self) -> int:
+        # A cutoff only matters while tokens issued before it can still be valid
+        return settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+    # --- Local mirror ---
+
+    def _remember(self, user_id: int, cutoff: float, ttl: float) -> None:
+        with self._lock:
+            current = self._cutoffs.get(user_id)
+            if current is None or current[0] < cutoff:
+                self._cutoffs[user_id] = (cutoff, time.time() + ttl)
+
+    def _local_cutoff(self, user_id: int) -> Optional[float]:
+        entry = self._cutoffs.get(user_id)
+        if entry is None:
+            return None
+        cutoff, expires_at = entry
+        if expires_at <= time.time():
+            with self._lock:
+                self._cutoffs.pop(user_id, None)
+            return None
+        return cutoff
+
+    def purge_expired(self) -> int:
+        """
+        Drop expired cutoffs from the local mirror. Returns how many were removed.
+        """
+        now = time.time()
+        with self._lock:
+            expired = [uid for uid, (_, exp) in self._cutoffs.items() if exp <= now]
+            for uid in expired:
+                del self._cutoffs[uid]
+        return len(expired)
+
+    # --- Checks and writes ---
+
+    def is_revoked(self, payload: dict) -> bool:
+        """
+        True if the refresh token was issued before its user's revocation cutoff.
+        """
+        user_id = int(payload["sub"])
+        if self._ready.is_set():
+            cutoff = self._local_cutoff(user_id)
+        else:
+            value = get_redis().get(f"{USER_CUTOFF_PREFIX}{user_id}")
+            cutoff = float(value) if value is not None else None
+        return cutoff is not None and float(payload.get("iat", 0)) < cutoff
+
+    def claim_refresh_token(self, payload: dict) -> bool:
+        """
+        Mark the token's jti as used. Returns False if it had already been used.
+        """
+        ttl = max(int(payload["exp"] - time.time()), 1)
+        return bool(get_redis().set(f"{USED_JTI_PREFIX}{payload['jti']}", "1", nx=True, ex=ttl))
+
+    def revoke_user(self, user_id: int) -> None:
+        """
+        Revoke every refresh token issued to the user up to now.
+        """
+        cutoff = time.time()
+        client = get_redis()
+        pipe = client.pipeline()
+        pipe.set(f"{USER_CUTOFF_PREFIX}{user_id}", repr(cutoff), ex=self._ttl)
+        pipe.publish(CHANNEL, f"{user_id}:{cutoff!r}")
+        pipe.execute()
+        self._remember(user_id, cutoff, self._ttl)
+
+    # --- Subscriber ---
+
+    def _resync(self, client: redis.Redis) -> None:
+        keys = list(client.scan_iter(match=f"{USER_CUTOFF_PREFIX}*", count=1000))
+        if not keys:
+            return
+        pipe = client.pipeline()
+        for key in keys:
+            pipe.get(key)
+            pipe.ttl(key)
+        results = pipe.execute()
+        for key, value, ttl in zip(keys, results[0::2], results[1::2]):
+            if value is not None and ttl > 0:
+                self._remember(int(key[len(USER_CUTOFF_PREFIX):]), float(value), ttl)
+
+    def _run(self) -> None:
+        backoff = 0.5
+        while not self._stopping.is_set():
+            client = get_redis()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Subscribe before resyncing, so nothing published in between is lost
+                pubsub.subscribe(CHANNEL)
+                self._resync(client)
+                self._ready.set()
+                backoff = 0.5
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    user_id, _, cutoff = message["data"].partition(":")
+                    self._remember(int(user_id), float(cutoff), self._ttl)
+            except redis.RedisError as exc:
+                self._ready.clear()
+                logger.warning("Revocation subscriber lost Redis (%s), retrying in %.1fs", exc, backoff)
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                pubsub.close()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="token-revocation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._ready.clear()
+
+# Singleton store used by the auth service
+revocation_store = RevocationStore()
@@ -0,0 +1,158 @@
+"""
+invalidation.py
+
+Cross-worker invalidation of in-process caches, driven by Postgres LISTEN/NOTIFY.
+
+- Triggers on `users` and `projects` (see the Alembic migration) run
+  `pg_notify('cache_invalidation', '<table>:<id>')` for every inserted, updated or deleted row.
+  Postgres delivers the notification when the transaction commits, and only if it commits.
+- Each worker runs one listener thread with its own connection (outside the pool). It hands
+  every notification to the caches registered for that table.
+- Notifications sent while the listener is disconnected are lost. So whenever it (re)connects,
+  it LISTENs first and then clears every registered cache (resync). Cache TTLs are the
+  last line of defence if the listener is down for good.
+
+How to use:
+    _cache = TTLCache(maxsize=10_000, ttl=60)
+    invalidation.register_cache("users", _cache)  # Keys must be the row id
+
+    generation = invalidation.generation()
+    row = load(user_id)
+    if invalidation.generation() == generation:
+        _cache.set(user_id, row)
+
+Call `listener.start()` on app startup and `listener.stop()` on shutdown.
+Latency check: `python -m scripts.check_invalidation_latency`.
+"""
+
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Optional
+
+import psycopg2
+
+from app.core.cache import TTLCache
+from app.core.metrics import Counter
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+
+INVALIDATIONS = Counter("cache_invalidations_total", "Row invalidations received via NOTIFY", ["table"])
+RESYNCS = Counter("cache_resyncs_total", "Times every registered cache was cleared after (re)connecting")
+
+# --- Registry ---
+_handlers: dict[str, list[Callable[[int], None]]] = defaultdict(list)
+_resync_handlers: list[Callable[[], None]] = []
+_generation = 0  # Bumped on every invalidation (see `generation()`)
+
+def register(table: str, on_change: Callable[[int], None], on_resync: Callable[[], None]) -> None:
+    """
+    Call `on_change(row_id)` when a row of `table` changes, and `on_resync()` when
+    notifications may have been missed.
+    """
+    _handlers[table].append(on_change)
+    _resync_handlers.append(on_resync)
+
+def register_cache(table: str, cache: TTLCache) -> None:
+    """
+    Drop `cache[row_id]` when that row of `table` changes.
+    """
+    register(table, cache.delete, cache.clear)
+
+def generation() -> int:
+    """
+    Read before loading a row, and only cache the row if it has not changed since. Otherwise
+    a load that raced with an invalidation could put the stale row back.
+    """
+    return _generation
+
+def dispatch(payload: str) -> None:
+    global _generation
+    table, _, row_id = payload.partition(":")
+    try:
+        key = int(row_id)
+    except ValueError:
+        logger.warning("Ignoring malformed invalidation %r", payload)
+        return
+    _generation += 1
+    INVALIDATIONS.inc(table=table)
+    for handler in _handlers.get(table, ()):
+        handler(key)
+
+def resync() -> None:
+    global _generation
+    _generation += 1
+    RESYNCS.inc()
+    for handler in _resync_handlers:
+        handler()
+
+# --- Listener ---
+class InvalidationListener:
+    def __init__(self):
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _connect(self):
+        # Same connect arguments as the pool, but a dedicated connection
+        args, kwargs = engine.dialect.create_connect_args(engine.url)
+        conn = psycopg2.connect(*args, **kwargs)
+        conn.autocommit = True
+        return conn
+
+    def _run(self) -> None:
+        backoff = 0.5
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                # Listen before clearing, so nothing committed in between is missed
+                resync()
+                self._ready.set()
+                backoff = 0.5
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        dispatch(conn.notifies.pop(0).payload)
+            except (psycopg2.Error, OSError) as exc:
+                self._ready.clear()
+                logger.warning("Cache invalidation listener lost Postgres (%s), retrying in %.1fs", exc, backoff)
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def is_ready(self) -> bool:
+        """
+        True while LISTENing. Caches should be bypassed otherwise (they would not be invalidated).
+        """
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._ready.clear()
+
+# Singleton listener used across the app
+listener = InvalidationListener()
@@ -0,0 +1,98 @@
+"""
+loader.py
+
+DataLoader-style batching of id lookups, scoped to one DB session (= one request).
+
+- Code asks for rows by id with `loader.load(id)`, which only queues the id and returns a
+  handle. The first time any handle is resolved, every queued id is fetched in ONE query.
+- Resolved rows are cached for the rest of the session, so asking again is free.
+- Services run synchronously in the threadpool, so there is no event-loop tick to wait
+  for: a "tick" is everything queued before the first `.get()` / `get_many()`.
+
+How to use:
+    loader = users_loader(db)
+    owner, member = loader.load(project.owner_id), loader.load(member_id)
+    owner.get(), member.get()  # one SELECT ... WHERE id = ANY(:ids) for both
+
+    loader.get_many([3, 1, 2])  # rows in that order, missing ids skipped
+
+To add a loader for another model: add an `= ANY(:ids)` statement to repository.py and a
+factory like `users_loader` below.
+"""
+
+from typing import Callable, Generic, Iterable, Optional, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.core.metrics import Counter
+from app.db import repository
+
+T = TypeVar("T")
+
+LOADER_QUERIES = Counter("loader_queries_total", "Batched id lookups sent to the database", ["loader"])
+LOADER_KEYS = Counter("loader_keys_total", "Ids fetched by batched lookups", ["loader"])
+
+class Pending(Generic[T]):
+    """
+    A queued lookup; `get()` resolves it (and everything queued with it).
+    """
+    __slots__ = ("_loader", "_key")
+
+    def __init__(self, loader: "Loader[T]", key: int):
+        self._loader = loader
+        self._key = key
+
+    def get(self) -> Optional[T]:
+        return self._loader.get(self._key)
+
+class Loader(Generic[T]):
+    def __init__(self, name: str, db: Session, fetch: Callable[[Session, list[int]], Iterable[T]]):
+        self.name = name
+        self._db = db
+        self._fetch = fetch
+        self._cache: dict[int, Optional[T]] = {}
+        self._queued: set[int] = set()
+
+    def load(self, key: int) -> Pending[T]:
+        if key not in self._cache:
+            self._queued.add(key)
+        return Pending(self, key)
+
+    def dispatch(self) -> None:
+        """
+        Fetch every queued id in one query.
+        """
+        keys = [key for key in self._queued if key not in self._cache]
+        self._queued.clear()
+        if not keys:
+            return
+        LOADER_QUERIES.inc(loader=self.name)
+        LOADER_KEYS.inc(len(keys), loader=self.name)
+        found = {row.id: row for row in self._fetch(self._db, keys)}
+        for key in keys:
+            self._cache[key] = found.get(key)
+
+    def get(self, key: int) -> Optional[T]:
+        if key not in self._cache:
+            self._queued.add(key)
+            self.dispatch()
+        return self._cache[key]
+
+    def get_many(self, keys: Iterable[int]) -> list[T]:
+        keys = list(keys)
+        for key in keys:
+            self.load(key)
+        self.dispatch()
+        return [self._cache[key] for key in keys if self._cache[key] is not None]
+
+def _loader(db: Session, name: str, fetch) -> Loader:
+    loaders = db.info.setdefault("loaders", {})
+    if name not in loaders:
+        loaders[name] = Loader(name, db, fetch)
+    return loaders[name]
+
+def users_loader(db: Session) -> Loader:
+    return _loader(db, "users", repository.get_users_by_ids)
+
+def projects_loader(db: Session) -> Loader:
+    return _loader(db, "projects", repository.get_projects_by_ids)
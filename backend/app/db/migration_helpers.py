@@ -0,0 +1,166 @@
+"""
+migration_helpers.py
+
+Building blocks for Alembic migrations that must not stall traffic on a loaded database.
+
+- `create_index_concurrently` / `drop_index_concurrently`: CREATE/DROP INDEX CONCURRENTLY.
+  Writes keep flowing while the index builds. An INVALID index left behind by an earlier
+  failed build is dropped first (IF NOT EXISTS would silently keep it). The build itself
+  runs without a lock timeout: it waits for older transactions through lock waits, and a
+  timeout there would leave an INVALID index behind.
+- `backfill`: UPDATE in primary-key ranges, one short transaction per batch, with a pause
+  between batches and a progress line (rows, %, rows/s) every `progress_every` seconds.
+- `run_with_lock_timeout`: runs one DDL statement with a short `lock_timeout` and retries
+  with backoff. A plain ALTER TABLE waits for its ACCESS EXCLUSIVE lock, and every query on
+  the table queues behind it meanwhile; with the guard it gives up after `lock_timeout`
+  instead, lets the queue drain, and tries again.
+
+All of them need a connection in autocommit mode: CONCURRENTLY refuses to run inside a
+transaction, and the batches and retries must each commit (or fail) on their own.
+
+How to use (in a migration):
+    from app.db.migration_helpers import backfill, create_index_concurrently, run_with_lock_timeout
+
+    def upgrade() -> None:
+        with op.get_context().autocommit_block():
+            conn = op.get_bind()
+            run_with_lock_timeout(conn, "ALTER TABLE projects ADD COLUMN archived boolean")
+            backfill(conn, "projects", "archived = (status = 'closed')", where="archived IS NULL")
+            create_index_concurrently(conn, "ix_projects_archived", "projects", "archived")
+
+Progress is logged on the `alembic.helpers` logger (INFO with the default alembic.ini).
+Check under concurrent writes: `python -m scripts.check_migration_helpers`. It has not been run
+against a loaded database yet, so treat the behaviour under write load as unverified.
+"""
+
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger("alembic.helpers")
+
+# SQLSTATE of "could not obtain lock" (lock_timeout expired)
+_LOCK_NOT_AVAILABLE = "55P03"
+
+def _is_lock_timeout(error: OperationalError) -> bool:
+    return getattr(error.orig, "pgcode", None) == _LOCK_NOT_AVAILABLE
+
+# --- Lock-timeout guard ---
+def run_with_lock_timeout(
+    conn: Connection,
+    sql: str,
+    params: Optional[dict] = None,
+    lock_timeout: str = "2s",
+    attempts: int = 10,
+    backoff_seconds: float = 1.0,
+):
+    """
+    Execute `sql` with `lock_timeout`; on a lock timeout, wait and retry (doubling the wait,
+    up to 30 s). Raises the last error after `attempts` tries.
+    """
+    conn.execute(text("SELECT set_config('lock_timeout', :value, false)"), {"value": lock_timeout})
+    try:
+        for attempt in range(1, attempts + 1):
+            try:
+                return conn.execute(text(sql), params or {})
+            except OperationalError as error:
+                if not _is_lock_timeout(error) or attempt == attempts:
+                    raise
+                wait = min(backoff_seconds * 2 ** (attempt - 1), 30.0)
+                logger.info("Lock not available (attempt %d/%d), retrying in %.1fs: %s",
+                            attempt, attempts, wait, sql.split("\n")[0][:80])
+                time.sleep(wait)
+    finally:
+        conn.execute(text("RESET lock_timeout"))
+
+# --- Indexes ---
+def create_index_concurrently(
+    conn: Connection,
+    name: str,
+    table: str,
+    columns: str,
+    unique: bool = False,
+    using: Optional[str] = None,
+    where: Optional[str] = None,
+    lock_timeout: str = "2s",
+) -> None:
+    """
+    CREATE [UNIQUE] INDEX CONCURRENTLY `name` ON `table` [USING method] (`columns`) [WHERE ...].
+    `columns` is raw SQL, so expressions work: "(lower(username) COLLATE \"C\")".
+    - The build waits for transactions that already touch the table, but never blocks writes.
+    - The build runs with no lock timeout: once the catalog entry exists, waiting out older
+      transactions is a lock wait too, and timing out there would leave an INVALID index.
+      Its SHARE UPDATE EXCLUSIVE lock only conflicts with other DDL and VACUUM, so nothing
+      queues behind it.
+    - `lock_timeout` applies to dropping an INVALID index left by an earlier failed build.
+    """
+    valid = conn.execute(text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": name}).scalar()
+    if valid:
+        return
+    if valid is not None:
+        logger.info("Dropping invalid index %s left by an earlier build", name)
+        drop_index_concurrently(conn, name, lock_timeout=lock_timeout)
+    started = time.monotonic()
+    run_with_lock_timeout(
+        conn,
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {name} ON {table}"
+        f"{f' USING {using}' if using else ''} ({columns}){f' WHERE {where}' if where else ''}",
+        lock_timeout="0",
+        attempts=1,
+    )
+    logger.info("Built index %s in %.1fs", name, time.monotonic() - started)
+
+def drop_index_concurrently(conn: Connection, name: str, lock_timeout: str = "2s") -> None:
+    run_with_lock_timeout(conn, f"DROP INDEX CONCURRENTLY IF EXISTS {name}", lock_timeout=lock_timeout)
+
+# --- Backfills ---
+def backfill(
+    conn: Connection,
+    table: str,
+    set_clause: str,
+    where: Optional[str] = None,
+    params: Optional[dict] = None,
+    key: str = "id",
+    batch_size: int = 5000,
+    pause_seconds: float = 0.05,
+    progress_every: float = 10.0,
+    lock_timeout: str = "2s",
+) -> int:
+    """
+    UPDATE `table` SET `set_clause` [WHERE `where`], `batch_size` keys at a time, in key order.
+    Returns the number of rows updated.
+    - `key` must be an indexed integer column (the primary key).
+    - Make `where` exclude rows already done (e.g. "col IS NULL") so a rerun after a failure
+      skips them.
+    - Rows inserted after the start, beyond the max key read then, are not visited: have the
+      app write the new column first.
+    - Each batch commits on its own and holds its row locks only for that batch.
+    """
+    low, high = conn.execute(text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+    if low is None:
+        return 0
+    condition = f" AND ({where})" if where else ""
+    stmt = f"UPDATE {table} SET {set_clause} WHERE {key} >= :_low AND {key} < :_high{condition}"
+    total, started, reported = 0, time.monotonic(), time.monotonic()
+    for start in range(low, high + 1, batch_size):
+        result = run_with_lock_timeout(
+            conn, stmt, {**(params or {}), "_low": start, "_high": start + batch_size}, lock_timeout=lock_timeout
+        )
+        total += result.rowcount
+        now = time.monotonic()
+        if now - reported >= progress_every:
+            done = (min(start + batch_size, high + 1) - low) / (high + 1 - low)
+            logger.info("Backfill %s: %d rows, %.0f%%, %.0f rows/s",
+                        table, total, done * 100, total / (now - started))
+            reported = now
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    logger.info("Backfill %s done: %d rows in %.1fs", table, total, time.monotonic() - started)
+    return total
@@ -6,11 +6,17 @@ Defines all database models using SQLAlchemy ORM.
 - User: Represents a user account.
 - Project: Represents a collaborative project.
 - ProjectMember: Join table for users and projects (team membership).
+- ArchivedProject / ArchivedProjectMember: Closed projects moved out of the hot tables
+  (see app/services/archive_service.py).
+- Friendship: Friend requests and friendships between users.
 
 This is the single source of truth for your database schema.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, ARRAY, func
+from sqlalchemy import (
+    Column, Integer, String, DateTime, Boolean, ForeignKey, Text, ARRAY, func,
+    CheckConstraint, Index, UniqueConstraint
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 # --- SQLAlchemy Declarative Base ---
@@ -21,8 +27,8 @@ class User(Base):
     User model/table definition.
 
     - id: Primary key, auto-incrementing integer
-    - email: Unique email address
-    - username: Unique username
+    - email: Unique email address (case-insensitive)
+    - username: Unique username (case-insensitive)
     - hashed_password: Hashed password (never store plain text!)
     - is_active: Is the user allowed to log in?
     - is_verified: Has the user verified their email? (for email verification)
@@ -46,6 +52,17 @@ class User(Base):
     projects = relationship("Project", back_populates="owner")
     project_memberships = relationship("ProjectMember", back_populates="user")
 
+# Case-insensitive uniqueness (also what registration's ON CONFLICT relies on)
+Index("uq_users_lower_email", func.lower(User.email), unique=True)
+Index("uq_users_lower_username", func.lower(User.username), unique=True)
+# Autocomplete: prefix range scans and trigram (pg_trgm) substring / fuzzy matches.
+# Postgres-only (COLLATE "C", pg_trgm), so create_all() on other databases skips them
+Index("ix_users_username_prefix", func.lower(User.username).collate("C")).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_username_trgm", func.lower(User.username).label("username_lower"),
+    postgresql_using="gin", postgresql_ops={"username_lower": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+
 class Project(Base):
     """
     Project model/table definition.
@@ -56,7 +73,9 @@ class Project(Base):
     - detailed_description: Full description
     - difficulty: Difficulty level (e.g., beginner, intermediate, advanced)
     - status: Open/closed
+    - closed_at: When the project was last closed (archived some time after)
     - max_team_members: Team size limit
+    - member_count: Number of members (kept in sync by join_project/create_project)
     - tags: List of tags (e.g., 'React', 'Analytics')
     - tech_stack: List of technologies used
     - repository_url: GitHub or other repo link
@@ -74,7 +93,9 @@ class Project(Base):
     detailed_description = Column(Text)
     difficulty = Column(String, nullable=False)
     status = Column(String, default="open")
+    closed_at = Column(DateTime(timezone=True), nullable=True)
     max_team_members = Column(Integer, default=5)
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
     tags = Column(ARRAY(String))
     tech_stack = Column(ARRAY(String))
     repository_url = Column(String)
@@ -86,6 +107,13 @@ class Project(Base):
     owner = relationship("User", back_populates="projects")
     members = relationship("ProjectMember", back_populates="project")
 
+# Autocomplete (same as for usernames, Postgres-only too)
+Index("ix_projects_title_prefix", func.lower(Project.title).collate("C")).ddl_if(dialect="postgresql")
+Index(
+    "ix_projects_title_trgm", func.lower(Project.title).label("title_lower"),
+    postgresql_using="gin", postgresql_ops={"title_lower": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+
 class ProjectMember(Base):
     """
     ProjectMember model/table definition.
@@ -99,6 +127,9 @@ class ProjectMember(Base):
     - project: Relationship to Project
     """
     __tablename__ = "project_members"
+    __table_args__ = (
+        UniqueConstraint("user_id", "project_id", name="uq_project_members_user_id_project_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -108,4 +139,70 @@ class ProjectMember(Base):
 
     # Relationships
     user = relationship("User", back_populates="project_memberships")
-    project = relationship("Project", back_populates="members")
\ No newline at end of file
+    project = relationship("Project", back_populates="members")
+
+class ArchivedProject(Base):
+    """
+    ArchivedProject model/table definition.
+
+    Same columns as Project, plus:
+    - archived_at: When the project was moved here
+
+    Rows are moved here by the archiver and back when the project is reopened, so ids are
+    unique across both tables.
+    """
+    __tablename__ = "projects_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    short_description = Column(String, nullable=False)
+    detailed_description = Column(Text)
+    difficulty = Column(String, nullable=False)
+    status = Column(String)
+    closed_at = Column(DateTime(timezone=True))
+    max_team_members = Column(Integer)
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
+    tags = Column(ARRAY(String))
+    tech_stack = Column(ARRAY(String))
+    repository_url = Column(String)
+    live_demo_url = Column(String)
+    created_at = Column(DateTime(timezone=True))
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class ArchivedProjectMember(Base):
+    """
+    ArchivedProjectMember model/table definition.
+
+    The members of archived projects (same columns as ProjectMember).
+    """
+    __tablename__ = "project_members_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("projects_archive.id"), nullable=False, index=True)
+    role = Column(String)
+    joined_at = Column(DateTime(timezone=True))
+
+class Friendship(Base):
+    """
+    Friendship model/table definition.
+
+    One row per pair of users, created by the user who sends the request.
+    - id: Primary key
+    - user_id: Foreign key to User (who sent the request)
+    - friend_id: Foreign key to User (who received it)
+    - status: 'pending' until the other user accepts, then 'accepted'
+    - created_at: Timestamp
+    """
+    __tablename__ = "friendships"
+    __table_args__ = (
+        UniqueConstraint("user_id", "friend_id", name="uq_friendships_user_id_friend_id"),
+        CheckConstraint("user_id <> friend_id", name="ck_friendships_not_self"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    friend_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
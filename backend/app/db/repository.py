@@ -0,0 +1,131 @@
+"""
+repository.py
+
+Prebuilt statements for the hottest lookups (user by id/email/username, project by id,
+users/projects by a list of ids), the registration conflict check and autocomplete.
+
+Why:
+- `db.query(User).filter(User.id == user_id).first()` builds a new Query, a new WHERE
+  clause and a LIMIT every call, and SQLAlchemy has to compute a cache key for all of it.
+- The statements below are built once at import time with bind parameters. Each call only
+  binds values; the SQL string comes straight from the engine's compiled cache.
+
+Server-side prepared statements: psycopg2 (the default driver) does not support them.
+With psycopg 3 (`postgresql+psycopg://`) they are used automatically once a statement has
+run `prepare_threshold` times (5 by default), so these hot statements get prepared too.
+
+How to use:
+    from app.db import repository
+    user = repository.get_user_by_id(db, user_id)
+
+Benchmark: `python -m scripts.bench_statement_cache`.
+"""
+
+from typing import Optional
+
+from sqlalchemy import ARRAY, Integer, any_, bindparam, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.models import ArchivedProject, Project, User
+
+# --- Prebuilt statements ---
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+# Emails and usernames are unique case-insensitively (uq_users_lower_* indexes)
+USER_BY_EMAIL = select(User).where(func.lower(User.email) == func.lower(bindparam("email")))
+USER_BY_USERNAME = select(User).where(func.lower(User.username) == func.lower(bindparam("username")))
+USER_CONFLICTS = select(User.email, User.username).where(or_(
+    func.lower(User.email) == func.lower(bindparam("email")),
+    func.lower(User.username) == func.lower(bindparam("username")),
+)).limit(2)
+PROJECT_BY_ID = select(Project).where(Project.id == bindparam("project_id"))
+# One array parameter, so every batch size shares the same SQL (WHERE id = ANY(:ids))
+USERS_BY_IDS = select(User).where(User.id == any_(bindparam("ids", type_=ARRAY(Integer))))
+PROJECTS_BY_IDS = select(Project).where(Project.id == any_(bindparam("ids", type_=ARRAY(Integer))))
+# Closed projects moved out of `projects` (see app/services/archive_service.py)
+ARCHIVED_PROJECT_BY_ID = select(ArchivedProject).where(ArchivedProject.id == bindparam("project_id"))
+ARCHIVED_PROJECTS_BY_IDS = select(ArchivedProject).where(
+    ArchivedProject.id == any_(bindparam("ids", type_=ARRAY(Integer)))
+)
+
+# Autocomplete (ix_*_prefix and ix_*_trgm indexes)
+def _prefix_matches(columns, text_column):
+    # lower(x) COLLATE "C" matches the prefix index: LIKE 'abc%' becomes a range scan in index order
+    key = func.lower(text_column).collate("C")
+    return select(*columns).where(key.like(bindparam("prefix"))).order_by(key).limit(bindparam("limit"))
+
+def _fuzzy_matches(columns, text_column):
+    # Substring (LIKE '%abc%') or trigram similarity (%), both answered by the GIN index
+    lowered = func.lower(text_column)
+    return (
+        select(*columns)
+        .where(or_(lowered.like(bindparam("pattern")), lowered.op("%")(bindparam("q"))))
+        .order_by(func.similarity(lowered, bindparam("q")).desc(), lowered)
+        .limit(bindparam("limit"))
+    )
+
+USERNAME_PREFIX = _prefix_matches((User.id, User.username), User.username)
+USERNAME_FUZZY = _fuzzy_matches((User.id, User.username), User.username)
+PROJECT_TITLE_PREFIX = _prefix_matches((Project.id, Project.title, Project.status), Project.title)
+PROJECT_TITLE_FUZZY = _fuzzy_matches((Project.id, Project.title, Project.status), Project.title)
+
+# --- Lookups ---
+def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+    return db.execute(USER_BY_ID, {"user_id": user_id}).scalar_one_or_none()
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.execute(USER_BY_EMAIL, {"email": email}).scalar_one_or_none()
+
+def get_user_by_username(db: Session, username: str) -> Optional[User]:
+    return db.execute(USER_BY_USERNAME, {"username": username}).scalar_one_or_none()
+
+def get_users_by_ids(db: Session, user_ids: list[int]) -> list[User]:
+    """
+    Users with these ids, in no particular order (see app/db/loader.py for ordered, cached lookups).
+    """
+    return list(db.execute(USERS_BY_IDS, {"ids": list(user_ids)}).scalars())
+
+def find_user_conflict(db: Session, email: str, username: str) -> Optional[tuple[str, str]]:
+    """
+    Return ("email" | "username", message) if either is already taken, in one query.
+    """
+    rows = db.execute(USER_CONFLICTS, {"email": email, "username": username}).all()
+    if any(taken_email.lower() == email.lower() for taken_email, _ in rows):
+        return "email", "Email already registered"
+    if rows:
+        return "username", "Username already taken"
+    return None
+
+def get_project_by_id(db: Session, project_id: int) -> Optional[Project]:
+    return db.execute(PROJECT_BY_ID, {"project_id": project_id}).scalar_one_or_none()
+
+def get_projects_by_ids(db: Session, project_ids: list[int]) -> list[Project]:
+    """
+    Live projects first; ids not found there are looked up in the archive (second query
+    only when some are missing, which is rare).
+    """
+    projects = list(db.execute(PROJECTS_BY_IDS, {"ids": list(project_ids)}).scalars())
+    missing = set(project_ids).difference(p.id for p in projects)
+    if missing:
+        projects += db.execute(ARCHIVED_PROJECTS_BY_IDS, {"ids": list(missing)}).scalars()
+    return projects
+
+def get_archived_project_by_id(db: Session, project_id: int) -> Optional[ArchivedProject]:
+    return db.execute(ARCHIVED_PROJECT_BY_ID, {"project_id": project_id}).scalar_one_or_none()
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def autocomplete(db: Session, prefix_stmt, fuzzy_stmt, q: str, limit: int, fuzzy: bool) -> list[dict]:
+    """
+    Rows whose lowercased text starts with `q` (alphabetical), then, if `fuzzy` and there is
+    room left, rows that contain `q` or are similar to it (most similar first).
+    `q` must already be lowercase.
+    """
+    escaped = _escape_like(q)
+    rows = [dict(row) for row in db.execute(prefix_stmt, {"prefix": escaped + "%", "limit": limit}).mappings()]
+    if fuzzy and len(rows) < limit:
+        seen = {row["id"] for row in rows}
+        # At most len(rows) of these are prefix matches found already, so `limit` is enough
+        more = db.execute(fuzzy_stmt, {"pattern": f"%{escaped}%", "q": q, "limit": limit}).mappings()
+        rows += [dict(row) for row in more if row["id"] not in seen][:limit - len(rows)]
+    return rows
@@ -0,0 +1,128 @@
+"""
+routing.py
+
+Read-replica routing for database sessions.
+
+- `ReplicaPool`: round-robin over replica engines, skipping replicas that recently failed.
+- `read_only_scope`: marks the current request as safe to serve from a replica.
+- `recent_writes`: remembers users who just wrote, so their next reads hit the primary
+  (read-your-writes) until the replica has had time to catch up.
+
+How it fits together:
+- `DBRoutingMiddleware` (app/middleware/db_routing.py) decides per request whether reads
+  may go to a replica and records writes.
+- `RoutingSession` (app/db/session.py) asks this module which engine to use.
+
+Nothing here is active unless `settings.DATABASE_REPLICA_URLS` is set.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+# True while handling a request whose reads may be served by a replica
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+
+
+@contextmanager
+def read_only_scope(enabled: bool = True) -> Iterator[None]:
+    """
+    Allow (or forbid) replica reads for everything executed inside the block.
+    """
+    token = _read_only.set(enabled)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def is_read_only() -> bool:
+    return _read_only.get()
+
+
+class ReplicaPool:
+    """
+    Round-robin selection over replica engines with passive health checks.
+
+    A replica is marked down when one of its connections fails (see `handle_error`
+    below) and is skipped for `retry_after` seconds. After that it gets a single
+    `SELECT 1` probe before it is handed out again.
+    """
+
+    def __init__(self, engines: list[Engine], retry_after: float = 10.0):
+        self.engines = engines
+        self.retry_after = retry_after
+        self._down_until: dict[int, float] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        for index, replica in enumerate(engines):
+            self._watch(index, replica)
+
+    def _watch(self, index: int, replica: Engine) -> None:
+        @event.listens_for(replica, "handle_error")
+        def _on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(index)
+
+    def mark_down(self, index: int) -> None:
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_after
+
+    def _probe(self, index: int) -> bool:
+        try:
+            with self.engines[index].connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception:
+            self.mark_down(index)
+            return False
+        with self._lock:
+            self._down_until.pop(index, None)
+        return True
+
+    def choose(self) -> Optional[Engine]:
+        """
+        Return the next healthy replica, or None if every replica is down.
+        """
+        if not self.engines:
+            return None
+        start = next(self._counter)
+        now = time.monotonic()
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            down_until = self._down_until.get(index)
+            if down_until is None:
+                return self.engines[index]
+            if down_until <= now and self._probe(index):
+                return self.engines[index]
+        return None
+
+
+class RecentWrites:
+    """
+    Tracks which users wrote within the last `window` seconds (per worker process).
+    """
+
+    def __init__(self, window: float = 5.0):
+        self.window = window
+        self._until: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + self.window
+            # Keep the map small: drop expired entries once it grows
+            if len(self._until) > 10_000:
+                self._until = {uid: t for uid, t in self._until.items() if t > now}
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
@@ -6,26 +6,52 @@ Database session and engine setup using SQLAlchemy Core.
 - Creates a SQLAlchemy engine and session factory.
 - Used for all DB access throughout the app.
 - No ORM magic—explicit, clear, and easy to debug.
+- Optional read replicas: when `settings.DATABASE_REPLICA_URLS` is set, sessions opened
+  during read-only requests read from a replica (see app/db/routing.py).
 
 You can import `SessionLocal` and `engine` wherever you need DB access.
 """
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.db.routing import RecentWrites, ReplicaPool, is_read_only
 
 # --- SQLAlchemy Engine ---
 engine = create_engine(
     settings.DATABASE_URL,
-    echo=True,  # Set to False in production
-    future=True
+    future=True  # SQL logging: settings.DB_ECHO (goes through the log queue, not stdout)
+)
+
+# --- Read Replicas (optional) ---
+replica_pool = ReplicaPool(
+    [create_engine(url, pool_pre_ping=True, future=True) for url in settings.DATABASE_REPLICA_URLS],
+    retry_after=settings.REPLICA_RETRY_AFTER_SECONDS,
 )
+recent_writes = RecentWrites(window=settings.READ_YOUR_WRITES_WINDOW_SECONDS)
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a replica during read-only requests.
+
+    - Flushes (INSERT/UPDATE/DELETE) always use the primary.
+    - The replica is picked once per session, so one request sees one consistent replica.
+    - Falls back to the primary when no replica is configured or healthy.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or not is_read_only() or getattr(clause, "is_dml", False):
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        if "replica" not in self.info:
+            self.info["replica"] = replica_pool.choose()
+        return self.info["replica"] or super().get_bind(mapper=mapper, clause=clause, **kw)
 
 # --- Session Factory ---
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
     bind=engine,
     future=True
-)
\ No newline at end of file
+)
@@ -0,0 +1,356 @@
+"""
+queue.py
+
+Lightweight background job queue for side effects that should not slow down requests.
+
+- Jobs are (type, payload) pairs; payloads must be JSON-serializable.
+- Handlers receive a *batch* of payloads of the same type, so they can do one query or one
+  network call for many jobs.
+- Failed batches are retried with exponential backoff, up to `max_attempts`.
+- Two backends (`settings.JOB_QUEUE_BACKEND`):
+  - "memory": an asyncio queue inside the worker process (fast, lost on restart).
+  - "redis": a durable Redis list; a job survives restarts until a handler finishes it.
+    Each process keeps the jobs it is working on in its own processing list and refreshes a
+    heartbeat key; jobs in the list of a process whose heartbeat expired (it crashed or was
+    restarted under a new pid) are moved back to the queue by whichever process notices first.
+
+How to use:
+- Register a handler:
+      @job_queue.handler("projects.notify_members", batch_size=100)
+      def notify_members(payloads: list[dict]): ...
+- From service code, enqueue after the DB transaction commits:
+      enqueue_after_commit(db, "projects.notify_members", {"project_id": 1, "user_id": 2})
+- `main.py` calls `job_queue.start()` on startup and `job_queue.stop()` on shutdown.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Summary
+from app.core.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+JOBS_ENQUEUED = Counter("jobs_enqueued_total", "Jobs enqueued", ["type"])
+JOBS_PROCESSED = Counter("jobs_processed_total", "Jobs handled successfully", ["type"])
+JOBS_RETRIED = Counter("jobs_retried_total", "Jobs scheduled for a retry", ["type"])
+JOBS_FAILED = Counter("jobs_failed_total", "Jobs dropped after their last attempt", ["type"])
+JOBS_LAG = Summary("jobs_lag_seconds", "Time between enqueue and the start of processing", ["type"])
+
+REDIS_QUEUE_KEY = "jobs:queue"
+REDIS_DELAYED_KEY = "jobs:delayed"
+REDIS_PROCESSING_PREFIX = "jobs:processing:"
+REDIS_HEARTBEAT_PREFIX = "jobs:heartbeat:"
+
+@dataclass
+class Job:
+    type: str
+    payload: dict
+    enqueued_at: float = field(default_factory=time.time)
+    attempts: int = 0
+
+    def dumps(self) -> str:
+        return json.dumps({"type": self.type, "payload": self.payload,
+                           "enqueued_at": self.enqueued_at, "attempts": self.attempts})
+
+    @classmethod
+    def loads(cls, raw: str) -> "Job":
+        return cls(**json.loads(raw))
+
+@dataclass
+class _Handler:
+    func: Callable
+    batch_size: int
+    max_attempts: int
+
+class JobQueue:
+    def __init__(self):
+        self._handlers: dict[str, _Handler] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._pending: list[Job] = []  # Enqueued before start() (memory backend)
+        self._pending_lock = threading.Lock()
+        self._delayed = 0
+        # Durable backend: jobs being worked on by this process, until acknowledged
+        self._consumer = f"{socket.gethostname()}:{os.getpid()}"
+        self._processing_key = f"{REDIS_PROCESSING_PREFIX}{self._consumer}"
+        self._heartbeat_key = f"{REDIS_HEARTBEAT_PREFIX}{self._consumer}"
+        self._raw: dict[int, str] = {}
+
+    @property
+    def durable(self) -> bool:
+        return settings.JOB_QUEUE_BACKEND == "redis"
+
+    # --- Registration ---
+
+    def handler(self, job_type: str, batch_size: int = 1, max_attempts: Optional[int] = None):
+        """
+        Decorator registering `func(payloads: list[dict])` (sync or async) for `job_type`.
+        """
+        def decorator(func):
+            self._handlers[job_type] = _Handler(
+                func, max(1, batch_size), max_attempts or settings.JOB_MAX_ATTEMPTS
+            )
+            return func
+        return decorator
+
+    # --- Producing ---
+
+    def enqueue(self, job_type: str, payload: dict) -> None:
+        """
+        Enqueue a job. Safe to call from the event loop or any thread.
+        """
+        self._put(Job(job_type, payload))
+        JOBS_ENQUEUED.inc(type=job_type)
+
+    def _put(self, job: Job) -> None:
+        if self.durable:
+            get_redis().lpush(REDIS_QUEUE_KEY, job.dumps())
+            return
+        with self._pending_lock:
+            if self._loop is None:
+                self._pending.append(job)
+                return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+
+    def depth(self) -> int:
+        if self.durable:
+            client = get_redis()
+            return client.llen(REDIS_QUEUE_KEY) + client.zcard(REDIS_DELAYED_KEY)
+        queued = self._queue.qsize() if self._queue is not None else len(self._pending)
+        return queued + self._delayed
+
+    # --- Consuming ---
+
+    async def _next_batch(self) -> list[Job]:
+        jobs = [await self._queue.get()]
+        # Drain whatever else is ready, so same-type jobs can be handled together
+        limit = max(h.batch_size for h in self._handlers.values()) if self._handlers else 1
+        while len(jobs) < limit and not self._queue.empty():
+            jobs.append(self._queue.get_nowait())
+        return jobs
+
+    async def _worker(self) -> None:
+        while True:
+            jobs = await self._next_batch()
+            by_type: dict[str, list[Job]] = defaultdict(list)
+            for job in jobs:
+                by_type[job.type].append(job)
+            for job_type, group in by_type.items():
+                handler = self._handlers.get(job_type)
+                if handler is None:
+                    logger.error("No handler registered for job type %r; dropping %d job(s)", job_type, len(group))
+                    JOBS_FAILED.inc(len(group), type=job_type)
+                    await self._ack(group)
+                    continue
+                for start in range(0, len(group), handler.batch_size):
+                    await self._run(handler, group[start:start + handler.batch_size])
+
+    async def _run(self, handler: _Handler, batch: list[Job]) -> None:
+        job_type = batch[0].type
+        now = time.time()
+        for job in batch:
+            JOBS_LAG.observe(now - job.enqueued_at, type=job_type)
+        payloads = [job.payload for job in batch]
+        try:
+            if inspect.iscoroutinefunction(handler.func):
+                await handler.func(payloads)
+            else:
+                await asyncio.to_thread(handler.func, payloads)
+        except Exception:
+            logger.exception("Job batch %r failed (%d job(s))", job_type, len(batch))
+            for job in batch:
+                job.attempts += 1
+                if job.attempts >= handler.max_attempts:
+                    JOBS_FAILED.inc(type=job_type)
+                else:
+                    JOBS_RETRIED.inc(type=job_type)
+                    await self._retry_later(job)
+        else:
+            JOBS_PROCESSED.inc(len(batch), type=job_type)
+        await self._ack(batch)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = settings.JOB_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _retry_later(self, job: Job) -> None:
+        delay = self._backoff(job.attempts)
+        if self.durable:
+            client = get_async_redis()
+            await client.zadd(REDIS_DELAYED_KEY, {job.dumps(): time.time() + delay})
+            return
+        self._delayed += 1
+
+        def _requeue():
+            self._delayed -= 1
+            self._queue.put_nowait(job)
+        self._loop.call_later(delay, _requeue)
+
+    # --- Durable backend (Redis) ---
+
+    async def _ack(self, batch: list[Job]) -> None:
+        if not self.durable:
+            return
+        client = get_async_redis()
+        pipe = client.pipeline(transaction=False)
+        for job in batch:
+            raw = self._raw.pop(id(job), None)
+            if raw is not None:
+                pipe.lrem(self._processing_key, 1, raw)
+        await pipe.execute()
+
+    async def _heartbeat(self) -> None:
+        """
+        Keep this consumer's heartbeat key alive and look for dead consumers' jobs.
+        Its own task, so a fetcher blocked on a full local queue does not let it lapse.
+        """
+        client = get_async_redis()
+        while True:
+            try:
+                await client.set(self._heartbeat_key, "1", ex=settings.JOB_HEARTBEAT_TTL_SECONDS)
+                await self._recover_orphans(client)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job heartbeat lost Redis, retrying")
+            await asyncio.sleep(settings.JOB_HEARTBEAT_TTL_SECONDS / 3)
+
+    async def _recover_orphans(self, client) -> None:
+        """
+        Move jobs stranded in the processing list of a consumer with no live heartbeat
+        back to the queue.
+        """
+        async for key in client.scan_iter(match=f"{REDIS_PROCESSING_PREFIX}*", count=100):
+            if key == self._processing_key:
+                continue
+            consumer = key[len(REDIS_PROCESSING_PREFIX):]
+            if await client.exists(f"{REDIS_HEARTBEAT_PREFIX}{consumer}"):
+                continue
+            moved = 0
+            # LMOVE is atomic, so two processes recovering the same list never duplicate a job
+            while await client.lmove(key, REDIS_QUEUE_KEY, "RIGHT", "LEFT"):
+                moved += 1
+            if moved:
+                logger.warning("Re-queued %d job(s) left by dead consumer %s", moved, consumer)
+
+    async def _fetch_from_redis(self) -> None:
+        """
+        Move jobs from the shared Redis list into this process's processing list, and
+        hand them to the local workers. Also promotes delayed (retry) jobs that are due.
+        """
+        client = get_async_redis()
+        # Jobs left over from a previous run of this consumer (same pid) go back to the queue
+        while await client.lmove(self._processing_key, REDIS_QUEUE_KEY, "RIGHT", "LEFT"):
+            pass
+        while True:
+            try:
+                due = await client.zrangebyscore(REDIS_DELAYED_KEY, 0, time.time(), start=0, num=100)
+                for raw in due:
+                    if await client.zrem(REDIS_DELAYED_KEY, raw):
+                        await client.lpush(REDIS_QUEUE_KEY, raw)
+                raw = await client.blmove(REDIS_QUEUE_KEY, self._processing_key, 1, "RIGHT", "LEFT")
+                while raw is not None:
+                    job = Job.loads(raw)
+                    self._raw[id(job)] = raw
+                    # Bounded local queue: backpressure keeps unstarted jobs in Redis
+                    await self._queue.put(job)
+                    if self._queue.full():
+                        break
+                    # Pull whatever else is waiting right away, so it can be batched
+                    raw = await client.lmove(REDIS_QUEUE_KEY, self._processing_key, "RIGHT", "LEFT")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job fetcher lost Redis, retrying")
+                await asyncio.sleep(1.0)
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        """
+        Start the worker pool on the running event loop.
+        """
+        if self._loop is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=settings.JOB_WORKERS * 10 if self.durable else 0)
+        for _ in range(settings.JOB_WORKERS):
+            self._workers.append(loop.create_task(self._worker()))
+        if self.durable:
+            self._workers.append(loop.create_task(self._fetch_from_redis()))
+            self._workers.append(loop.create_task(self._heartbeat()))
+        with self._pending_lock:
+            self._loop = loop
+            for job in self._pending:
+                self._queue.put_nowait(job)
+            self._pending.clear()
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """
+        Give queued in-memory jobs up to `timeout` seconds to finish, then cancel workers.
+        """
+        if self._loop is None:
+            return
+        deadline = time.monotonic() + timeout
+        while not self.durable and self._queue.qsize() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        if self.durable:
+            # Unfinished jobs go back to the queue now instead of after the heartbeat expires
+            try:
+                client = get_async_redis()
+                while await client.lmove(self._processing_key, REDIS_QUEUE_KEY, "RIGHT", "LEFT"):
+                    pass
+                await client.delete(self._heartbeat_key)
+            except Exception:
+                logger.exception("Could not hand back in-flight jobs on shutdown")
+        with self._pending_lock:
+            self._loop = None
+
+# Singleton queue used across the app
+job_queue = JobQueue()
+
+Gauge(
+    "jobs_queue_depth", "Jobs waiting to be processed (including delayed retries)",
+    callback=lambda: {(): float(job_queue.depth())},
+)
+
+# --- Enqueue only after the transaction commits ---
+
+def enqueue_after_commit(db: Session, job_type: str, payload: dict) -> None:
+    """
+    Queue a job to be enqueued once `db` commits. Dropped if the transaction rolls back.
+    """
+    db.info.setdefault("pending_jobs", []).append((job_type, payload))
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_pending_jobs(session: Session) -> None:
+    for job_type, payload in session.info.pop("pending_jobs", ()):
+        try:
+            job_queue.enqueue(job_type, payload)
+        except Exception:
+            # The data is committed; a lost side effect must not fail the request
+            logger.exception("Could not enqueue job %r", job_type)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_jobs(session: Session) -> None:
+    session.info.pop("pending_jobs", None)
@@ -0,0 +1,79 @@
+"""
+tasks.py
+
+Background job handlers. Importing this module registers them on `job_queue`.
+
+- projects.notify_members: tell existing members that someone joined their project.
+- users.send_verification_email: send the email verification link after registration.
+- feed.fanout: copy project events into the members' activity feeds.
+
+Handlers receive a list of payloads and should do one query for the whole batch.
+They run in a worker thread, so they open their own DB session.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from app.core.security import create_access_token
+from app.db.models import ProjectMember
+from app.db.session import SessionLocal
+from app.jobs.queue import job_queue
+from app.services import feed_service
+
+logger = logging.getLogger(__name__)
+
+def _deliver_email(to: str, subject: str, body: str) -> None:
+    # No mail provider is configured yet; plug SMTP or a provider API in here.
+    # The body is not logged: it carries a live verification token.
+    logger.info("Email to %s: %s (%d chars, not sent: no mail provider)", to, subject, len(body))
+
+# --- Project notifications ---
+@job_queue.handler("projects.notify_members", batch_size=100)
+def notify_members(payloads: list[dict]) -> None:
+    joined_by_project: dict[int, set[int]] = defaultdict(set)
+    for payload in payloads:
+        joined_by_project[payload["project_id"]].add(payload["user_id"])
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ProjectMember.project_id, ProjectMember.user_id)
+            .filter(ProjectMember.project_id.in_(list(joined_by_project)))
+            .all()
+        )
+    finally:
+        db.close()
+
+    recipients: dict[int, set[int]] = defaultdict(set)
+    for project_id, user_id in rows:
+        if user_id not in joined_by_project[project_id]:
+            recipients[project_id].add(user_id)
+    for project_id, user_ids in recipients.items():
+        logger.info(
+            "Project %s: notifying %d member(s) about new members %s",
+            project_id, len(user_ids), sorted(joined_by_project[project_id]),
+        )
+
+# --- Email verification ---
+@job_queue.handler("users.send_verification_email", batch_size=20)
+def send_verification_email(payloads: list[dict]) -> None:
+    for payload in payloads:
+        token = create_access_token(
+            {"sub": str(payload["user_id"]), "type": "verify"},
+            expires_delta=timedelta(days=1),
+        )
+        _deliver_email(
+            payload["email"],
+            "Verify your email",
+            f"Use this token to verify your account: {token}",
+        )
+
+# --- Activity feed ---
+@job_queue.handler("feed.fanout", batch_size=200)
+def fan_out_feed_events(payloads: list[dict]) -> None:
+    db = SessionLocal()
+    try:
+        feed_service.fan_out(db, payloads)
+    finally:
+        db.close()
@@ -14,6 +14,7 @@ To run locally:
 """
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import API routers
@@ -21,10 +22,36 @@ from app.api.v1 import users as users_api
 from app.api.v1 import auth as auth_api
 from app.api.ws import presence as ws_presence
 from app.api.v1 import projects as projects_api
+from app.api.v1 import feed as feed_api
+from app.api.v1 import friends as friends_api
+from app.api.v1 import stats as stats_api
+from app.api.v1 import admin as admin_api
 
 # Import settings
 from app.core.config import settings
 
+# Background services, metrics and middleware
+from app.core.token_revocation import revocation_store
+from app.core.metrics import render_prometheus
+from app.core.periodic import schedule, cancel_all
+from app.core.loop_monitor import loop_monitor
+from app.services.stats_service import refresh_stats_job
+from app.services.archive_service import archive_closed_projects_job
+from app.services.token_cleanup_service import purge_expired_tokens_job
+from app.jobs.queue import job_queue
+from app.db.invalidation import listener as invalidation_listener
+from app.services.project_stream_service import broker as project_event_broker
+from app.jobs import tasks  # noqa: F401  (registers job handlers)
+from app.middleware.db_routing import DBRoutingMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.core.profiling import install_sql_hooks
+from app.core.log import configure_logging, shutdown_logging
+from app.middleware.request_logging import RequestLoggingMiddleware
+
+# Structured logging through a queue (before anything below logs)
+configure_logging()
+
 # Create FastAPI app instance
 app = FastAPI(
     title="new-nest-dev-hive Backend",
@@ -32,6 +59,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# --- Idempotency-Key support for POST retries ---
+# Added before CORS so it runs inside it: replayed responses still get CORS headers
+app.add_middleware(IdempotencyMiddleware)
+
 # --- CORS Middleware Setup ---
 # Allow frontend (localhost:5173 for Vite) and docs access
 app.add_middleware(
@@ -40,8 +71,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Idempotent-Replayed", "X-Profile-Id", "X-Request-ID", "X-Total-Count", "X-Total-Count-Type"],
 )
 
+# --- Request ids and access log (outside CORS, so preflights are logged too) ---
+app.add_middleware(RequestLoggingMiddleware)
+
+# --- Read-replica routing (only when replicas are configured) ---
+if settings.DATABASE_REPLICA_URLS:
+    app.add_middleware(DBRoutingMiddleware)
+
+# --- Per-request profiling (opt-in; not installed at all otherwise) ---
+if settings.PROFILING_ENABLED:
+    install_sql_hooks()
+    app.add_middleware(ProfilingMiddleware)
+
 # --- Include Routers ---
 # REST API endpoints
 app.include_router(users_api.router, prefix="/api/v1/users", tags=["users"])
@@ -53,17 +97,37 @@ app.include_router(ws_presence.router, prefix="/ws", tags=["websocket"])
 
 
 app.include_router(projects_api.router, prefix="/api/v1/projects", tags=["projects"])
+app.include_router(feed_api.router, prefix="/api/v1/feed", tags=["feed"])
+app.include_router(friends_api.router, prefix="/api/v1/friends", tags=["friends"])
+app.include_router(stats_api.router, prefix="/api/v1/stats", tags=["stats"])
+app.include_router(admin_api.router, prefix="/api/v1/admin", tags=["admin"])
 
-# --- Event Handlers (optional) ---
-# @app.on_event("startup")
-# async def startup_event():
-#     # TODO: Add startup logic (e.g., connect to DB, Redis)
-#     pass
+# --- Event Handlers ---
+@app.on_event("startup")
+async def startup_event():
+    # Mirror refresh-token revocations from Redis into this worker
+    revocation_store.start()
+    # Event-loop lag (for /metrics)
+    loop_monitor.start()
+    # Drop cached users/projects when any worker changes them (Postgres LISTEN/NOTIFY)
+    if settings.CACHE_INVALIDATION_ENABLED:
+        invalidation_listener.start()
+    # Background job workers (post-commit side effects)
+    job_queue.start()
+    # Periodic maintenance
+    schedule("refresh_stats", settings.STATS_REFRESH_INTERVAL_SECONDS, refresh_stats_job)
+    schedule("archive_projects", settings.PROJECT_ARCHIVE_INTERVAL_SECONDS, archive_closed_projects_job)
+    schedule("purge_expired_tokens", settings.TOKEN_PURGE_INTERVAL_SECONDS, purge_expired_tokens_job)
 
-# @app.on_event("shutdown")
-# async def shutdown_event():
-#     # TODO: Add shutdown logic (e.g., close DB, Redis)
-#     pass
+@app.on_event("shutdown")
+async def shutdown_event():
+    await cancel_all()
+    await loop_monitor.stop()
+    await project_event_broker.stop()
+    await job_queue.stop()
+    revocation_store.stop()
+    invalidation_listener.stop()
+    shutdown_logging()
 
 # --- Root Endpoint ---
 @app.get("/")
@@ -71,4 +135,12 @@ def read_root():
     """
     Health check endpoint.
     """
-    return {"message": "Welcome to the new-nest-dev-hive backend!"}
\ No newline at end of file
+    return {"message": "Welcome to the new-nest-dev-hive backend!"}
+
+# --- Metrics Endpoint ---
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """
+    Prometheus scrape endpoint (job queue depth/lag, etc.).
+    """
+    return render_prometheus()
\ No newline at end of file
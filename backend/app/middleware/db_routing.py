@@ -0,0 +1,62 @@
+"""
+db_routing.py
+
+ASGI middleware that decides, per request, whether DB reads may go to a replica.
+
+- GET/HEAD/OPTIONS requests read from a replica, unless the caller wrote very recently.
+  OPTIONS (e.g. CORS preflights) is safe too, and must not pin the caller to the primary.
+- Any other method uses the primary. When it succeeds (status < 400), the caller is
+  pinned to the primary for `settings.READ_YOUR_WRITES_WINDOW_SECONDS`.
+- The caller is identified by the `sub` of the bearer token, if there is one.
+
+Only installed by `main.py` when `settings.DATABASE_REPLICA_URLS` is set.
+"""
+
+from typing import Optional
+
+from app.core.security import decode_token
+from app.db.routing import read_only_scope
+from app.db.session import recent_writes
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def _user_id_from_scope(scope) -> Optional[int]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            payload = decode_token(token)
+            if payload is None or "sub" not in payload:
+                return None
+            try:
+                return int(payload["sub"])
+            except (TypeError, ValueError):
+                return None
+    return None
+
+class DBRoutingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        user_id = _user_id_from_scope(scope)
+        is_safe = scope["method"] in SAFE_METHODS
+
+        async def send_wrapper(message):
+            # Pin before the client sees the response, so its next GET is consistent
+            if (
+                message["type"] == "http.response.start"
+                and not is_safe
+                and user_id is not None
+                and message["status"] < 400
+            ):
+                recent_writes.mark(user_id)
+            await send(message)
+
+        with read_only_scope(is_safe and not recent_writes.is_sticky(user_id)):
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,197 @@
+"""
+idempotency.py
+
+ASGI middleware for the `Idempotency-Key` header on POST requests.
+
+- The first request with a key runs normally. Its response (status, headers, body) is
+  stored in Redis for `settings.IDEMPOTENCY_TTL_SECONDS`.
+- A retry with the same key gets the stored response back, with `Idempotent-Replayed: true`,
+  and the endpoint does not run again (no duplicate rows, no second bcrypt hash).
+- While the first request is in flight its key is locked. Concurrent retries wait up to
+  `settings.IDEMPOTENCY_WAIT_SECONDS` for its result, then get 409.
+- Keys are scoped to the method, path and Authorization header, so two users cannot collide.
+  Reusing a key with a different body is rejected with 422.
+- 5xx responses are not stored, so the client can retry them.
+- If Redis is down, requests run as if no key was sent.
+
+Installed for every route by `main.py`; requests without the header pass straight through.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from functools import lru_cache
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+METHODS = {"POST"}
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key, by outcome",
+    ["outcome"],
+)
+
+# Only the request that took the lock may release it
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+@lru_cache(maxsize=1)
+def _release_script():
+    return get_async_redis().register_script(_RELEASE_LUA)
+
+def _header(scope, name: bytes):
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value
+    return None
+
+def _redis_key(scope, idempotency_key: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (
+        scope["method"].encode(),
+        scope["path"].encode(),
+        _header(scope, b"authorization") or b"",
+        idempotency_key,
+    ):
+        digest.update(part)
+        digest.update(b"\0")
+    return f"idem:{digest.hexdigest()}"
+
+async def _send_json(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _replay(send, stored: dict) -> None:
+    headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in stored["headers"]]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": stored["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": stored["body"].encode("latin-1")})
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in METHODS:
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = _header(scope, HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        # The body is needed up front to fingerprint it; it is replayed to the app below
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        key = _redis_key(scope, idempotency_key)
+        try:
+            handled = await self._handle(scope, replay_receive, send, key, fingerprint)
+        except RedisError:
+            logger.warning("Redis unavailable, handling request without its Idempotency-Key")
+            handled = False
+        if not handled:
+            IDEMPOTENCY_REQUESTS.inc(outcome="bypassed")
+            await self.app(scope, replay_receive, send)
+
+    async def _handle(self, scope, receive, send, key: str, fingerprint: str) -> bool:
+        """
+        Serve the request through the idempotency store. Returns False if Redis failed
+        before anything was sent, so the caller can run the request normally.
+        """
+        client = get_async_redis()
+        lock_key, token = f"{key}:lock", uuid.uuid4().hex
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.05
+        while True:
+            raw = await client.get(key)
+            if raw is not None:
+                stored = json.loads(raw)
+                if stored["fingerprint"] != fingerprint:
+                    IDEMPOTENCY_REQUESTS.inc(outcome="mismatch")
+                    await _send_json(send, 422, "Idempotency-Key was already used with a different request body")
+                else:
+                    IDEMPOTENCY_REQUESTS.inc(outcome="replayed")
+                    await _replay(send, stored)
+                return True
+            if await client.set(lock_key, token, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS):
+                break
+            # Another request with this key is in flight: wait for its result
+            if time.monotonic() >= deadline:
+                IDEMPOTENCY_REQUESTS.inc(outcome="conflict")
+                await _send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+                return True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        IDEMPOTENCY_REQUESTS.inc(outcome="executed")
+        response = {"fingerprint": fingerprint, "status": 500, "headers": [], "body": ""}
+        chunks = []
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    (k.decode("latin-1"), v.decode("latin-1")) for k, v in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            # Errors from the app itself (a RedisError included) propagate as usual
+            await self.app(scope, receive, send_wrapper)
+            if response["status"] < 500:
+                response["body"] = b"".join(chunks).decode("latin-1")
+                try:
+                    await client.set(key, json.dumps(response), ex=settings.IDEMPOTENCY_TTL_SECONDS)
+                except RedisError:
+                    # The response already went out; only replays of it are lost
+                    logger.warning("Could not store the response for an Idempotency-Key")
+        finally:
+            try:
+                await _release_script()(keys=[lock_key], args=[token])
+            except RedisError:
+                pass  # Expires after IDEMPOTENCY_LOCK_SECONDS
+        return True
@@ -0,0 +1,63 @@
+"""
+profiling.py
+
+ASGI middleware that profiles selected requests (see app/core/profiling.py).
+
+- Profiles a request if its `X-Profile` header is signed for its path, or at random with
+  probability `settings.PROFILE_SAMPLE_RATE`.
+- Profiled responses get an `X-Profile-Id` header; fetch the profile from
+  `/api/v1/admin/profiles/<id>` on the same worker.
+
+Only installed by `main.py` when `settings.PROFILING_ENABLED` is set.
+"""
+
+import random
+import sys
+
+from app.core import profiling
+from app.core.config import settings
+
+HEADER = b"x-profile"
+SKIP_PREFIX = "/api/v1/admin/profiles"
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    def _trigger(self, scope):
+        if scope["type"] != "http" or scope["path"].startswith(SKIP_PREFIX):
+            return None
+        for name, value in scope.get("headers", []):
+            if name == HEADER:
+                return "header" if profiling.verify_profile_header(value.decode("latin-1"), scope["path"]) else None
+        if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Samples whose stack goes through this frame belong to this request
+        profile = profiling.RequestProfile(scope, sys._getframe(), trigger)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())],
+                }
+            await send(message)
+
+        token = profiling.current_profile.set(profile)
+        profiling.sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiling.sampler.remove(profile)
+            profiling.current_profile.reset(token)
+            profile.finish()
+            profiling.store(profile)
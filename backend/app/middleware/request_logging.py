@@ -0,0 +1,74 @@
+"""
+request_logging.py
+
+ASGI middleware that gives every HTTP request a log context and one access log line.
+
+- Request id: the caller's `X-Request-ID` if it looks sane, a new one otherwise. It is echoed
+  back in the `X-Request-ID` response header.
+- Every record logged while handling the request carries `request_id`, `method`, `path`,
+  `route` and, once authenticated, `user_id` (see app/core/log.py).
+- At the end, logs `request` on the `app.access` logger with `status`, `duration_ms`,
+  `db_ms` and `db_queries`.
+"""
+
+import logging
+import time
+import uuid
+
+from app.core.log import request_context
+
+logger = logging.getLogger("app.access")
+
+HEADER = b"x-request-id"
+MAX_REQUEST_ID_LENGTH = 64
+
+def _request_id(scope) -> str:
+    for name, value in scope.get("headers", []):
+        if name == HEADER:
+            candidate = value.decode("latin-1")
+            if 0 < len(candidate) <= MAX_REQUEST_ID_LENGTH and candidate.replace("-", "").replace("_", "").isalnum():
+                return candidate
+            break
+    return uuid.uuid4().hex
+
+class RequestLoggingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope)
+        context = {"request_id": request_id, "method": scope["method"], "path": scope["path"]}
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (HEADER, request_id.encode())],
+                }
+            await send(message)
+
+        token = request_context.set(context)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                context["route"] = getattr(route, "path", None)
+            logger.info(
+                "request",
+                extra={
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "db_ms": round(context.get("db_ms", 0.0), 3),
+                    "db_queries": context.get("db_queries", 0),
+                },
+            )
+            request_context.reset(token)
@@ -0,0 +1,23 @@
+"""
+feed.py
+
+Pydantic schemas for the activity feed.
+
+- `FeedItem`: one event (e.g., someone joined one of your projects).
+- `FeedPage`: a page of items plus the offset of the next page (None at the end).
+"""
+
+from pydantic import BaseModel
+from typing import List, Optional
+
+class FeedItem(BaseModel):
+    id: str
+    kind: str  # "project_created", "member_joined", ...
+    project_id: int
+    actor_id: int
+    ts: float  # Unix timestamp of the event
+    data: dict = {}
+
+class FeedPage(BaseModel):
+    items: List[FeedItem]
+    next_offset: Optional[int] = None
@@ -0,0 +1,33 @@
+"""
+friend.py
+
+Pydantic schemas for friendships.
+
+- `FriendshipRead`: a friend request or friendship (response).
+- `FriendRead`: minimal public info about a friend.
+- `FriendSuggestion`: a "people you may know" entry, with the reasons behind it.
+"""
+
+from pydantic import BaseModel
+from datetime import datetime
+
+class FriendshipRead(BaseModel):
+    id: int
+    user_id: int  # Who sent the request
+    friend_id: int  # Who received it
+    status: str  # 'pending' or 'accepted'
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class FriendRead(BaseModel):
+    id: int
+    username: str
+
+    class Config:
+        from_attributes = True
+
+class FriendSuggestion(FriendRead):
+    mutual_friends: int
+    shared_projects: int
@@ -18,7 +18,7 @@ To extend:
 """
 
 from pydantic import BaseModel, HttpUrl
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 # --- Base schema for shared project fields ---
@@ -38,15 +38,30 @@ class ProjectBase(BaseModel):
 class ProjectCreate(ProjectBase):
     pass
 
+# --- Schema for changing a project's status (request body) ---
+class ProjectStatusUpdate(BaseModel):
+    status: Literal["open", "closed"]
+
 # --- Schema for reading project data (response) ---
 class ProjectRead(ProjectBase):
     id: int
     owner_id: int
     created_at: datetime
+    member_count: int = 0
 
     class Config:
         from_attributes = True  # Allows conversion from SQLAlchemy model
 
+# --- Schema for a recommended project (response) ---
+class RecommendedProject(ProjectRead):
+    score: float  # Cosine similarity to the user's projects (0..1)
+
+# --- Schema for one project autocomplete result ---
+class ProjectSuggestion(BaseModel):
+    id: int
+    title: str
+    status: Optional[str] = None
+
 # --- Schema for reading project member data ---
 class ProjectMemberRead(BaseModel):
     id: int
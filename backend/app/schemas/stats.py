@@ -0,0 +1,21 @@
+"""
+stats.py
+
+Pydantic schemas for platform statistics.
+"""
+
+from pydantic import BaseModel
+from datetime import date
+
+class ProjectLeaderboardEntry(BaseModel):
+    project_id: int
+    title: str
+    member_count: int
+
+class TechStackPopularity(BaseModel):
+    tech: str
+    project_count: int
+
+class DailySignups(BaseModel):
+    day: date
+    signups: int
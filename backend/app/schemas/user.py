@@ -65,4 +65,11 @@ class UserPublic(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class UserSuggestion(BaseModel):
+    """
+    One autocomplete result (member invites, mentions).
+    """
+    id: int
+    username: str
@@ -0,0 +1,132 @@
+"""
+archive_service.py
+
+Moves closed projects out of the hot `projects` / `project_members` tables and back.
+
+- Projects closed for more than `settings.PROJECT_ARCHIVE_AFTER_DAYS` are moved, with their
+  members, to `projects_archive` / `project_members_archive`. Listing, joining and
+  recommending only ever scan open (and recently closed) projects, so the hot tables and
+  their indexes stay small.
+- Moves run in batches of `settings.PROJECT_ARCHIVE_BATCH_SIZE`, one statement and one
+  short transaction per batch. Rows locked by a request are skipped (picked up next run),
+  so the archiver never waits on, or blocks, user traffic.
+- Ids are kept, so links and feed entries stay valid: lookups by id fall back to the
+  archive (see repository.get_projects_by_ids). Reopening an archived project moves it
+  back (`restore_project`).
+- Runs on a schedule (`settings.PROJECT_ARCHIVE_INTERVAL_SECONDS`) in every worker; the
+  batches lock disjoint rows, so concurrent runs just share the work.
+- Metrics: `projects_archived_total`, `projects_restored_total`.
+
+The archive tables are created by an Alembic migration, which also moves the projects
+that were already closed.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED = Counter("projects_archived_total", "Closed projects moved to the archive tables")
+RESTORED = Counter("projects_restored_total", "Archived projects moved back when reopened")
+
+_PROJECT_COLUMNS = (
+    "id", "title", "short_description", "detailed_description", "difficulty", "status", "closed_at",
+    "max_team_members", "member_count", "tags", "tech_stack", "repository_url", "live_demo_url",
+    "created_at", "owner_id",
+)
+_MEMBER_COLUMNS = ("id", "user_id", "project_id", "role", "joined_at")
+
+def _cols(columns: tuple[str, ...], alias: str = "") -> str:
+    return ", ".join(f"{alias}{c}" for c in columns)
+
+# Projects and members are deleted and re-inserted by one statement (data-modifying CTEs),
+# so a batch is atomic without holding locks across round trips.
+_ARCHIVE_BATCH = text(f"""
+    WITH batch AS (
+        SELECT id FROM projects
+        WHERE status = 'closed' AND COALESCE(closed_at, created_at) < :cutoff
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), members AS (
+        DELETE FROM project_members m USING batch WHERE m.project_id = batch.id
+        RETURNING {_cols(_MEMBER_COLUMNS, "m.")}
+    ), archived_members AS (
+        INSERT INTO project_members_archive ({_cols(_MEMBER_COLUMNS)})
+        SELECT {_cols(_MEMBER_COLUMNS)} FROM members
+    ), moved AS (
+        DELETE FROM projects p USING batch WHERE p.id = batch.id
+        RETURNING {_cols(_PROJECT_COLUMNS, "p.")}
+    )
+    INSERT INTO projects_archive ({_cols(_PROJECT_COLUMNS)})
+    SELECT {_cols(_PROJECT_COLUMNS)} FROM moved
+""")
+
+_RESTORE = text(f"""
+    WITH moved AS (
+        DELETE FROM projects_archive WHERE id = :project_id
+        RETURNING {_cols(_PROJECT_COLUMNS)}
+    ), restored AS (
+        INSERT INTO projects ({_cols(_PROJECT_COLUMNS)})
+        SELECT {_cols(_PROJECT_COLUMNS)} FROM moved
+        RETURNING id
+    ), members AS (
+        DELETE FROM project_members_archive m USING restored WHERE m.project_id = restored.id
+        RETURNING {_cols(_MEMBER_COLUMNS, "m.")}
+    )
+    INSERT INTO project_members ({_cols(_MEMBER_COLUMNS)})
+    SELECT {_cols(_MEMBER_COLUMNS)} FROM members
+""")
+
+# --- Archive (runs in the background) ---
+def archive_closed_projects(db: Session, batch_size: int, older_than_days: int) -> int:
+    """
+    Move one batch of projects closed before `older_than_days` ago. Returns how many moved.
+    - A closed project without `closed_at` (closed by code that predates it) counts from
+      `created_at`, so it still waits `older_than_days` instead of going on the next run.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    moved = db.execute(_ARCHIVE_BATCH, {"cutoff": cutoff, "batch_size": batch_size}).rowcount
+    db.commit()
+    if moved:
+        ARCHIVED.inc(moved)
+    return moved
+
+def archive_closed_projects_job() -> None:
+    db = SessionLocal()
+    try:
+        total = 0
+        while True:
+            moved = archive_closed_projects(
+                db, settings.PROJECT_ARCHIVE_BATCH_SIZE, settings.PROJECT_ARCHIVE_AFTER_DAYS
+            )
+            total += moved
+            if moved < settings.PROJECT_ARCHIVE_BATCH_SIZE:
+                break
+        if total:
+            logger.info("Archived %d closed project(s)", total)
+    finally:
+        db.close()
+
+# --- Restore (a reopened project goes back to the hot tables) ---
+def restore_project(db: Session, project_id: int) -> Optional[int]:
+    """
+    Move an archived project and its members back, in the caller's transaction.
+    Returns the project id, or None if it was not archived. The caller commits.
+    """
+    moved = db.execute(
+        text("SELECT id FROM projects_archive WHERE id = :project_id FOR UPDATE"), {"project_id": project_id}
+    ).scalar_one_or_none()
+    if moved is None:
+        return None
+    db.execute(_RESTORE, {"project_id": project_id})
+    RESTORED.inc()
+    return project_id
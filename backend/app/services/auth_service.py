@@ -5,11 +5,13 @@ Business logic for registration, login, and token management.
 
 - Handles user registration (with password hashing and uniqueness checks)
 - Handles user authentication (login with email or username)
-- Can be extended for refresh tokens, email verification, etc.
+- Handles refresh token rotation and revocation (logout, password change)
+- Can be extended for email verification, etc.
 """
 
 from sqlalchemy.orm import Session
 from app.db.models import User
+from app.db import repository
 from app.schemas.auth import UserRegister
 from app.core.security import (
     hash_password,
@@ -18,31 +20,23 @@ from app.core.security import (
     create_refresh_token,
     decode_token
 )
+from app.core.token_revocation import revocation_store
+from app.services import user_service
 from fastapi import HTTPException, status
+from redis.exceptions import RedisError
 from typing import Optional
 
 def register_user(db: Session, user_in: UserRegister) -> User:
     """
-    Register a new user.
-    - Checks for unique email and username.
-    - Hashes the password before storing.
+    Register a new user (see `user_service.create_user`).
+    - Email and username must be unique, ignoring case.
     - Sets is_active to True and is_verified to False (for email verification).
+    - Sends the verification email in the background, once the user is committed.
     """
-    if db.query(User).filter(User.email == user_in.email).first():
-        raise HTTPException(status_code=400, detail="Email already registered")
-    if db.query(User).filter(User.username == user_in.username).first():
-        raise HTTPException(status_code=400, detail="Username already taken")
-    user = User(
-        email=user_in.email,
-        username=user_in.username,
-        hashed_password=hash_password(user_in.password),
-        is_active=True,
-        is_verified=False
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    try:
+        return user_service.create_user(db, user_in)
+    except user_service.UserConflictError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 def authenticate_user(
     db: Session,
@@ -56,27 +50,44 @@ def authenticate_user(
     """
     user = None
     if email:
-        user = db.query(User).filter(User.email == email).first()
+        user = repository.get_user_by_email(db, email)
     elif username:
-        user = db.query(User).filter(User.username == username).first()
+        user = repository.get_user_by_username(db, username)
 
     if not user or not verify_password(password, user.hashed_password):
         return None
     return user
 
-def refresh_access_token(db: Session, refresh_token: str) -> str:
+def refresh_access_token(refresh_token: str) -> tuple[str, str]:
     """
-    Validate the refresh token and return a new access token.
+    Validate the refresh token and rotate it.
+    - Returns (new access token, new refresh token); the old refresh token is used up.
+    - No DB lookup: revocation is checked against the in-memory mirror (see token_revocation.py).
+      Inactive users still cannot use the new access token, since `get_current_user` checks them.
+    - Reusing an already-rotated token revokes all of the user's refresh tokens.
     """
     payload = decode_token(refresh_token)
-    if payload is None or "sub" not in payload:
+    if payload is None or "sub" not in payload or "jti" not in payload or payload.get("type") != "refresh":
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     user_id = int(payload["sub"])
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user or not user.is_active:
-        raise HTTPException(status_code=401, detail="User not found or inactive")
-    # Optionally: check if refresh_token matches user's stored token for extra security
-    return create_access_token({"sub": str(user.id)})
+    try:
+        if revocation_store.is_revoked(payload):
+            raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+        if not revocation_store.claim_refresh_token(payload):
+            revocation_store.revoke_user(user_id)
+            raise HTTPException(status_code=401, detail="Refresh token has already been used")
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Token service unavailable")
+    return (
+        create_access_token({"sub": str(user_id)}),
+        create_refresh_token({"sub": str(user_id)}),
+    )
+
+def _revoke_refresh_tokens(user: User) -> None:
+    try:
+        revocation_store.revoke_user(user.id)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Token service unavailable")
 
 def change_user_password(db: Session, user: User, old_password: str, new_password: str):
     """
@@ -87,13 +98,17 @@ def change_user_password(db: Session, user: User, old_password: str, new_passwor
     user.hashed_password = hash_password(new_password)
     db.commit()
     db.refresh(user)
+    # Sessions on other devices must log in again with the new password
+    _revoke_refresh_tokens(user)
     return user
 
 def logout_user(db: Session, user: User):
     """
-    Invalidate the user's refresh token (logout).
+    Invalidate the user's refresh tokens (logout).
+    - Revokes every refresh token issued to the user so far (all devices).
     """
     user.refresh_token = None
     db.commit()
     db.refresh(user)
+    _revoke_refresh_tokens(user)
     return True
@@ -0,0 +1,65 @@
+"""
+autocomplete_service.py
+
+Business logic for autocomplete on usernames (member invites) and project titles (search boxes).
+
+- Prefix matches come first, alphabetically, from a byte-order btree index on lower(text).
+- If there is room left and the query has at least `FUZZY_MIN_LENGTH` characters, substring
+  and trigram-similarity matches follow, most similar first (pg_trgm GIN index). Trigrams
+  need three characters to be selective.
+- Short prefixes are both the hottest and the ones with the most matches. Up to
+  `settings.AUTOCOMPLETE_CACHE_MAX_LENGTH` characters, results are kept in a small per-worker
+  LRU cache for `settings.AUTOCOMPLETE_CACHE_TTL_SECONDS`. New users and projects can take
+  that long to appear.
+- Metric: `autocomplete_requests_total{kind,source}` (source is "cache" or "db").
+
+The indexes are created by an Alembic migration (pg_trgm extension included).
+Latency check: `python -m scripts.bench_autocomplete`.
+"""
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.db import repository
+
+REQUESTS = Counter("autocomplete_requests_total", "Autocomplete lookups", ["kind", "source"])
+
+FUZZY_MIN_LENGTH = 3
+
+_caches = {
+    "users": TTLCache(maxsize=settings.AUTOCOMPLETE_CACHE_SIZE, ttl=settings.AUTOCOMPLETE_CACHE_TTL_SECONDS),
+    "projects": TTLCache(maxsize=settings.AUTOCOMPLETE_CACHE_SIZE, ttl=settings.AUTOCOMPLETE_CACHE_TTL_SECONDS),
+}
+_statements = {
+    "users": (repository.USERNAME_PREFIX, repository.USERNAME_FUZZY),
+    "projects": (repository.PROJECT_TITLE_PREFIX, repository.PROJECT_TITLE_FUZZY),
+}
+
+def _complete(db: Session, kind: str, q: str, limit: int) -> list[dict]:
+    q = " ".join(q.lower().split())
+    cacheable = len(q) <= settings.AUTOCOMPLETE_CACHE_MAX_LENGTH
+    if cacheable:
+        rows = _caches[kind].get((q, limit))
+        if rows is not None:
+            REQUESTS.inc(kind=kind, source="cache")
+            return rows
+    prefix_stmt, fuzzy_stmt = _statements[kind]
+    rows = repository.autocomplete(db, prefix_stmt, fuzzy_stmt, q, limit, fuzzy=len(q) >= FUZZY_MIN_LENGTH)
+    if cacheable:
+        _caches[kind].set((q, limit), rows)
+    REQUESTS.inc(kind=kind, source="db")
+    return rows
+
+def autocomplete_users(db: Session, q: str, limit: int = 10) -> list[dict]:
+    """
+    Users whose username starts with, contains or resembles `q`: [{"id", "username"}, ...].
+    """
+    return _complete(db, "users", q, limit)
+
+def autocomplete_projects(db: Session, q: str, limit: int = 10) -> list[dict]:
+    """
+    Projects whose title starts with, contains or resembles `q`: [{"id", "title", "status"}, ...].
+    """
+    return _complete(db, "projects", q, limit)
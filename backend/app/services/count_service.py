@@ -0,0 +1,96 @@
+"""
+count_service.py
+
+Totals for paginated lists ("1,234 projects") without `SELECT count(*)` over big tables.
+
+- Whole tables: the planner's row estimate (`pg_class.reltuples`, kept up to date by
+  autovacuum/ANALYZE). Tables estimated below `settings.COUNT_EXACT_THRESHOLD` rows (or
+  never analyzed) are counted exactly instead, capped at the threshold: that is cheap, and
+  small numbers are the ones people notice. Decided per table, so an empty archive table
+  next to a big one never forces a full count of the big one. The total is cached per
+  worker for `settings.COUNT_CACHE_TTL_SECONDS`.
+- Filtered lists: counted exactly, but never past the threshold (`LIMIT threshold + 1`
+  in a subquery). Beyond it, the planner's estimate for the query is used.
+- Every total says whether it is exact: `X-Total-Count` / `X-Total-Count-Type`
+  (`exact` or `approximate`) headers, see `TotalCount.headers()`.
+- Metric: `total_counts_total{method}` (method: cached, estimate, exact, capped).
+
+How to use:
+    total = count_table(db, "projects")                       # unfiltered
+    total = count_query(db, select(Project.id).where(...))    # filtered
+    response.headers.update(total.headers())
+"""
+
+import json
+from dataclasses import dataclass
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Counter
+
+COUNTS = Counter("total_counts_total", "List totals computed, by method", ["method"])
+
+_estimates = TTLCache(maxsize=128, ttl=settings.COUNT_CACHE_TTL_SECONDS)
+
+# -1 (PostgreSQL 14+) or 0 for tables that were never vacuumed/analyzed
+_RELTUPLES = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)")
+
+@dataclass(frozen=True)
+class TotalCount:
+    value: int
+    exact: bool
+
+    def headers(self) -> dict[str, str]:
+        return {"X-Total-Count": str(self.value), "X-Total-Count-Type": "exact" if self.exact else "approximate"}
+
+# --- Whole tables ---
+def count_table(db: Session, *tables: str) -> TotalCount:
+    """
+    Rows in `tables` together (e.g. live + archived projects). Table names are trusted.
+    """
+    total = _estimates.get(tables)
+    if total is not None:
+        COUNTS.inc(method="cached")
+        return total
+    counts = [_count_one_table(db, table) for table in tables]
+    total = TotalCount(sum(c.value for c in counts), exact=all(c.exact for c in counts))
+    _estimates.set(tables, total)
+    return total
+
+def _count_one_table(db: Session, table: str) -> TotalCount:
+    cap = settings.COUNT_EXACT_THRESHOLD
+    estimate = db.execute(_RELTUPLES, {"table": table}).scalar() or 0
+    if estimate >= cap:
+        COUNTS.inc(method="estimate")
+        return TotalCount(estimate, exact=False)
+    # Small, or not analyzed yet (so maybe big after all): count, but never past the cap
+    capped = db.execute(text(f"SELECT count(*) FROM (SELECT 1 FROM {table} LIMIT :limit) AS t"),
+                        {"limit": cap + 1}).scalar_one()
+    if capped <= cap:
+        COUNTS.inc(method="exact")
+        return TotalCount(capped, exact=True)
+    COUNTS.inc(method="capped")
+    return TotalCount(max(capped, estimate), exact=False)
+
+# --- Filtered queries ---
+def count_query(db: Session, stmt: Select) -> TotalCount:
+    """
+    Rows returned by `stmt`: exact up to `settings.COUNT_EXACT_THRESHOLD`, estimated above.
+    """
+    cap = settings.COUNT_EXACT_THRESHOLD
+    capped = db.execute(select(func.count()).select_from(stmt.limit(cap + 1).subquery())).scalar_one()
+    if capped <= cap:
+        COUNTS.inc(method="exact")
+        return TotalCount(capped, exact=True)
+    COUNTS.inc(method="capped")
+    return TotalCount(max(capped, _planner_rows(db, stmt)), exact=False)
+
+def _planner_rows(db: Session, stmt: Select) -> int:
+    compiled = stmt.compile(bind=db.get_bind(clause=stmt))
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar_one()
+    if isinstance(plan, str):  # Drivers that do not decode json
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,150 @@
+"""
+feed_service.py
+
+Business logic for the "what's happening in my projects" activity feed.
+
+- Events (project created, member joined, ...) are recorded from service code with
+  `record_project_event`, and fanned out by a background job once the transaction commits.
+- Fan-out-on-write: each member gets a copy of the event in a capped Redis list
+  (`feed:user:<id>`), so reading a page is a single LRANGE.
+- Projects with more than `settings.FEED_FANOUT_MAX_MEMBERS` members are too expensive to
+  copy to every member. Their events go to one list (`feed:project:<id>`), and members get
+  the project id in `feed:user:<id>:big`. Reads merge those lists in (fan-out-on-read).
+- A page is always served by one Redis call (a Lua script that does the merge server-side).
+- Fan-out also appends each event to the SSE stream (see project_stream_service.py).
+
+How to use:
+- `record_project_event(db, project_id, "member_joined", actor_id=user.id)` before `db.commit()`.
+- `get_feed(user_id, offset, limit)` from the API.
+"""
+
+import json
+import time
+import uuid
+from collections import defaultdict
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.db.models import ProjectMember
+from app.jobs.queue import enqueue_after_commit
+from app.services import project_stream_service
+
+BIG_PROJECTS_KEY = "feed:bigprojects"
+
+def _user_key(user_id: int) -> str:
+    return f"feed:user:{user_id}"
+
+def _user_big_key(user_id: int) -> str:
+    return f"feed:user:{user_id}:big"
+
+def _project_key(project_id: int) -> str:
+    return f"feed:project:{project_id}"
+
+# Merges the user's own list with the lists of the big projects they belong to.
+# Items are JSON with a "ts" field; newest first.
+_READ_PAGE_LUA = """
+local offset = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local wanted = offset + limit
+local own = redis.call('LRANGE', KEYS[1], 0, wanted - 1)
+local big = redis.call('SMEMBERS', KEYS[2])
+if #big == 0 then
+    local page = {}
+    for i = offset + 1, math.min(wanted, #own) do page[#page + 1] = own[i] end
+    return page
+end
+local merged = {}
+for _, item in ipairs(own) do merged[#merged + 1] = {cjson.decode(item).ts, item} end
+for _, project_id in ipairs(big) do
+    for _, item in ipairs(redis.call('LRANGE', ARGV[3] .. project_id, 0, wanted - 1)) do
+        merged[#merged + 1] = {cjson.decode(item).ts, item}
+    end
+end
+table.sort(merged, function(a, b) return a[1] > b[1] end)
+local page = {}
+for i = offset + 1, math.min(wanted, #merged) do page[#page + 1] = merged[i][2] end
+return page
+"""
+
+@lru_cache(maxsize=1)
+def _read_page_script():
+    # Sent once, then called by SHA (EVALSHA)
+    return get_redis().register_script(_READ_PAGE_LUA)
+
+# --- Recording events ---
+def record_project_event(
+    db: Session,
+    project_id: int,
+    kind: str,
+    actor_id: int,
+    data: Optional[dict] = None,
+) -> None:
+    """
+    Record a project event; it is fanned out to members after `db` commits.
+    """
+    event = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "project_id": project_id,
+        "actor_id": actor_id,
+        "ts": time.time(),
+        "data": data or {},
+    }
+    enqueue_after_commit(db, "feed.fanout", event)
+
+# --- Fan-out (runs in the job worker) ---
+def fan_out(db: Session, events: list[dict]) -> None:
+    """
+    Write a batch of events into the members' feeds with one Redis pipeline.
+    """
+    project_ids = {event["project_id"] for event in events}
+    members: dict[int, list[int]] = defaultdict(list)
+    rows = (
+        db.query(ProjectMember.project_id, ProjectMember.user_id)
+        .filter(ProjectMember.project_id.in_(project_ids))
+        .all()
+    )
+    for project_id, user_id in rows:
+        members[project_id].append(user_id)
+
+    client = get_redis()
+    known_big = {int(pid) for pid in client.smembers(BIG_PROJECTS_KEY)}
+    cap = settings.FEED_MAX_ITEMS - 1
+    pipe = client.pipeline(transaction=False)
+    for event in sorted(events, key=lambda e: e["ts"]):
+        project_id = event["project_id"]
+        item = json.dumps(event)
+        # Live SSE streams and their Last-Event-ID backlog
+        project_stream_service.publish(pipe, event)
+        project_members = members.get(project_id, [])
+        if len(project_members) > settings.FEED_FANOUT_MAX_MEMBERS or project_id in known_big:
+            pipe.lpush(_project_key(project_id), item)
+            pipe.ltrim(_project_key(project_id), 0, cap)
+            if project_id not in known_big:
+                # First time over the limit: point every member at the project list once
+                for user_id in project_members:
+                    pipe.sadd(_user_big_key(user_id), project_id)
+                pipe.sadd(BIG_PROJECTS_KEY, project_id)
+                known_big.add(project_id)
+            elif event["kind"] == "member_joined":
+                pipe.sadd(_user_big_key(event["actor_id"]), project_id)
+            continue
+        for user_id in project_members:
+            pipe.lpush(_user_key(user_id), item)
+            pipe.ltrim(_user_key(user_id), 0, cap)
+    pipe.execute()
+
+# --- Reading ---
+def get_feed(user_id: int, offset: int = 0, limit: int = 20) -> list[dict]:
+    """
+    Return one page of the user's feed, newest first, in a single Redis call.
+    """
+    items = _read_page_script()(
+        keys=[_user_key(user_id), _user_big_key(user_id)],
+        args=[offset, limit, "feed:project:"],
+    )
+    return [json.loads(item) for item in items]
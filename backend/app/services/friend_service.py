@@ -0,0 +1,225 @@
+"""
+friend_service.py
+
+Business logic for friendships, mutual friends and friend suggestions.
+
+- Friend requests: send, accept, remove (also used to decline or cancel a request).
+- Adjacency (who is friends with whom) is cached as sorted NumPy int32 arrays:
+  - In process: a TTL/LRU cache per worker (`settings.FRIEND_CACHE_TTL_SECONDS`).
+  - In Redis: one set per user (`friends:<id>`), shared by all workers.
+  - The DB is only queried when both miss.
+- Mutual friends are an array intersection; suggestions count friends-of-friends and
+  co-members of the user's projects, so neither becomes a self-join on `friendships`.
+
+How to use:
+- Call these functions from the friends API.
+- Every change commits first, then invalidates the cached adjacency of both users.
+"""
+
+import logging
+from collections import Counter
+
+import numpy as np
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, aliased
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.db.models import Friendship, ProjectMember, User
+from app.db import repository
+from app.db.loader import users_loader
+
+logger = logging.getLogger(__name__)
+
+# Keeps an empty Redis set distinguishable from a missing one
+_SENTINEL = "-1"
+_REDIS_TTL_SECONDS = 24 * 3600
+
+_adjacency = TTLCache(maxsize=settings.FRIEND_CACHE_SIZE, ttl=settings.FRIEND_CACHE_TTL_SECONDS)
+
+def _redis_key(user_id: int) -> str:
+    return f"friends:{user_id}"
+
+# --- Adjacency cache ---
+def get_friend_ids_many(db: Session, user_ids: list[int]) -> dict[int, np.ndarray]:
+    """
+    Friend ids (sorted int32 arrays) for several users: memory, then Redis, then one DB query.
+    """
+    result: dict[int, np.ndarray] = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        cached = _adjacency.get(user_id)
+        if cached is None:
+            missing.append(user_id)
+        else:
+            result[user_id] = cached
+    if not missing:
+        return result
+
+    client = get_redis()
+    try:
+        pipe = client.pipeline(transaction=False)
+        for user_id in missing:
+            pipe.smembers(_redis_key(user_id))
+        for user_id, members in zip(missing, pipe.execute()):
+            if members:
+                ids = sorted(int(m) for m in members if m != _SENTINEL)
+                result[user_id] = np.array(ids, dtype=np.int32)
+                _adjacency.set(user_id, result[user_id])
+    except RedisError:
+        logger.warning("Redis unavailable, loading friend lists from the database")
+
+    from_db = [user_id for user_id in missing if user_id not in result]
+    if not from_db:
+        return result
+    edges: dict[int, list[int]] = {user_id: [] for user_id in from_db}
+    rows = db.query(Friendship.user_id, Friendship.friend_id).filter(
+        Friendship.status == "accepted",
+        or_(Friendship.user_id.in_(from_db), Friendship.friend_id.in_(from_db)),
+    ).all()
+    for a, b in rows:
+        if a in edges:
+            edges[a].append(b)
+        if b in edges:
+            edges[b].append(a)
+    try:
+        pipe = client.pipeline(transaction=False)
+        for user_id, ids in edges.items():
+            pipe.sadd(_redis_key(user_id), _SENTINEL, *ids)
+            pipe.expire(_redis_key(user_id), _REDIS_TTL_SECONDS)
+        pipe.execute()
+    except RedisError:
+        pass
+    for user_id, ids in edges.items():
+        result[user_id] = np.array(sorted(ids), dtype=np.int32)
+        _adjacency.set(user_id, result[user_id])
+    return result
+
+def get_friend_ids(db: Session, user_id: int) -> np.ndarray:
+    return get_friend_ids_many(db, [user_id])[user_id]
+
+def _invalidate(*user_ids: int) -> None:
+    for user_id in user_ids:
+        _adjacency.delete(user_id)
+    try:
+        get_redis().delete(*[_redis_key(user_id) for user_id in user_ids])
+    except RedisError:
+        # The Redis copy expires on its own (_REDIS_TTL_SECONDS)
+        logger.warning("Could not invalidate friend lists %s in Redis", user_ids)
+
+# --- Requests ---
+def _get_edge(db: Session, user_id: int, other_id: int):
+    return db.query(Friendship).filter(or_(
+        and_(Friendship.user_id == user_id, Friendship.friend_id == other_id),
+        and_(Friendship.user_id == other_id, Friendship.friend_id == user_id),
+    )).first()
+
+def send_friend_request(db: Session, user_id: int, friend_id: int) -> Friendship:
+    """
+    Send a friend request. If the other user already asked us, this accepts it instead.
+    """
+    if user_id == friend_id:
+        raise HTTPException(status_code=400, detail="You cannot befriend yourself")
+    if repository.get_user_by_id(db, friend_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    edge = _get_edge(db, user_id, friend_id)
+    if edge is not None:
+        if edge.status == "pending" and edge.friend_id == user_id:
+            return accept_friend_request(db, user_id, friend_id)
+        return edge
+    edge = Friendship(user_id=user_id, friend_id=friend_id, status="pending")
+    db.add(edge)
+    db.commit()
+    db.refresh(edge)
+    return edge
+
+def accept_friend_request(db: Session, user_id: int, requester_id: int) -> Friendship:
+    """
+    Accept a pending request that `requester_id` sent to `user_id`.
+    """
+    edge = db.query(Friendship).filter(
+        Friendship.user_id == requester_id,
+        Friendship.friend_id == user_id,
+    ).first()
+    if edge is None:
+        raise HTTPException(status_code=404, detail="Friend request not found")
+    if edge.status != "accepted":
+        edge.status = "accepted"
+        db.commit()
+        db.refresh(edge)
+        _invalidate(user_id, requester_id)
+    return edge
+
+def remove_friend(db: Session, user_id: int, other_id: int) -> None:
+    """
+    Unfriend, or decline / cancel a pending request.
+    """
+    edge = _get_edge(db, user_id, other_id)
+    if edge is None:
+        raise HTTPException(status_code=404, detail="Friendship not found")
+    was_accepted = edge.status == "accepted"
+    db.delete(edge)
+    db.commit()
+    if was_accepted:
+        _invalidate(user_id, other_id)
+
+def get_pending_requests(db: Session, user_id: int) -> list[Friendship]:
+    return db.query(Friendship).filter(
+        Friendship.friend_id == user_id, Friendship.status == "pending"
+    ).order_by(Friendship.created_at.desc()).all()
+
+# --- Graph queries ---
+def _users_by_ids(db: Session, user_ids) -> list[User]:
+    return users_loader(db).get_many(int(u) for u in user_ids)
+
+def get_friends(db: Session, user_id: int) -> list[User]:
+    return _users_by_ids(db, get_friend_ids(db, user_id))
+
+def get_mutual_friends(db: Session, user_id: int, other_id: int) -> list[User]:
+    adjacency = get_friend_ids_many(db, [user_id, other_id])
+    mutual = np.intersect1d(adjacency[user_id], adjacency[other_id], assume_unique=True)
+    return _users_by_ids(db, mutual)
+
+def suggest_friends(db: Session, user_id: int, limit: int = 20) -> list[dict]:
+    """
+    People you may know: friends of friends and people from your projects.
+    Score = 2 * mutual friends + shared projects.
+    """
+    friends = get_friend_ids(db, user_id)
+    mutual_counts: Counter = Counter()
+    if len(friends):
+        second_degree = np.concatenate(list(get_friend_ids_many(db, friends.tolist()).values()))
+        ids, counts = np.unique(second_degree, return_counts=True)
+        mutual_counts.update(dict(zip(ids.tolist(), counts.tolist())))
+
+    mine, theirs = aliased(ProjectMember), aliased(ProjectMember)
+    shared_counts = dict(
+        db.query(theirs.user_id, func.count())
+        .join(mine, mine.project_id == theirs.project_id)
+        .filter(mine.user_id == user_id, theirs.user_id != user_id)
+        .group_by(theirs.user_id)
+        .order_by(func.count().desc())
+        .limit(500)
+        .all()
+    )
+
+    excluded = set(friends.tolist()) | {user_id}
+    candidates = (set(mutual_counts) | set(shared_counts)) - excluded
+    ranked = sorted(
+        candidates,
+        key=lambda c: (2 * mutual_counts.get(c, 0) + shared_counts.get(c, 0), -c),
+        reverse=True,
+    )[:limit]
+    users = {u.id: u for u in _users_by_ids(db, ranked)}
+    return [
+        {
+            "id": c,
+            "username": users[c].username,
+            "mutual_friends": mutual_counts.get(c, 0),
+            "shared_projects": shared_counts.get(c, 0),
+        }
+        for c in ranked if c in users
+    ]
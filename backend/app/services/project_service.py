@@ -16,9 +16,22 @@ To extend:
 - Add permission checks, notifications, or analytics as needed.
 """
 
-from sqlalchemy.orm import Session
-from app.db.models import Project, ProjectMember
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
+from typing import Optional
+from app.db.models import ArchivedProject, Project, ProjectMember
+from app.db import repository
+from app.db.loader import projects_loader
 from app.schemas.project import ProjectCreate
+from app.jobs.queue import enqueue_after_commit
+from app.services.feed_service import record_project_event
+from app.services import recommendation_service
+from app.services.archive_service import restore_project
+from app.services.count_service import TotalCount, count_query, count_table
 
 # --- Create a new project and add the owner as the first member ---
 def create_project(db: Session, project_in: ProjectCreate, owner_id: int) -> Project:
@@ -28,23 +41,85 @@ def create_project(db: Session, project_in: ProjectCreate, owner_id: int) -> Pro
         data["repository_url"] = str(data["repository_url"])
     if data.get("live_demo_url") is not None:
         data["live_demo_url"] = str(data["live_demo_url"])
-    project = Project(**data, owner_id=owner_id)
+    # Project, owner membership and member_count are committed together
+    if data.get("status") == "closed":
+        data["closed_at"] = datetime.now(timezone.utc)  # Archived after the usual delay
+    project = Project(**data, owner_id=owner_id, member_count=1)
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    db.flush()  # Assigns project.id
     # Add owner as first member
     member = ProjectMember(user_id=owner_id, project_id=project.id, role="owner")
     db.add(member)
+    record_project_event(db, project.id, "project_created", actor_id=owner_id, data={"title": project.title})
     db.commit()
+    db.refresh(project)
+    recommendation_service.on_project_created(project)
     return project
 
 # --- Retrieve all projects from the database ---
-def get_all_projects(db: Session):
-    return db.query(Project).all()
+# `fields` limits the SELECT to those columns (sparse fieldsets, see api/v1/fieldsets.py)
+# Archived projects (closed for a while, see archive_service.py) only with `include_archived`
+# Pages (`offset`/`limit`) are in id order; ids are unique across live and archived projects
+def get_all_projects(
+    db: Session, only_open_slots: bool = False, fields: Optional[tuple[str, ...]] = None,
+    include_archived: bool = False, offset: int = 0, limit: Optional[int] = None,
+):
+    models = (Project, ArchivedProject) if include_archived else (Project,)
+    paged = bool(offset) or limit is not None
+    end = None if limit is None else offset + limit
+    projects = []
+    for model in models:
+        query = _query_projects(db, model, only_open_slots, fields)
+        if paged:
+            query = query.order_by(model.id)
+            if len(models) == 1:
+                query = query.offset(offset).limit(limit)
+            else:
+                # Enough of each table to cut the merged page from
+                query = query.limit(end)
+        projects += query.all()
+    if paged and len(models) > 1:
+        projects = sorted(projects, key=lambda p: p.id)[offset:end]
+    return projects
+
+def _query_projects(db: Session, model, only_open_slots: bool, fields: Optional[tuple[str, ...]]):
+    query = db.query(model)
+    if fields:
+        query = query.options(load_only(*(getattr(model, name) for name in fields)))
+    if only_open_slots:
+        query = query.filter(_has_open_slot(model))
+    return query
+
+# --- Total for the project list (X-Total-Count) ---
+def count_projects(db: Session, only_open_slots: bool = False, include_archived: bool = False) -> TotalCount:
+    tables = ("projects", "projects_archive") if include_archived else ("projects",)
+    if not only_open_slots:
+        return count_table(db, *tables)
+    models = (Project, ArchivedProject) if include_archived else (Project,)
+    stmt = union_all(*(select(model.id).where(_has_open_slot(model)) for model in models))
+    return count_query(db, select(stmt.subquery()))
+
+def _has_open_slot(model=Project):
+    # No limit set means the team is never full
+    return or_(model.max_team_members.is_(None), model.member_count < model.max_team_members)
 
 # --- Retrieve a single project by its ID ---
-def get_project_by_id(db: Session, project_id: int):
-    return db.query(Project).filter(Project.id == project_id).first()
+def get_project_by_id(db: Session, project_id: int, fields: Optional[tuple[str, ...]] = None):
+    if fields:
+        stmt = repository.PROJECT_BY_ID.options(load_only(*(getattr(Project, name) for name in fields)))
+        project = db.execute(stmt, {"project_id": project_id}).scalar_one_or_none()
+        if project is None:
+            stmt = repository.ARCHIVED_PROJECT_BY_ID.options(
+                load_only(*(getattr(ArchivedProject, name) for name in fields))
+            )
+            project = db.execute(stmt, {"project_id": project_id}).scalar_one_or_none()
+        return project
+    # Batched with any other project ids queued during this request (archive included)
+    return projects_loader(db).get(project_id)
+
+# --- Retrieve several projects, keeping the order of `project_ids` (one query) ---
+def get_projects_by_ids(db: Session, project_ids: list[int]) -> list[Project]:
+    return projects_loader(db).get_many(project_ids)
 
 # --- Add a user as a member to a project (if not already a member) ---
 def join_project(db: Session, user_id: int, project_id: int):
@@ -52,9 +127,57 @@ def join_project(db: Session, user_id: int, project_id: int):
     existing = db.query(ProjectMember).filter_by(user_id=user_id, project_id=project_id).first()
     if existing:
         return existing
+    # Take a slot atomically: the row lock serializes concurrent joins on this project
+    taken = db.execute(
+        update(Project)
+        .where(Project.id == project_id, _has_open_slot())
+        .values(member_count=Project.member_count + 1)
+        .returning(Project.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if taken is None:
+        db.rollback()
+        project = get_project_by_id(db, project_id)
+        if project is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        if isinstance(project, ArchivedProject):
+            raise HTTPException(status_code=409, detail="Project is closed")
+        raise HTTPException(status_code=409, detail="Project is full")
     member = ProjectMember(user_id=user_id, project_id=project_id)
     db.add(member)
-    db.commit()
+    enqueue_after_commit(db, "projects.notify_members", {"project_id": project_id, "user_id": user_id})
+    record_project_event(db, project_id, "member_joined", actor_id=user_id)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request added the same membership first; our increment is rolled back too
+        db.rollback()
+        return db.query(ProjectMember).filter_by(user_id=user_id, project_id=project_id).one()
     db.refresh(member)
+    recommendation_service.on_member_joined(user_id, project_id)
     return member
 
+
+# --- Open or close a project (owner only) ---
+def update_project_status(db: Session, project_id: int, user_id: int, new_status: str) -> Project:
+    project = get_project_by_id(db, project_id)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != user_id:
+        raise HTTPException(status_code=403, detail="Only the project owner can change its status")
+    if project.status != new_status:
+        old_status = project.status
+        if isinstance(project, ArchivedProject):
+            # Reopened after being archived: move it back to the hot tables first
+            restore_project(db, project_id)
+            project = repository.get_project_by_id(db, project_id)
+        project.status = new_status
+        project.closed_at = datetime.now(timezone.utc) if new_status == "closed" else None
+        record_project_event(
+            db, project_id, "status_changed", actor_id=user_id,
+            data={"status": new_status, "previous_status": old_status},
+        )
+        db.commit()
+        db.refresh(project)
+        recommendation_service.on_status_changed(project_id, new_status == "open")
+    return project
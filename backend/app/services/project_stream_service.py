@@ -0,0 +1,199 @@
+"""
+project_stream_service.py
+
+Live project updates for Server-Sent Events (`GET /api/v1/projects/{id}/events`).
+
+- Source: the same project events as the activity feed (`feed_service.record_project_event`).
+  When the feed job fans an event out, it also appends it to one Redis stream
+  (`events:projects`, capped at `settings.SSE_BACKLOG_SIZE` entries). The stream entry id
+  is the SSE event id.
+- Each worker runs one broker task that tails the stream (XREAD BLOCK) and hands events
+  to the streams open on that worker. The task only runs while someone is listening.
+- A client that reconnects with `Last-Event-ID` gets the events it missed from the Redis
+  stream first. If its id is older than the oldest kept entry, it gets a `reset` event
+  and should refetch the project.
+- Idle streams cost one small queue each. A heartbeat comment is sent every
+  `settings.SSE_HEARTBEAT_SECONDS`. A client that falls `settings.SSE_QUEUE_SIZE` events
+  behind is disconnected and resumes from the backlog when it reconnects.
+
+How to use:
+- `publish(pipe, event)` from the fan-out job (already wired in feed_service.fan_out).
+- `StreamingResponse(project_event_stream(project_id, last_event_id), media_type="text/event-stream")`.
+
+Benchmark: `python -m scripts.bench_sse_memory` (memory per open stream).
+"""
+
+import asyncio
+import json
+import logging
+import re
+from typing import AsyncIterator, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import Gauge
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "events:projects"
+_PING = (None, "", "")
+_STREAM_ID = re.compile(r"^\d+-\d+$")
+
+def _id_key(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq)
+
+def _format(entry_id: str, kind: str, data: str) -> str:
+    return f"id: {entry_id}\nevent: {kind}\ndata: {data}\n\n"
+
+# --- Publishing (runs in the fan-out job) ---
+def publish(pipe, event: dict) -> None:
+    """
+    Queue an XADD of a project event on a (sync) Redis pipeline.
+    """
+    pipe.xadd(
+        STREAM_KEY,
+        {"project_id": event["project_id"], "kind": event["kind"], "event": json.dumps(event)},
+        maxlen=settings.SSE_BACKLOG_SIZE,
+        approximate=True,
+    )
+
+# --- Per-worker broker ---
+class Subscription:
+    __slots__ = ("project_id", "queue", "overflowed")
+
+    def __init__(self, project_id: int):
+        self.project_id = project_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        self.overflowed = False
+
+class ProjectEventBroker:
+    def __init__(self):
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.connections = 0  # Kept as a plain int so /metrics can read it from any thread
+
+    def subscribe(self, project_id: int) -> Subscription:
+        subscription = Subscription(project_id)
+        self._subscribers.setdefault(project_id, set()).add(subscription)
+        self.connections += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subs = self._subscribers.get(subscription.project_id)
+        if subs is not None and subscription in subs:
+            subs.discard(subscription)
+            self.connections -= 1
+            if not subs:
+                del self._subscribers[subscription.project_id]
+
+    def _dispatch(self, project_id: int, message: tuple[str, str, str]) -> None:
+        for subscription in list(self._subscribers.get(project_id, ())):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+    async def _run(self) -> None:
+        client = get_async_redis()
+        last_id, delay = "$", 0.5
+        # Exits once nobody is listening; the next subscribe starts it again
+        while self._subscribers:
+            try:
+                response = await client.xread({STREAM_KEY: last_id}, block=5000, count=500)
+            except RedisError:
+                logger.warning("Project event stream unavailable, retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10.0)
+                continue
+            delay = 0.5
+            for _, entries in response or ():
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    self._dispatch(int(fields["project_id"]), (entry_id, fields["kind"], fields["event"]))
+
+    async def _heartbeat(self) -> None:
+        # One timer for all streams (a timeout per stream would cost a task each)
+        while self._subscribers:
+            await asyncio.sleep(settings.SSE_HEARTBEAT_SECONDS)
+            for subs in list(self._subscribers.values()):
+                for subscription in subs:
+                    if subscription.queue.empty():
+                        subscription.queue.put_nowait(_PING)
+
+    async def stop(self) -> None:
+        for task in (self._task, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+broker = ProjectEventBroker()
+
+Gauge(
+    "sse_connections", "Open project event streams on this worker",
+    callback=lambda: {(): float(broker.connections)},
+)
+
+# --- Resume ---
+async def _read_backlog(project_id: int, last_event_id: str) -> tuple[list[tuple[str, str, str]], bool]:
+    """
+    Events for `project_id` after `last_event_id`, and whether some may have been trimmed away.
+    """
+    client = get_async_redis()
+    oldest = await client.xrange(STREAM_KEY, count=1)
+    gap = bool(oldest) and _id_key(oldest[0][0]) > _id_key(last_event_id)
+    entries = await client.xrange(STREAM_KEY, min=f"({last_event_id}", count=settings.SSE_BACKLOG_SIZE)
+    project = str(project_id)
+    missed = [
+        (entry_id, fields["kind"], fields["event"])
+        for entry_id, fields in entries
+        if fields["project_id"] == project
+    ]
+    return missed, gap
+
+# --- SSE stream ---
+async def project_event_stream(project_id: int, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Yield SSE messages for one project until the client disconnects.
+    """
+    subscription = broker.subscribe(project_id)
+    try:
+        yield "retry: 3000\n\n"
+        last_sent: Optional[tuple[int, int]] = None
+        if last_event_id and _STREAM_ID.match(last_event_id):
+            last_sent = _id_key(last_event_id)
+            try:
+                missed, gap = await _read_backlog(project_id, last_event_id)
+            except RedisError:
+                missed, gap = [], True
+            if gap:
+                yield _format(last_event_id, "reset", "{}")
+            for entry_id, kind, data in missed:
+                last_sent = _id_key(entry_id)
+                yield _format(entry_id, kind, data)
+
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                return  # Too slow; the client reconnects and resumes from the backlog
+            entry_id, kind, data = await subscription.queue.get()
+            if entry_id is None:
+                yield ": ping\n\n"
+                continue
+            # Events already sent from the backlog can also arrive live
+            if last_sent is not None and _id_key(entry_id) <= last_sent:
+                continue
+            last_sent = _id_key(entry_id)
+            yield _format(entry_id, kind, data)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,228 @@
+"""
+recommendation_service.py
+
+Project recommendations based on tag / tech-stack overlap.
+
+- Every project is a binary vector over the vocabulary of (lowercased) tags and tech stacks.
+  The sparse matrix is kept in memory twice, as NumPy arrays: by row (the terms of each
+  project) and by term (posting lists: the projects that have each term).
+- A user's profile is the sum of the vectors of the projects they belong to.
+- Recommendations are the open projects (that the user is not in yet) with the highest
+  cosine similarity to the profile. Only the posting lists of the profile's terms are read,
+  and all projects are scored at once with NumPy.
+- The index is loaded from the DB once, then updated incrementally by `create_project`,
+  `join_project` and `update_project_status`. It is also rebuilt in the background every
+  `settings.RECOMMENDATION_REBUILD_SECONDS` to pick up changes made by other workers.
+
+How to use:
+- `recommend_projects(db, user_id, limit)` returns [(project_id, score), ...].
+"""
+
+import logging
+import threading
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import ArchivedProject, ArchivedProjectMember, Project, ProjectMember
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+def _terms(tags: Optional[Iterable[str]], tech_stack: Optional[Iterable[str]]) -> set[str]:
+    return {t.strip().lower() for t in [*(tags or ()), *(tech_stack or ())] if t and t.strip()}
+
+class ProjectTagIndex:
+    def __init__(self, capacity: int = 1024):
+        self.vocab: dict[str, int] = {}
+        self.row_of: dict[int, int] = {}  # project id -> row
+        self.project_ids = np.zeros(capacity, dtype=np.int64)
+        self.inv_norm = np.zeros(capacity, dtype=np.float32)  # 1 / sqrt(#terms)
+        self.is_open = np.zeros(capacity, dtype=bool)
+        self.row_start = np.zeros(capacity, dtype=np.int64)  # First non-zero entry of each row
+        self.n_rows = 0
+        # Terms of row r: nnz_terms[row_start[r]:row_start[r + 1]] (for i < n_nnz)
+        self.nnz_terms = np.zeros(capacity * 8, dtype=np.int32)
+        self.n_nnz = 0
+        # Rows having term t: postings[t][:posting_len[t]]
+        self.postings: list[np.ndarray] = []
+        self.posting_len: list[int] = []
+        self.memberships: dict[int, set[int]] = {}  # user id -> project ids
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # --- Growth helpers (amortized doubling, so appends are O(1)) ---
+
+    @staticmethod
+    def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+        if needed <= len(array):
+            return array
+        bigger = np.zeros(max(needed, len(array) * 2), dtype=array.dtype)
+        bigger[:len(array)] = array
+        return bigger
+
+    # --- Writes ---
+
+    def add_project(self, project_id: int, tags, tech_stack, is_open: bool = True) -> None:
+        """
+        Add a project (or replace its vector if it is already indexed).
+        """
+        terms = _terms(tags, tech_stack)
+        with self._lock:
+            old_row = self.row_of.get(project_id)
+            if old_row is not None:
+                # Rows are append-only; retire the old one
+                self.is_open[old_row] = False
+                self.inv_norm[old_row] = 0.0
+            row = self.n_rows
+            self.project_ids = self._grow(self.project_ids, row + 1)
+            self.inv_norm = self._grow(self.inv_norm, row + 1)
+            self.is_open = self._grow(self.is_open, row + 1)
+            self.row_start = self._grow(self.row_start, row + 1)
+            self.project_ids[row] = project_id
+            self.row_start[row] = self.n_nnz
+            self.inv_norm[row] = 1.0 / np.sqrt(len(terms)) if terms else 0.0
+            self.is_open[row] = is_open
+
+            term_ids = [self._term_id(term) for term in terms]
+            end = self.n_nnz + len(term_ids)
+            self.nnz_terms = self._grow(self.nnz_terms, end)
+            self.nnz_terms[self.n_nnz:end] = term_ids
+            self.n_nnz = end
+            for term_id in term_ids:
+                size = self.posting_len[term_id]
+                self.postings[term_id] = self._grow(self.postings[term_id], size + 1)
+                self.postings[term_id][size] = row
+                self.posting_len[term_id] = size + 1
+
+            self.row_of[project_id] = row
+            self.n_rows = row + 1
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            term_id = self.vocab[term] = len(self.vocab)
+            self.postings.append(np.zeros(16, dtype=np.int32))
+            self.posting_len.append(0)
+        return term_id
+
+    def set_open(self, project_id: int, is_open: bool) -> None:
+        row = self.row_of.get(project_id)
+        if row is not None:
+            self.is_open[row] = is_open
+
+    def add_member(self, user_id: int, project_id: int) -> None:
+        with self._lock:
+            self.memberships.setdefault(user_id, set()).add(project_id)
+
+    # --- Reads ---
+
+    def recommend(self, user_id: int, limit: int = 10) -> list[tuple[int, float]]:
+        """
+        Return up to `limit` (project_id, score) pairs, best first.
+        """
+        with self._lock:
+            # Snapshot: arrays are only appended to (or replaced when they grow)
+            n_rows, n_nnz = self.n_rows, self.n_nnz
+            inv_norm, is_open, project_ids = self.inv_norm, self.is_open, self.project_ids
+            member_rows = [self.row_of[p] for p in self.memberships.get(user_id, ()) if p in self.row_of]
+            if not member_rows:
+                return []
+            member_terms = np.concatenate([
+                self.nnz_terms[self.row_start[r]:(self.row_start[r + 1] if r + 1 < n_rows else n_nnz)]
+                for r in member_rows
+            ])
+            # Profile = sum of the user's project vectors (term id -> count)
+            profile_terms, counts = np.unique(member_terms, return_counts=True)
+            postings = [self.postings[t][:self.posting_len[t]] for t in profile_terms]
+        if not len(profile_terms):
+            return []
+        profile_norm = float(np.sqrt(np.dot(counts, counts)))
+
+        # Cosine similarity of every project against the profile, in one pass
+        weights = np.repeat(counts.astype(np.float32), [len(p) for p in postings])
+        scores = np.bincount(np.concatenate(postings), weights=weights, minlength=n_rows)[:n_rows]
+        scores *= inv_norm[:n_rows] / profile_norm
+        scores[~is_open[:n_rows]] = 0.0
+        scores[member_rows] = 0.0
+
+        limit = min(limit, n_rows)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(int(project_ids[r]), float(scores[r])) for r in top if scores[r] > 0.0]
+
+# --- Process-wide index ---
+
+index = ProjectTagIndex()
+_load_lock = threading.Lock()
+_rebuilding = threading.Event()
+
+def build_index(db: Session) -> ProjectTagIndex:
+    """
+    Build a fresh index from the database.
+    """
+    fresh = ProjectTagIndex(capacity=max(1024, db.query(Project.id).count()))
+    for project_id, tags, tech_stack, status in db.query(
+        Project.id, Project.tags, Project.tech_stack, Project.status
+    ).yield_per(5000):
+        fresh.add_project(project_id, tags, tech_stack, is_open=(status or "open") == "open")
+    # Archived projects are never recommended, but still shape their members' profiles
+    for project_id, tags, tech_stack in db.query(
+        ArchivedProject.id, ArchivedProject.tags, ArchivedProject.tech_stack
+    ).yield_per(5000):
+        fresh.add_project(project_id, tags, tech_stack, is_open=False)
+    for model in (ProjectMember, ArchivedProjectMember):
+        for user_id, project_id in db.query(model.user_id, model.project_id).yield_per(5000):
+            fresh.add_member(user_id, project_id)
+    fresh.loaded_at = time.monotonic()
+    return fresh
+
+def _rebuild_in_background() -> None:
+    def run():
+        global index
+        db = SessionLocal()
+        try:
+            index = build_index(db)
+        except Exception:
+            logger.exception("Recommendation index rebuild failed")
+        finally:
+            db.close()
+            _rebuilding.clear()
+
+    if not _rebuilding.is_set():
+        _rebuilding.set()
+        threading.Thread(target=run, name="recommendation-rebuild", daemon=True).start()
+
+def get_index(db: Session) -> ProjectTagIndex:
+    """
+    Return the loaded index, loading it on first use and refreshing it when stale.
+    """
+    global index
+    if not index.loaded_at:
+        with _load_lock:
+            if not index.loaded_at:
+                index = build_index(db)
+    elif time.monotonic() - index.loaded_at > settings.RECOMMENDATION_REBUILD_SECONDS:
+        _rebuild_in_background()
+    return index
+
+def recommend_projects(db: Session, user_id: int, limit: int = 10) -> list[tuple[int, float]]:
+    return get_index(db).recommend(user_id, limit)
+
+# --- Incremental updates (call after commit) ---
+
+def on_project_created(project: Project) -> None:
+    if index.loaded_at:
+        index.add_project(project.id, project.tags, project.tech_stack, (project.status or "open") == "open")
+        index.add_member(project.owner_id, project.id)
+
+def on_member_joined(user_id: int, project_id: int) -> None:
+    if index.loaded_at:
+        index.add_member(user_id, project_id)
+
+def on_status_changed(project_id: int, is_open: bool) -> None:
+    if index.loaded_at:
+        index.set_open(project_id, is_open)
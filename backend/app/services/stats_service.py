@@ -0,0 +1,85 @@
+"""
+stats_service.py
+
+Business logic for platform statistics (dashboards).
+
+- Reads from materialized views, so requests never aggregate over the big tables:
+  - mv_project_leaderboard: members per project (most-joined projects)
+  - mv_tech_stack_popularity: projects per tech stack entry
+  - mv_daily_signups: new users per day (UTC)
+- `refresh_stats` refreshes them CONCURRENTLY (readers are never blocked), committing after
+  each view so no lock or snapshot is held longer than one refresh. It runs on a schedule in
+  every worker, but a session-level advisory lock lets only one of them do the work at a time.
+
+The views are created by an Alembic migration, not by `Base.metadata`.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+STATS_VIEWS = ("mv_project_leaderboard", "mv_tech_stack_popularity", "mv_daily_signups")
+# Arbitrary constant identifying the stats refresh for pg_try_advisory_lock
+_REFRESH_LOCK_KEY = 4_201_033
+
+# --- Refresh (runs in the background) ---
+def refresh_stats(conn: Connection) -> bool:
+    """
+    Refresh all stats views, one transaction each. Returns False if another worker is already refreshing.
+    - Needs a Connection, not a Session: the lock belongs to the DB session, which must outlive the commits.
+    """
+    if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _REFRESH_LOCK_KEY}).scalar():
+        conn.rollback()
+        return False
+    try:
+        conn.commit()
+        for view in STATS_VIEWS:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+            conn.commit()
+    finally:
+        conn.rollback()  # In case a refresh failed mid-transaction
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _REFRESH_LOCK_KEY})
+        conn.commit()
+    return True
+
+def refresh_stats_job() -> None:
+    with engine.connect() as conn:
+        if refresh_stats(conn):
+            logger.info("Refreshed stats views")
+
+# --- Reads ---
+def get_project_leaderboard(db: Session, limit: int = 10) -> list[dict]:
+    rows = db.execute(text("""
+        SELECT project_id, title, member_count
+        FROM mv_project_leaderboard
+        ORDER BY member_count DESC, project_id
+        LIMIT :limit
+    """), {"limit": limit}).mappings().all()
+    return [dict(row) for row in rows]
+
+def get_tech_stack_popularity(db: Session, limit: int = 20) -> list[dict]:
+    rows = db.execute(text("""
+        SELECT tech, project_count
+        FROM mv_tech_stack_popularity
+        ORDER BY project_count DESC, tech
+        LIMIT :limit
+    """), {"limit": limit}).mappings().all()
+    return [dict(row) for row in rows]
+
+def get_daily_signups(db: Session, days: int = 30) -> list[dict]:
+    # The view buckets by UTC day, so the window must too
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    rows = db.execute(text("""
+        SELECT day, signups
+        FROM mv_daily_signups
+        WHERE day >= :since
+        ORDER BY day
+    """), {"since": since}).mappings().all()
+    return [dict(row) for row in rows]
@@ -0,0 +1,53 @@
+"""
+token_cleanup_service.py
+
+Periodic purge of expired token state, so it does not only ever grow.
+
+- The in-process mirror of refresh-token revocations (app/core/token_revocation.py) drops
+  cutoffs older than the refresh-token lifetime. The Redis keys behind it expire by TTL.
+  The mirror is per worker, so every worker runs the purge for itself.
+- `users.refresh_token` is not purged: nothing writes it (refresh rotation lives in Redis,
+  logout only sets it to NULL). The first run in each worker only checks that it is still
+  unused, with a read-only probe, and logs a warning if stored tokens show up.
+- Metrics: `tokens_purged_total{kind}`, `token_purge_seconds{kind}`.
+
+Runs every `settings.TOKEN_PURGE_INTERVAL_SECONDS` in the app (see main.py).
+"""
+
+import logging
+import time
+
+from sqlalchemy import text
+
+from app.core.metrics import Counter, Summary
+from app.core.token_revocation import revocation_store
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+PURGED = Counter("tokens_purged_total", "Expired token records purged", ["kind"])
+DURATION = Summary("token_purge_seconds", "Time spent purging expired tokens", ["kind"])
+
+_STORED_TOKEN_PROBE = text("SELECT 1 FROM users WHERE refresh_token IS NOT NULL LIMIT 1")
+_stored_tokens_checked = False
+
+def _check_stored_tokens() -> None:
+    """
+    Warn (once per worker) if `users.refresh_token` is in use again, since nothing purges it.
+    """
+    global _stored_tokens_checked
+    if _stored_tokens_checked:
+        return
+    _stored_tokens_checked = True
+    with engine.connect() as conn:
+        if conn.execute(_STORED_TOKEN_PROBE).first() is not None:
+            logger.warning("users.refresh_token holds tokens, but no purge is set up for them")
+
+def purge_expired_tokens_job() -> None:
+    started = time.perf_counter()
+    expired = revocation_store.purge_expired()
+    PURGED.inc(expired, kind="revocation_cutoff")
+    DURATION.observe(time.perf_counter() - started, kind="revocation_cutoff")
+    if expired:
+        logger.info("Purged %d expired revocation cutoff(s)", expired)
+    _check_stored_tokens()
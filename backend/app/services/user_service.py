@@ -5,54 +5,144 @@ Business logic for user operations.
 
 - Handles user creation, retrieval, update, and (later) delete.
 - Interacts with the database session and models.
-- Handles password hashing and uniqueness checks.
+- Handles password hashing and (case-insensitive) uniqueness checks.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, load_only, make_transient_to_detached
+from typing import Optional
 from app.db.models import User
+from app.db import repository
+from app.db.loader import users_loader
+from app.db.routing import read_only_scope
 from app.schemas.user import UserCreate, UserProfileUpdate
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import hash_password
+from app.db import invalidation
+from app.jobs.queue import enqueue_after_commit
+from app.services.count_service import TotalCount, count_table
+
+class UserConflictError(ValueError):
+    """
+    Raised when the email or username is already taken.
+    `field` is "email" or "username"; the message is safe to show to the client.
+    """
+    def __init__(self, field: str, message: str):
+        super().__init__(message)
+        self.field = field
 
 def create_user(db: Session, user_in: UserCreate) -> User:
     """
-    Create a new user in the database.
+    Create a new user in the database. This is the only registration path
+    (`auth_service.register_user` calls it too).
 
-    - Hashes the password before storing.
-    - Checks for unique email/username (raises on conflict).
+    - One cheap SELECT first, so duplicate signups are rejected before spending bcrypt time.
+    - Then a single INSERT ... ON CONFLICT DO NOTHING RETURNING. The unique indexes on
+      lower(email) / lower(username) settle races between concurrent signups.
+    - Raises UserConflictError (a ValueError) naming the field that is taken.
+    - Sends the verification email in the background, once the user is committed.
     """
-    hashed_pw = hash_password(user_in.password)
-    user = User(
-        email=user_in.email,
-        username=user_in.username,
-        hashed_password=hashed_pw
+    conflict = repository.find_user_conflict(db, user_in.email, user_in.username)
+    if conflict:
+        raise UserConflictError(*conflict)
+
+    stmt = (
+        pg_insert(User)
+        .values(
+            email=user_in.email,
+            username=user_in.username,
+            hashed_password=hash_password(user_in.password),
+            is_active=True,
+            is_verified=False,
+        )
+        .on_conflict_do_nothing()
+        .returning(User)
     )
-    db.add(user)
-    try:
-        db.commit()
-        db.refresh(user)
-        return user
-    except IntegrityError:
+    user = db.execute(stmt).scalar_one_or_none()
+    if user is None:
+        # Lost a race with another signup; find out which field it took
         db.rollback()
-        raise ValueError("Email or username already exists.")
+        conflict = repository.find_user_conflict(db, user_in.email, user_in.username)
+        raise UserConflictError(*(conflict or ("email", "Email or username already exists.")))
+
+    enqueue_after_commit(db, "users.send_verification_email", {"user_id": user.id, "email": user.email})
+    db.commit()
+    return user
 
 def get_user_by_email(db: Session, email: str) -> User | None:
     """
     Retrieve a user by email.
     """
-    return db.query(User).filter(User.email == email).first()
+    return repository.get_user_by_email(db, email)
 
-def get_user_by_id(db: Session, user_id: int) -> User | None:
+def get_user_by_id(db: Session, user_id: int, fields: Optional[tuple[str, ...]] = None) -> User | None:
     """
     Retrieve a user by ID.
+    - `fields` limits the SELECT to those columns (sparse fieldsets).
+    """
+    if fields:
+        stmt = repository.USER_BY_ID.options(load_only(*(getattr(User, name) for name in fields)))
+        return db.execute(stmt, {"user_id": user_id}).scalar_one_or_none()
+    # Batched with any other user ids queued during this request
+    return users_loader(db).get(user_id)
+
+# --- Cached lookup for authentication ---
+# Column values by user id; other workers' changes arrive via LISTEN/NOTIFY (app/db/invalidation.py)
+_auth_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+invalidation.register_cache("users", _auth_cache)
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+def get_user_for_auth(db: Session, user_id: int) -> User | None:
+    """
+    Retrieve a user by ID for `get_current_user`, usually without a query.
+    - The cached row is attached to `db` with merge(load=False), so the user can be updated as usual.
+    - Only cached while the invalidation listener is connected.
+    - A miss reads the primary: NOTIFY fires when the primary commits, so a replica row could
+      predate an invalidation that was already handled and stay cached until the TTL.
+    """
+    if not invalidation.listener.is_ready():
+        return repository.get_user_by_id(db, user_id)
+    row = _auth_cache.get(user_id)
+    if row is None:
+        generation = invalidation.generation()
+        with read_only_scope(False):
+            # populate_existing: a copy already loaded from a replica must not be what gets cached
+            user = db.execute(
+                repository.USER_BY_ID, {"user_id": user_id}, execution_options={"populate_existing": True}
+            ).scalar_one_or_none()
+        if user is not None and invalidation.generation() == generation:
+            _auth_cache.set(user_id, {key: getattr(user, key) for key in _USER_COLUMNS})
+        return user
+    user = User(**row)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+def get_users_by_ids(db: Session, user_ids: list[int]) -> list[User]:
+    """
+    Retrieve several users in one query, keeping the order of `user_ids` (missing ids are skipped).
+    """
+    return users_loader(db).get_many(user_ids)
+
+def get_all_users(
+    db: Session, fields: Optional[tuple[str, ...]] = None, offset: int = 0, limit: Optional[int] = None
+) -> list[User]:
+    """
+    Retrieve all users (or one page of them, in id order).
+    - `fields` limits the SELECT to those columns (sparse fieldsets).
     """
-    return db.query(User).filter(User.id == user_id).first()
+    query = db.query(User)
+    if fields:
+        query = query.options(load_only(*(getattr(User, name) for name in fields)))
+    if offset or limit is not None:
+        query = query.order_by(User.id).offset(offset).limit(limit)
+    return query.all()
 
-def get_all_users(db: Session) -> list[User]:
+def count_users(db: Session) -> TotalCount:
     """
-    Retrieve all users.
+    Total for the user list (X-Total-Count): estimated for large tables, see count_service.
     """
-    return db.query(User).all()
+    return count_table(db, "users")
 
 def update_user_profile(db: Session, user: User, update_data: dict) -> User:
     """
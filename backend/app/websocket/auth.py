@@ -0,0 +1,159 @@
+"""
+auth.py
+
+Authentication of WebSocket handshakes.
+
+- The client sends its access token either as `?token=<jwt>` or as the subprotocol pair
+  `Sec-WebSocket-Protocol: bearer, <jwt>` (browsers cannot set headers on WebSockets).
+  In the second case the server accepts with subprotocol "bearer".
+- A verified token is cached as a `Principal`, keyed by the SHA-256 of the token:
+  - in this worker (`TTLCache`), and
+  - in Redis, shared by all workers, so sockets reconnecting to new workers after a deploy
+    skip the JWT check and the user lookup.
+  Entries live until the token expires, at most `settings.WS_AUTH_CACHE_TTL_SECONDS`.
+- A change to a user row (LISTEN/NOTIFY, see app/db/invalidation.py) makes this worker ignore
+  every entry for that user cached before the change, in both layers. Changes this worker did
+  not see (before it started, or while its listener was down) are covered by the TTL.
+- Invalid tokens are never cached.
+
+How to use:
+    token, subprotocol = token_from_websocket(websocket)
+    principal = await authenticate(token) if token else None
+    if principal is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept(subprotocol=subprotocol)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import WebSocket
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.redis_client import get_async_redis
+from app.core.security import decode_token
+from app.db import invalidation
+from app.db.session import SessionLocal
+from app.services.user_service import get_user_for_auth
+
+logger = logging.getLogger(__name__)
+
+AUTH_RESULTS = Counter(
+    "ws_auth_total", "WebSocket handshake authentications", ["source"]  # local, redis, verified, rejected
+)
+
+SUBPROTOCOL = "bearer"
+REDIS_PREFIX = "ws:principal:"
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    username: str
+    expires_at: float  # Token expiry (unix time)
+    cached_at: float  # When the user row was read (unix time)
+
+    def dumps(self) -> str:
+        return json.dumps([self.user_id, self.username, self.expires_at, self.cached_at])
+
+    @classmethod
+    def loads(cls, raw: str) -> "Principal":
+        return cls(*json.loads(raw))
+
+def token_from_websocket(websocket: WebSocket) -> tuple[Optional[str], Optional[str]]:
+    """
+    Return (token, subprotocol to accept with).
+    """
+    subprotocols = websocket.scope.get("subprotocols") or []
+    if len(subprotocols) >= 2 and subprotocols[0] == SUBPROTOCOL:
+        return subprotocols[1], SUBPROTOCOL
+    return websocket.query_params.get("token"), None
+
+# --- Caches ---
+_local = TTLCache(maxsize=settings.WS_AUTH_CACHE_SIZE, ttl=settings.WS_AUTH_CACHE_TTL_SECONDS)
+# user id -> when this worker last saw the row change. Kept as long as a cached entry can live.
+_changed_at = TTLCache(maxsize=settings.WS_AUTH_CACHE_SIZE, ttl=settings.WS_AUTH_CACHE_TTL_SECONDS)
+
+def _on_user_changed(user_id: int) -> None:
+    _changed_at.set(user_id, time.time())
+
+invalidation.register("users", _on_user_changed, _local.clear)
+
+def _is_current(principal: Principal) -> bool:
+    if principal.expires_at <= time.time():
+        return False
+    changed_at = _changed_at.get(principal.user_id)
+    return changed_at is None or changed_at < principal.cached_at
+
+def _load_principal(user_id: int, expires_at: float) -> Optional[Principal]:
+    cached_at = time.time()
+    db = SessionLocal()
+    try:
+        user = get_user_for_auth(db, user_id)
+        if user is None or not user.is_active:
+            return None
+        return Principal(user.id, user.username, expires_at, cached_at)
+    finally:
+        db.close()
+
+async def _read_shared(key: str) -> Optional[Principal]:
+    try:
+        raw = await get_async_redis().get(key)
+    except RedisError as exc:
+        logger.warning("WebSocket auth cache unavailable (%s)", exc)
+        return None
+    return Principal.loads(raw) if raw else None
+
+async def _write_shared(key: str, principal: Principal, ttl: float) -> None:
+    try:
+        await get_async_redis().set(key, principal.dumps(), px=max(int(ttl * 1000), 1))
+    except RedisError as exc:
+        logger.warning("WebSocket auth cache unavailable (%s)", exc)
+
+# --- Handshake ---
+async def authenticate(token: str) -> Optional[Principal]:
+    """
+    Return the principal for a valid access token, or None.
+    """
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+
+    principal = _local.get(token_hash)
+    if principal is not None and _is_current(principal):
+        AUTH_RESULTS.inc(source="local")
+        return principal
+
+    key = REDIS_PREFIX + token_hash
+    principal = await _read_shared(key)
+    if principal is not None and _is_current(principal):
+        _local.set(token_hash, principal, ttl=min(principal.expires_at - time.time(), _local.ttl))
+        AUTH_RESULTS.inc(source="redis")
+        return principal
+
+    payload = decode_token(token)
+    if (
+        payload is None
+        or payload.get("type", "access") != "access"
+        or not str(payload.get("sub", "")).isdigit()
+        or "exp" not in payload
+    ):
+        AUTH_RESULTS.inc(source="rejected")
+        return None
+    principal = await asyncio.to_thread(_load_principal, int(payload["sub"]), float(payload["exp"]))
+    if principal is None:
+        AUTH_RESULTS.inc(source="rejected")
+        return None
+
+    ttl = min(principal.expires_at - time.time(), settings.WS_AUTH_CACHE_TTL_SECONDS)
+    if ttl > 0:
+        _local.set(token_hash, principal, ttl=ttl)
+        await _write_shared(key, principal, ttl)
+    AUTH_RESULTS.inc(source="verified")
+    return principal
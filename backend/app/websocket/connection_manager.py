@@ -0,0 +1,86 @@
+"""
+connection_manager.py
+
+Tracks this worker's open WebSockets by user.
+
+- Only authenticated sockets are registered (see app/websocket/auth.py), so every socket
+  belongs to a user; a user can have several (tabs, devices).
+- Lives on the event loop: call it only from WebSocket endpoints, never from the threadpool.
+- Metric: `ws_connections` (open sockets on this worker).
+
+How to use:
+    manager.connect(principal.user_id, websocket)
+    try:
+        ...
+    finally:
+        manager.disconnect(principal.user_id, websocket)
+
+    await manager.send_to_user(user_id, {"type": "ping"})
+    await manager.broadcast({"type": "announcement", "text": "..."})
+"""
+
+import json
+from collections import defaultdict
+
+from fastapi import WebSocket
+
+from app.core.metrics import Gauge
+
+class ConnectionManager:
+    def __init__(self):
+        self._sockets: dict[int, set[WebSocket]] = defaultdict(set)
+        self.connections = 0
+
+    def connect(self, user_id: int, websocket: WebSocket) -> None:
+        self._sockets[user_id].add(websocket)
+        self.connections += 1
+
+    def disconnect(self, user_id: int, websocket: WebSocket) -> None:
+        sockets = self._sockets.get(user_id)
+        if sockets is None or websocket not in sockets:
+            return
+        sockets.discard(websocket)
+        self.connections -= 1
+        if not sockets:
+            del self._sockets[user_id]
+
+    def is_online(self, user_id: int) -> bool:
+        return user_id in self._sockets
+
+    def online_user_ids(self) -> list[int]:
+        return list(self._sockets)
+
+    async def send_to_user(self, user_id: int, message: dict) -> None:
+        """
+        Send `message` as JSON to every socket of `user_id` on this worker.
+        """
+        for websocket in list(self._sockets.get(user_id, ())):
+            try:
+                await websocket.send_json(message)
+            except Exception:
+                # Closed under us; its endpoint will disconnect it
+                pass
+
+    async def broadcast(self, message: dict) -> int:
+        """
+        Send `message` as JSON to every socket on this worker. Returns how many were sent.
+        - Encoded once, not once per socket.
+        """
+        text = json.dumps(message)
+        sent = 0
+        for sockets in list(self._sockets.values()):
+            for websocket in list(sockets):
+                try:
+                    await websocket.send_text(text)
+                    sent += 1
+                except Exception:
+                    pass
+        return sent
+
+# Singleton used across the app
+manager = ConnectionManager()
+
+Gauge(
+    "ws_connections", "Open WebSockets on this worker",
+    callback=lambda: {(): float(manager.connections)},
+)
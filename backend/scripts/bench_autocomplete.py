@@ -0,0 +1,119 @@
+"""
+bench_autocomplete.py
+
+Check: autocomplete latency on a large dataset (target: p99 under 10 ms at 1M users).
+
+- Picks `--samples` random existing usernames and project titles and queries prefixes of
+  them, 1 to 8 characters long, like someone typing. Also tries a few substrings from the
+  middle (fuzzy path).
+- Measures the database path (no cache) per query length, then the service with its
+  hot-prefix cache.
+- Prints the plans of one prefix query and one fuzzy query, which should use the
+  ix_*_prefix and ix_*_trgm indexes.
+- Fails (exit 1) if the uncached p99 of any query length exceeds `--max-p99-ms`.
+
+Needs the app's Postgres with migrations applied, e.g.:
+    python -m scripts.generate_dataset --users 1000000 --projects 200000 --truncate
+
+Run from the backend folder:
+    python -m scripts.bench_autocomplete
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import defaultdict
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.db import repository
+from app.db.session import SessionLocal
+from app.services import autocomplete_service
+
+KINDS = {
+    "users": ("SELECT username FROM users TABLESAMPLE SYSTEM (1) LIMIT :n",
+              repository.USERNAME_PREFIX, repository.USERNAME_FUZZY, autocomplete_service.autocomplete_users),
+    "projects": ("SELECT title FROM projects TABLESAMPLE SYSTEM (5) LIMIT :n",
+                 repository.PROJECT_TITLE_PREFIX, repository.PROJECT_TITLE_FUZZY,
+                 autocomplete_service.autocomplete_projects),
+}
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+def _queries(words: list[str]) -> list[tuple[str, str]]:
+    """
+    (label, query) pairs: typed prefixes and a middle substring per word.
+    """
+    queries = []
+    for word in words:
+        word = word.lower()
+        queries += [(f"prefix {n}", word[:n]) for n in range(1, min(len(word), 8) + 1)]
+        if len(word) >= 6:
+            start = random.randrange(1, len(word) - 4)
+            queries.append(("substring", word[start:start + 4]))
+    return queries
+
+def _explain(db, stmt, params: dict) -> None:
+    # Compiled for psycopg2's paramstyle, so it goes to the driver as is
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    for (line,) in db.connection().exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS) " + sql, params):
+        print("    " + line)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--max-p99-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    failed = False
+    db = SessionLocal()
+    try:
+        for kind, (sample_sql, prefix_stmt, fuzzy_stmt, service) in KINDS.items():
+            words = [w for (w,) in db.execute(text(sample_sql), {"n": args.samples}) if w]
+            if not words:
+                sys.exit(f"No {kind}; generate some first (python -m scripts.generate_dataset)")
+            queries = _queries(words)
+
+            timings: dict[str, list[float]] = defaultdict(list)
+            for label, q in queries:
+                started = time.perf_counter()
+                repository.autocomplete(db, prefix_stmt, fuzzy_stmt, q, args.limit,
+                                        fuzzy=len(q) >= autocomplete_service.FUZZY_MIN_LENGTH)
+                timings[label].append(time.perf_counter() - started)
+
+            print(f"\n{kind}: {len(words)} sampled, {len(queries)} queries, no cache")
+            for label in sorted(timings, key=lambda l: (l == "substring", l)):
+                p99 = _percentile(timings[label], 0.99)
+                failed |= p99 > args.max_p99_ms
+                print(f"  {label:<10} p50 {_percentile(timings[label], 0.5):6.2f} ms  p99 {p99:6.2f} ms"
+                      f"  max {max(timings[label]) * 1000:6.2f} ms")
+
+            cached = []
+            for _ in range(2):  # The second pass hits the cache for short prefixes
+                for _, q in queries:
+                    started = time.perf_counter()
+                    service(db, q, args.limit)
+                    cached.append(time.perf_counter() - started)
+            print(f"  service    p50 {_percentile(cached, 0.5):6.2f} ms  p99 {_percentile(cached, 0.99):6.2f} ms"
+                  f"  (two passes, short prefixes cached)")
+
+            word = words[0].lower()
+            print(f"  plan, prefix {word[:3]!r}:")
+            _explain(db, prefix_stmt, {"prefix": word[:3] + "%", "limit": args.limit})
+            print(f"  plan, fuzzy {word[:4]!r}:")
+            _explain(db, fuzzy_stmt, {"pattern": f"%{word[:4]}%", "q": word[:4], "limit": args.limit})
+    finally:
+        db.close()
+
+    if failed:
+        print(f"\nFAIL: p99 over {args.max_p99_ms} ms")
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+bench_logging.py
+
+Benchmark: cost of one log call on the caller's thread.
+
+- "queued": the app's pipeline (app/core/log.py), i.e. `ContextQueueHandler` + JSON formatting
+  on the listener thread, writing to /dev/null.
+- "direct": the same JSON formatter on a plain `StreamHandler`, i.e. formatting and writing on
+  the caller's thread (what `echo=True` / `basicConfig` do).
+- "debug off" / "debug sampled": `logger.debug` with DEBUG disabled, and at `--sample-rate`.
+- "slow sink": the queued pipeline with a sink that takes `--sink-ms` per record. The caller's
+  latency should not change; records beyond `settings.LOG_QUEUE_SIZE` are dropped instead.
+
+All calls run inside a request context and log one `extra` field, like the app does.
+
+Run from the backend folder:
+    python -m scripts.bench_logging --calls 200000
+"""
+
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+from app.core import log
+from app.core.config import settings
+
+class _SlowHandler(logging.Handler):
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def emit(self, record):
+        time.sleep(self.delay)
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def _measure(name: str, logger: logging.Logger, level: int, calls: int) -> None:
+    latencies = []
+    perf_counter = time.perf_counter_ns
+    for i in range(calls):
+        started = perf_counter()
+        logger.log(level, "Loaded project %s", i, extra={"project_id": i})
+        latencies.append(perf_counter() - started)
+    mean = sum(latencies) / len(latencies)
+    print(f"{name:<16} mean {mean / 1000:7.2f} µs   p50 {_percentile(latencies, 0.5) / 1000:7.2f} µs"
+          f"   p99 {_percentile(latencies, 0.99) / 1000:7.2f} µs")
+
+def _logger(name: str, handler: logging.Handler, level: int = logging.DEBUG,
+            sample_rate: float = 1.0) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.__class__ = log.SampledLogger
+    logger.debug_sample_rate = sample_rate
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+def _queued(sink: logging.Handler):
+    handler = log.ContextQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    listener = logging.handlers.QueueListener(handler.queue, sink)
+    listener.start()
+    return handler, listener
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    parser.add_argument("--sink-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    sink = logging.StreamHandler(devnull)
+    sink.setFormatter(log.JsonFormatter())
+    log.request_context.set({"request_id": "bench", "method": "GET", "path": "/bench", "user_id": 1})
+
+    handler, listener = _queued(sink)
+    _measure("queued", _logger("queued", handler), logging.INFO, args.calls)
+    listener.stop()
+
+    _measure("direct", _logger("direct", sink), logging.INFO, args.calls)
+
+    _measure("debug off", _logger("off", sink, logging.INFO), logging.DEBUG, args.calls)
+
+    handler, listener = _queued(sink)
+    _measure(f"debug {args.sample_rate:g}", _logger("sampled", handler, sample_rate=args.sample_rate),
+             logging.DEBUG, args.calls)
+    listener.stop()
+
+    dropped_before = log.DROPPED.get(reason="queue_full")
+    handler, listener = _queued(_SlowHandler(args.sink_ms / 1000))
+    _measure("slow sink", _logger("slow", handler), logging.INFO, args.calls)
+    dropped = log.DROPPED.get(reason="queue_full") - dropped_before
+    print(f"slow sink dropped {dropped:,.0f} of {args.calls:,} records (queue size {settings.LOG_QUEUE_SIZE:,})")
+    # Do not wait for the slow sink to drain the queue
+    handler.queue.queue.clear()
+    listener.stop()
+    devnull.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+bench_recommendations.py
+
+Benchmark for the in-memory recommendation index (app/services/recommendation_service.py).
+
+- Builds an index of synthetic projects with Zipf-distributed tags / tech stacks.
+- Times `recommend()` for random users and reports p50 / p99 / max latency.
+- Exits non-zero if p99 is above the budget (10 ms by default).
+
+No database needed. Run from the backend folder:
+    python -m scripts.bench_recommendations --projects 100000 --users 2000
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.services.recommendation_service import ProjectTagIndex
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--vocab", type=int, default=2_000, help="Distinct tags + tech stacks")
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vocab = np.array([f"term{i}" for i in range(args.vocab)])
+    weights = 1.0 / np.arange(1, args.vocab + 1)
+    weights /= weights.sum()
+
+    index = ProjectTagIndex(capacity=args.projects)
+    start = time.perf_counter()
+    for project_id in range(1, args.projects + 1):
+        terms = rng.choice(vocab, size=rng.integers(2, 10), p=weights)
+        terms = terms.tolist()
+        index.add_project(project_id, terms[:len(terms) // 2], terms[len(terms) // 2:], is_open=rng.random() < 0.8)
+    for user_id in range(1, args.users + 1):
+        for project_id in rng.integers(1, args.projects + 1, size=rng.integers(1, 6)):
+            index.add_member(user_id, int(project_id))
+    print(f"built index: {args.projects} projects, {index.n_nnz} non-zeros, "
+          f"{len(index.vocab)} terms in {time.perf_counter() - start:.1f}s")
+
+    timings = []
+    for user_id in rng.integers(1, args.users + 1, size=args.queries):
+        t0 = time.perf_counter()
+        index.recommend(int(user_id), limit=10)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings = np.array(timings)
+    p50, p99 = np.percentile(timings, [50, 99])
+    print(f"recommend(): p50={p50:.2f}ms p99={p99:.2f}ms max={timings.max():.2f}ms over {args.queries} queries")
+    if p99 > args.budget_ms:
+        print(f"FAIL: p99 above {args.budget_ms}ms budget")
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+bench_sse_memory.py
+
+Benchmark: server memory per idle Server-Sent Events stream.
+
+- Starts a uvicorn worker serving only `project_event_stream` (no DB lookup), opens
+  `--connections` streams to it, and reports the growth of the worker's RSS per stream.
+- The streams are spread over `--projects` project ids, like real traffic.
+- Redis is optional: without it the broker just logs that the stream is unavailable,
+  which does not change the per-connection cost.
+
+Run from the backend folder (Linux, reads /proc):
+    python -m scripts.bench_sse_memory --connections 5000
+"""
+
+import argparse
+import asyncio
+import resource
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from fastapi import FastAPI, Header
+from fastapi.responses import StreamingResponse
+
+from app.services.project_stream_service import project_event_stream
+
+bench_app = FastAPI()
+
+@bench_app.get("/events/{project_id}")
+async def events(project_id: int, last_event_id: Optional[str] = Header(None)):
+    return StreamingResponse(project_event_stream(project_id, last_event_id), media_type="text/event-stream")
+
+def _rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmRSS not found")
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _open_stream(port: int, project_id: int):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /events/{project_id} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    # Headers, then the first SSE line ("retry: ...") means the stream is subscribed
+    await reader.readuntil(b"retry:")
+    return reader, writer
+
+async def _run(args, port: int, server_pid: int) -> None:
+    baseline = _rss_kib(server_pid)
+    streams = []
+    started = time.perf_counter()
+    for batch_start in range(0, args.connections, 500):
+        batch = range(batch_start, min(batch_start + 500, args.connections))
+        streams += await asyncio.gather(*(_open_stream(port, i % args.projects + 1) for i in batch))
+    opened = time.perf_counter() - started
+    await asyncio.sleep(1.0)  # Let the worker settle
+    loaded = _rss_kib(server_pid)
+
+    per_stream = (loaded - baseline) * 1024 / max(len(streams), 1)
+    print(f"streams opened      {len(streams):>10,} in {opened:.1f}s")
+    print(f"worker RSS before   {baseline / 1024:>10.1f} MiB")
+    print(f"worker RSS after    {loaded / 1024:>10.1f} MiB")
+    print(f"per stream          {per_stream / 1024:>10.1f} KiB")
+    for _, writer in streams:
+        writer.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=5_000)
+    parser.add_argument("--projects", type=int, default=500)
+    args = parser.parse_args()
+
+    # Each stream needs a file descriptor here and one in the worker
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.connections + 100 > hard:
+        sys.exit(f"Open file limit is {hard}; raise it (ulimit -n) or use fewer --connections")
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "scripts.bench_sse_memory:bench_app",
+         "--port", str(port), "--log-level", "error", "--no-access-log"],
+        preexec_fn=lambda: resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard)),
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        asyncio.run(_run(args, port, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
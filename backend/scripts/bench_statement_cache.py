@@ -0,0 +1,69 @@
+"""
+bench_statement_cache.py
+
+Benchmark: per-call Python overhead of the hot user lookups, legacy Query vs the prebuilt
+statements in app/db/repository.py.
+
+- Uses an in-memory SQLite `users` table, so the numbers are mostly SQLAlchemy overhead
+  (building, cache-keying and compiling statements), not database time.
+- Reports microseconds per call for lookups by id, email and username.
+
+Run from the backend folder:
+    python -m scripts.bench_statement_cache --calls 20000
+"""
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import repository
+from app.db.models import User
+
+def _time_per_call(func, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(User(id=i, email=f"user{i}@example.com", username=f"user{i}", hashed_password="x")
+               for i in range(1, args.users + 1))
+    db.commit()
+    n = args.users
+
+    cases = {
+        "by id": (
+            lambda i: db.query(User).filter(User.id == i % n + 1).first(),
+            lambda i: repository.get_user_by_id(db, i % n + 1),
+        ),
+        "by email": (
+            lambda i: db.query(User).filter(User.email == f"user{i % n + 1}@example.com").first(),
+            lambda i: repository.get_user_by_email(db, f"user{i % n + 1}@example.com"),
+        ),
+        "by username": (
+            lambda i: db.query(User).filter(User.username == f"user{i % n + 1}").first(),
+            lambda i: repository.get_user_by_username(db, f"user{i % n + 1}"),
+        ),
+    }
+    print(f"{'lookup':<12} {'query()':>10} {'prebuilt':>10} {'saved':>8}")
+    for name, (legacy, prebuilt) in cases.items():
+        # Warm up both paths (compiled cache, identity map)
+        _time_per_call(legacy, 500)
+        _time_per_call(prebuilt, 500)
+        legacy_us = _time_per_call(legacy, args.calls)
+        prebuilt_us = _time_per_call(prebuilt, args.calls)
+        saved = (1 - prebuilt_us / legacy_us) * 100
+        print(f"{name:<12} {legacy_us:>8.1f}us {prebuilt_us:>8.1f}us {saved:>7.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+bench_ws_reconnect.py
+
+Benchmark: WebSocket reconnect storm against `/ws/presence`.
+
+- Starts the app (`app.main:app`) in a uvicorn worker and opens `--clients` authenticated
+  sockets, `--concurrency` handshakes at a time, each with its own access token.
+- Then reconnects every client twice:
+  - "after deploy": the worker is restarted first, so its local cache is empty and only the
+    shared (Redis) token cache is warm;
+  - "same worker": the sockets are dropped and reopened on the same worker (local cache warm).
+- Per round: time to reconnect everyone, handshakes/s, handshake latency (p50 / p99 / max),
+  failures, and how the worker authenticated them (`ws_auth_total` from `/metrics`).
+
+Needs the app's Postgres with at least `--clients` active users (e.g.
+`python -m scripts.generate_dataset --users 20000`) and Redis.
+
+Run from the backend folder (Linux):
+    python -m scripts.bench_ws_reconnect --clients 20000
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import re
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from sqlalchemy import text
+
+from app.core.redis_client import get_redis
+from app.core.security import create_access_token
+from app.websocket.auth import REDIS_PREFIX
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _start_server(port: int, nofile: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--log-level", "error", "--no-access-log"],
+        env={**os.environ, "LOG_LEVEL": "WARNING"},
+        preexec_fn=lambda: resource.setrlimit(resource.RLIMIT_NOFILE, (nofile, nofile)),
+    )
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    sys.exit("server did not start")
+
+def _auth_counts(port: int) -> dict[str, int]:
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+    return {source: int(float(value)) for source, value in re.findall(r'ws_auth_total\{source="(\w+)"\} (\S+)', body)}
+
+async def _handshake(port: int, token: str, latencies: list[float]):
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        f"GET /ws/presence?token={token} HTTP/1.1\r\nHost: bench\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+    )
+    await writer.drain()
+    response = await reader.readuntil(b"\r\n\r\n")
+    if not response.startswith(b"HTTP/1.1 101"):
+        writer.close()
+        raise ConnectionError(response.split(b"\r\n", 1)[0].decode())
+    latencies.append(time.perf_counter() - started)
+    return writer
+
+async def _storm(port: int, tokens: list[str], concurrency: int):
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(token: str):
+        async with semaphore:
+            try:
+                return await _handshake(port, token, latencies)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                return None
+
+    started = time.perf_counter()
+    writers = await asyncio.gather(*(connect(token) for token in tokens))
+    elapsed = time.perf_counter() - started
+    return [w for w in writers if w is not None], latencies, elapsed
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+def _report(name: str, clients: int, opened: int, latencies: list[float], elapsed: float, auth: dict) -> None:
+    print(f"{name:<14} {opened:>6}/{clients} in {elapsed:6.2f}s  {opened / elapsed:8.0f}/s  "
+          f"p50 {_percentile(latencies, 0.5) * 1000:7.1f} ms  p99 {_percentile(latencies, 0.99) * 1000:7.1f} ms  "
+          f"max {max(latencies, default=float('nan')) * 1000:7.1f} ms  auth {auth}")
+
+async def _close(writers) -> None:
+    for writer in writers:
+        writer.close()
+    await asyncio.sleep(0.5)  # Let the worker notice
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=1_000)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.clients + 100 > hard:
+        sys.exit(f"Open file limit is {hard}; raise it (ulimit -n) or use fewer --clients")
+
+    from app.db.session import engine
+
+    with engine.connect() as conn:
+        user_ids = conn.execute(
+            text("SELECT id FROM users WHERE is_active ORDER BY id LIMIT :n"), {"n": args.clients}
+        ).scalars().all()
+    if len(user_ids) < args.clients:
+        sys.exit(f"Only {len(user_ids)} active users; generate more (python -m scripts.generate_dataset)")
+    tokens = [create_access_token({"sub": str(user_id)}) for user_id in user_ids]
+
+    # Start from an empty shared cache
+    redis = get_redis()
+    for key in redis.scan_iter(match=REDIS_PREFIX + "*", count=10_000):
+        redis.delete(key)
+
+    asyncio.run(_run(args, tokens, hard))
+
+async def _run(args, tokens: list[str], nofile: int) -> None:
+    port = _free_port()
+    server = await asyncio.to_thread(_start_server, port, nofile)
+    try:
+        writers, latencies, elapsed = await _storm(port, tokens, args.concurrency)
+        _report("cold", args.clients, len(writers), latencies, elapsed, _auth_counts(port))
+        await _close(writers)
+
+        # Deploy: new worker, empty local cache
+        server.terminate()
+        await asyncio.to_thread(server.wait)
+        server = await asyncio.to_thread(_start_server, port, nofile)
+        writers, latencies, elapsed = await _storm(port, tokens, args.concurrency)
+        before = _auth_counts(port)
+        _report("after deploy", args.clients, len(writers), latencies, elapsed, before)
+        await _close(writers)
+
+        writers, latencies, elapsed = await _storm(port, tokens, args.concurrency)
+        after = _auth_counts(port)
+        _report("same worker", args.clients, len(writers), latencies, elapsed,
+                {source: count - before.get(source, 0) for source, count in after.items()})
+        await _close(writers)
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+check_fieldsets.py
+
+Check: every field a `?fields=` 400 advertises as allowed can actually be requested.
+
+- For each endpoint with sparse fieldsets, asks for an unknown field and reads the
+  "Allowed: ..." list out of the 400.
+- Then requests every advertised field on its own, and all of them together, and expects
+  a 200 whose body has exactly those keys.
+- Fails (exit 1) on any other status or body.
+
+Needs the app's Postgres with migrations applied and at least one user and one project
+(e.g. `python -m scripts.generate_dataset`).
+
+Run from the backend folder:
+    python -m scripts.check_fieldsets
+"""
+
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db.models import Project, User
+from app.db.session import SessionLocal
+from app.main import app
+
+def _allowed(client: TestClient, path: str) -> list[str]:
+    response = client.get(path, params={"fields": "_no_such_field"})
+    if response.status_code != 400:
+        raise RuntimeError(f"{path}: expected 400 for an unknown field, got {response.status_code}")
+    return response.json()["detail"].split("Allowed: ", 1)[1].split(", ")
+
+def _check(client: TestClient, path: str, many: bool) -> list[str]:
+    failures = []
+    page = {"limit": 20} if many else {}
+    allowed = _allowed(client, path)
+    for fields in [[name] for name in allowed] + [allowed]:
+        response = client.get(path, params={"fields": ",".join(fields), **page})
+        if response.status_code != 200:
+            failures.append(f"{path}?fields={','.join(fields)}: {response.status_code}")
+            continue
+        body = response.json()
+        items = body if many else [body]
+        if any(set(item) != set(fields) for item in items):
+            failures.append(f"{path}?fields={','.join(fields)}: unexpected keys {sorted(items[0])}")
+    print(f"{path}: {len(allowed)} fields checked")
+    return failures
+
+def main() -> None:
+    with SessionLocal() as db:
+        user_id = db.execute(select(User.id).limit(1)).scalar()
+        project_id = db.execute(select(Project.id).limit(1)).scalar()
+    if user_id is None or project_id is None:
+        print("FAIL: needs at least one user and one project")
+        sys.exit(1)
+
+    client = TestClient(app)
+    failures = []
+    failures += _check(client, "/api/v1/users/", many=True)
+    failures += _check(client, f"/api/v1/users/{user_id}", many=False)
+    failures += _check(client, "/api/v1/projects/", many=True)
+    failures += _check(client, f"/api/v1/projects/{project_id}", many=False)
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+check_invalidation_latency.py
+
+Check: a change committed by one process invalidates the cache of another process, and how fast.
+
+- Process B starts the invalidation listener with a registered user cache, caches a user,
+  and reports the time at which each invalidation reaches it.
+- Process A (this one) updates that user `--updates` times, one commit each, and reports the
+  latency from COMMIT returning to B dropping its entry (p50 / p99 / max).
+- Fails (exit 1) if an invalidation is missing or p99 exceeds `--max-p99-ms`.
+
+Needs the app's Postgres with migrations applied (`alembic upgrade head`) and at least one user
+(e.g. `python -m scripts.generate_dataset`).
+
+Run from the backend folder:
+    python -m scripts.check_invalidation_latency --updates 200
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+from sqlalchemy import text
+
+def _listener_process(user_id: int, ready, received) -> None:
+    from app.core.cache import TTLCache
+    from app.db import invalidation
+
+    cache = TTLCache(maxsize=10, ttl=3600)
+
+    def on_change(row_id: int) -> None:
+        if row_id == user_id and cache.get(row_id) is not None:
+            cache.delete(row_id)
+            received.put(time.time())
+            cache.set(row_id, "cached again")  # Ready for the next update
+
+    invalidation.register("users", on_change, cache.clear)
+    invalidation.listener.start()
+    if not invalidation.listener.wait_ready(timeout=10):
+        sys.exit("listener could not connect")
+    cache.set(user_id, "cached")
+    ready.set()
+    time.sleep(3600)
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--max-p99-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    from app.db.session import engine
+
+    with engine.connect() as conn:
+        user_id = conn.execute(text("SELECT min(id) FROM users")).scalar()
+    if user_id is None:
+        sys.exit("No users; generate some first (python -m scripts.generate_dataset)")
+
+    ctx = multiprocessing.get_context("spawn")
+    ready, received = ctx.Event(), ctx.Queue()
+    child = ctx.Process(target=_listener_process, args=(user_id, ready, received), daemon=True)
+    child.start()
+    try:
+        if not ready.wait(timeout=30):
+            sys.exit("listener process did not start")
+        latencies, missing = [], 0
+        with engine.connect() as conn:
+            for _ in range(args.updates):
+                # A no-op UPDATE still fires the row trigger
+                conn.execute(text("UPDATE users SET is_active = is_active WHERE id = :id"), {"id": user_id})
+                conn.commit()
+                committed = time.time()
+                try:
+                    latencies.append((received.get(timeout=2.0) - committed) * 1000)
+                except Exception:
+                    missing += 1
+    finally:
+        child.terminate()
+
+    if latencies:
+        print(f"invalidations  {len(latencies)}/{args.updates}")
+        print(f"p50            {_percentile(latencies, 0.50):7.2f} ms")
+        print(f"p99            {_percentile(latencies, 0.99):7.2f} ms")
+        print(f"max            {max(latencies):7.2f} ms")
+    if missing or not latencies or _percentile(latencies, 0.99) > args.max_p99_ms:
+        print(f"FAIL: {missing} missing, p99 budget {args.max_p99_ms} ms")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
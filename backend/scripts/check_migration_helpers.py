@@ -0,0 +1,171 @@
+"""
+check_migration_helpers.py
+
+Check: the migration helpers (app/db/migration_helpers.py) do their job under a concurrent write load.
+
+- Creates a scratch table `_migration_check` with `--rows` rows, then starts `--writers`
+  threads that update and insert rows in a loop, timing every write.
+- Runs, while they write:
+  1. `run_with_lock_timeout` ALTER TABLE ADD COLUMN while another transaction holds a lock
+     on the table for `--blocker-seconds`. The ALTER has to time out and retry, and writes
+     must never queue behind it for longer than its lock timeout.
+  2. `backfill` of the new column in batches.
+  3. `create_index_concurrently` on it, while an older transaction stays open for
+     `--blocker-seconds` (longer than the lock timeout), so the build has to wait it out.
+- Fails (exit 1) if a write took longer than `--max-stall-ms` in any phase, the backfill
+  missed a row, the index is not valid, or a writer hit an error.
+- Drops the scratch table at the end.
+
+Needs the app's Postgres (any database the app can create tables in).
+
+Run from the backend folder:
+    python -m scripts.check_migration_helpers --rows 200000 --writers 4
+"""
+
+import argparse
+import logging
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import text
+
+from app.db import migration_helpers
+from app.db.session import engine
+
+TABLE = "_migration_check"
+LOCK_TIMEOUT = "500ms"
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+class Writers:
+    """
+    Threads writing to TABLE until stopped; latencies are filed under the current phase.
+    """
+    def __init__(self, count: int, max_id: int):
+        self.phase = "baseline"
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: list[str] = []
+        self._max_id = max_id
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(count)]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        with engine.connect() as conn:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    if random.random() < 0.2:
+                        conn.execute(text(f"INSERT INTO {TABLE} (n) VALUES (0)"))
+                    else:
+                        conn.execute(text(f"UPDATE {TABLE} SET n = n + 1 WHERE id = :id"),
+                                     {"id": random.randint(1, self._max_id)})
+                    conn.commit()
+                except Exception as error:
+                    conn.rollback()
+                    self.errors.append(f"{type(error).__name__}: {error}")
+                    continue
+                self.latencies[self.phase].append(time.perf_counter() - started)
+
+def _hold_lock(seconds: float, held: threading.Event) -> None:
+    # An open transaction that has read the table: ALTER TABLE cannot get its lock until it ends
+    with engine.connect() as conn:
+        conn.execute(text(f"SELECT 1 FROM {TABLE} LIMIT 1"))
+        held.set()
+        time.sleep(seconds)
+        conn.commit()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--blocker-seconds", type=float, default=3.0)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--max-stall-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        conn.execute(text(f"CREATE TABLE {TABLE} (id serial PRIMARY KEY, n integer NOT NULL)"))
+        conn.execute(text(f"INSERT INTO {TABLE} (n) SELECT 0 FROM generate_series(1, :rows)"), {"rows": args.rows})
+
+    failures = []
+    writers = Writers(args.writers, args.rows)
+    writers.start()
+    ddl = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        time.sleep(2)
+
+        writers.phase = "add column (blocked)"
+        held = threading.Event()
+        blocker = threading.Thread(target=_hold_lock, args=(args.blocker_seconds, held))
+        blocker.start()
+        held.wait()
+        migration_helpers.run_with_lock_timeout(
+            ddl, f"ALTER TABLE {TABLE} ADD COLUMN parity integer", lock_timeout=LOCK_TIMEOUT, backoff_seconds=0.5
+        )
+        blocker.join()
+
+        writers.phase = "backfill"
+        migration_helpers.backfill(
+            ddl, TABLE, "parity = id % 2", where="parity IS NULL",
+            batch_size=args.batch_size, progress_every=2.0, lock_timeout=LOCK_TIMEOUT,
+        )
+        missed = ddl.execute(text(f"SELECT count(*) FROM {TABLE} WHERE id <= :max_id AND parity IS NULL"),
+                             {"max_id": args.rows}).scalar()
+        if missed:
+            failures.append(f"backfill missed {missed} rows")
+
+        writers.phase = "create index"
+        held = threading.Event()
+        blocker = threading.Thread(target=_hold_lock, args=(args.blocker_seconds, held))
+        blocker.start()
+        held.wait()
+        migration_helpers.create_index_concurrently(
+            ddl, f"ix{TABLE}_parity", TABLE, "parity", lock_timeout=LOCK_TIMEOUT
+        )
+        blocker.join()
+        valid = ddl.execute(text(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+        ), {"name": f"ix{TABLE}_parity"}).scalar()
+        if not valid:
+            failures.append("index is not valid")
+
+        writers.phase = "after"
+        time.sleep(2)
+    finally:
+        writers.stop()
+        ddl.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        ddl.close()
+
+    print(f"\n{'phase':<22} {'writes':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for phase, values in writers.latencies.items():
+        worst = max(values) * 1000
+        print(f"{phase:<22} {len(values):>8} {_percentile(values, 0.5):>8.2f} "
+              f"{_percentile(values, 0.99):>8.2f} {worst:>8.1f}")
+        if worst > args.max_stall_ms:
+            failures.append(f"{phase}: a write stalled for {worst:.0f} ms")
+    if writers.errors:
+        failures.append(f"{len(writers.errors)} write errors, first: {writers.errors[0]}")
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
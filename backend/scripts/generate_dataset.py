@@ -0,0 +1,260 @@
+"""
+generate_dataset.py
+
+Generate a synthetic dataset for scale testing: users, projects, memberships and friendships
+that match app/db/models.py.
+
+- Deterministic from `--seed`: the same arguments always produce the same rows, so benchmark
+  runs are comparable. (Only the bcrypt salts differ; the passwords do not.)
+- Tags and tech stacks follow a Zipf distribution, so a few terms are very common and most
+  are rare, like real data. Project owners and joiners are skewed the same way.
+- Passwords are hashed once up front: user i has password `password<i % --passwords>`, so
+  only `--passwords` bcrypt hashes are computed in total.
+- Rows are streamed into Postgres with COPY, in chunks. Afterwards the id sequences are moved
+  past the generated ids, the tables are ANALYZEd and the stats views are refreshed.
+- `member_count` is filled in to match the generated memberships.
+
+1M users and 200k projects take a few minutes against a local Postgres.
+
+Run from the backend folder (tables must exist: `alembic upgrade head`):
+    python -m scripts.generate_dataset --users 1000000 --projects 200000 --truncate
+"""
+
+import argparse
+import io
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.security import hash_password
+
+CHUNK_ROWS = 50_000
+# Fixed, so re-running with the same seed gives the same timestamps
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SPAN_DAYS = 365
+
+COMMON_TECH = [
+    "python", "javascript", "typescript", "react", "fastapi", "django", "node", "postgresql",
+    "docker", "go", "rust", "java", "kotlin", "swift", "vue", "svelte", "redis", "aws",
+    "kubernetes", "graphql", "flutter", "c++", "tailwind", "nextjs", "pytorch",
+]
+COMMON_TAGS = [
+    "web", "mobile", "ai", "open-source", "game", "education", "devtools", "health", "finance",
+    "social", "data", "security", "iot", "productivity", "climate", "music", "hackathon",
+]
+DIFFICULTIES = np.array(["beginner", "intermediate", "advanced"])
+
+# --- Helpers ---
+def _vocabulary(common: list[str], prefix: str, size: int) -> np.ndarray:
+    return np.array(common[:size] + [f"{prefix}-{i}" for i in range(len(common), size)])
+
+def _zipf_indices(rng: np.random.Generator, a: float, size: int, n: int) -> np.ndarray:
+    """
+    `size` draws in [0, n) with P(k) ~ 1 / (k + 1)^a.
+    """
+    weights = 1.0 / np.arange(1, n + 1) ** a
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+def _copy_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _pg_array(values) -> str:
+    quoted = ('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return _copy_escape("{" + ",".join(quoted) + "}")
+
+def _timestamps(rng: np.random.Generator, n: int) -> list[str]:
+    seconds = np.sort(rng.integers(0, SPAN_DAYS * 86_400, size=n))
+    return [(EPOCH + timedelta(seconds=int(s))).isoformat() for s in seconds]
+
+def _copy(cursor, table: str, columns: list[str], rows) -> int:
+    """
+    Stream rows (tuples of already-formatted strings) into `table` with COPY, in chunks.
+    """
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    count = 0
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(row))
+        buffer.write("\n")
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            buffer = io.StringIO()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+    return count
+
+# --- Generators (pure, seed-driven) ---
+def generate_users(rng: np.random.Generator, n_users: int, hashes: list[str]):
+    verified = rng.random(n_users) < 0.7
+    created = _timestamps(rng, n_users)
+    for i in range(n_users):
+        user_id = i + 1
+        yield (
+            str(user_id), f"user{user_id}@example.com", f"user{user_id}",
+            hashes[i % len(hashes)], "t", "t" if verified[i] else "f", created[i],
+        )
+
+def generate_projects(rng: np.random.Generator, args) -> dict:
+    """
+    Return column arrays for the projects plus their extra (non-owner) members.
+    """
+    n = args.projects
+    tags = _vocabulary(COMMON_TAGS, "tag", args.tag_vocab)
+    tech = _vocabulary(COMMON_TECH, "tech", args.tech_vocab)
+    n_tags = rng.integers(1, 6, size=n)
+    n_tech = rng.integers(1, 6, size=n)
+    tag_draws = _zipf_indices(rng, args.zipf, int(n_tags.sum()), len(tags))
+    tech_draws = _zipf_indices(rng, args.zipf, int(n_tech.sum()), len(tech))
+    tag_bounds = np.concatenate([[0], np.cumsum(n_tags)])
+    tech_bounds = np.concatenate([[0], np.cumsum(n_tech)])
+
+    # Active users own and join more projects than the long tail
+    owners = _zipf_indices(rng, 0.6, n, args.users) + 1
+    max_team = rng.integers(2, 11, size=n)
+    extra = np.minimum(rng.poisson(args.avg_members, size=n), max_team - 1)
+    joiners = _zipf_indices(rng, 0.6, int(extra.sum()), args.users) + 1
+    joiner_bounds = np.concatenate([[0], np.cumsum(extra)])
+
+    members = []
+    member_count = np.ones(n, dtype=np.int64)
+    for p in range(n):
+        chosen = set()
+        for user_id in joiners[joiner_bounds[p]:joiner_bounds[p + 1]].tolist():
+            if user_id != owners[p] and user_id not in chosen:
+                chosen.add(user_id)
+                members.append((p + 1, user_id))
+        member_count[p] += len(chosen)
+
+    return {
+        "tags": [
+            list(dict.fromkeys(tags[tag_draws[tag_bounds[p]:tag_bounds[p + 1]]].tolist()))
+            for p in range(n)
+        ],
+        "tech": [
+            list(dict.fromkeys(tech[tech_draws[tech_bounds[p]:tech_bounds[p + 1]]].tolist()))
+            for p in range(n)
+        ],
+        "owners": owners,
+        "max_team": max_team,
+        "member_count": member_count,
+        "difficulty": DIFFICULTIES[rng.choice(3, size=n, p=[0.45, 0.4, 0.15])],
+        "is_open": rng.random(n) < 0.8,
+        "created": _timestamps(rng, n),
+        "members": members,
+    }
+
+def project_rows(projects: dict):
+    for p in range(len(projects["owners"])):
+        project_id = p + 1
+        main_tech = projects["tech"][p][0] if projects["tech"][p] else "code"
+        yield (
+            str(project_id),
+            f"Project {project_id}",
+            f"A {main_tech} project",
+            _copy_escape(f"Synthetic project {project_id} built with {', '.join(projects['tech'][p])}."),
+            str(projects["difficulty"][p]),
+            "open" if projects["is_open"][p] else "closed",
+            str(projects["max_team"][p]),
+            str(projects["member_count"][p]),
+            _pg_array(projects["tags"][p]),
+            _pg_array(projects["tech"][p]),
+            f"https://github.com/example/project-{project_id}",
+            projects["created"][p],
+            str(projects["owners"][p]),
+        )
+
+def member_rows(projects: dict):
+    member_id = 0
+    for p in range(len(projects["owners"])):
+        member_id += 1
+        yield str(member_id), str(projects["owners"][p]), str(p + 1), "owner", projects["created"][p]
+    for project_id, user_id in projects["members"]:
+        member_id += 1
+        yield str(member_id), str(user_id), str(project_id), "member", projects["created"][project_id - 1]
+
+def friendship_rows(rng: np.random.Generator, n_users: int, n_edges: int):
+    a = _zipf_indices(rng, 0.6, n_edges, n_users) + 1
+    b = rng.integers(1, n_users + 1, size=n_edges)
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    keep = low != high
+    pairs = np.unique(low[keep].astype(np.int64) * (n_users + 1) + high[keep])
+    created = _timestamps(rng, len(pairs))
+    for i, pair in enumerate(pairs.tolist()):
+        yield str(i + 1), str(pair // (n_users + 1)), str(pair % (n_users + 1)), "accepted", created[i]
+
+# --- Loading ---
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--projects", type=int, default=2_000)
+    parser.add_argument("--friendships", type=int, default=0, help="Friend pairs to draw (duplicates dropped)")
+    parser.add_argument("--avg-members", type=float, default=3.0, help="Average members per project besides the owner")
+    parser.add_argument("--tag-vocab", type=int, default=300)
+    parser.add_argument("--tech-vocab", type=int, default=150)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for tags and tech stacks")
+    parser.add_argument("--passwords", type=int, default=4, help="Distinct passwords (bcrypt hashes) to use")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--truncate", action="store_true", help="Empty the tables first")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(args.seed)
+    hashes = [hash_password(f"password{i}") for i in range(args.passwords)]
+
+    engine = create_engine(args.database_url)
+    with engine.connect() as conn:
+        if args.truncate:
+            conn.execute(text("TRUNCATE friendships, project_members_archive, projects_archive, project_members, projects, users RESTART IDENTITY CASCADE"))
+            conn.commit()
+        elif conn.execute(text("SELECT EXISTS (SELECT 1 FROM users)")).scalar():
+            parser.error("users is not empty; pass --truncate to replace its contents")
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SET synchronous_commit = off")
+
+        def load(table, columns, rows):
+            step = time.perf_counter()
+            count = _copy(cursor, table, columns, rows)
+            raw.commit()
+            print(f"{table:<16} {count:>10,} rows  {time.perf_counter() - step:6.1f}s")
+
+        load("users", ["id", "email", "username", "hashed_password", "is_active", "is_verified", "created_at"],
+             generate_users(rng, args.users, hashes))
+        projects = generate_projects(rng, args)
+        load("projects", [
+            "id", "title", "short_description", "detailed_description", "difficulty", "status",
+            "max_team_members", "member_count", "tags", "tech_stack", "repository_url", "created_at", "owner_id",
+        ], project_rows(projects))
+        load("project_members", ["id", "user_id", "project_id", "role", "joined_at"], member_rows(projects))
+        if args.friendships:
+            load("friendships", ["id", "user_id", "friend_id", "status", "created_at"],
+                 friendship_rows(rng, args.users, args.friendships))
+
+        # Ids were given explicitly; move the sequences past them so the app can insert
+        for table in ("users", "projects", "project_members", "friendships"):
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)"
+            )
+        raw.commit()
+        raw.dbapi_connection.autocommit = True  # Not on the pool proxy: that would be a no-op
+        cursor.execute("ANALYZE users, projects, project_members, friendships")
+        for view in ("mv_project_leaderboard", "mv_tech_stack_popularity", "mv_daily_signups"):
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {view}")
+    finally:
+        raw.close()
+
+    print(f"done in {time.perf_counter() - started:.1f}s (seed {args.seed}); "
+          f"log in as user<N>@example.com with password<N % {args.passwords}>")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+soak_ws.py
+
+Capacity and soak test for `/ws/presence` on one worker.
+
+- Starts the app (`app.main:app`) in one uvicorn worker. The harness connects clients in steps
+  of `--step`, up to `--clients`. Each client has its own access token.
+- While connected, it drives traffic:
+  - `--message-rate` echo messages per second, spread over random clients. The round trip is
+    the send latency.
+  - `--broadcast-rate` broadcasts per second through `POST /api/v1/admin/ws/broadcast`. The
+    time until each client receives it is the broadcast latency.
+- After each step (ramp), and every `--sample-every` seconds during the `--duration` soak, it
+  records:
+  - open connections, and the worker's RSS with its growth per connection;
+  - echo and broadcast latency percentiles, and messages lost;
+  - event-loop lag (the worker's `event_loop_lag_*` metrics, and the harness's own);
+  - unexpected disconnects.
+- Ramping stops at the first step where echo p99 exceeds `--max-p99-ms` or connections fail.
+  The soak then runs at the level reached.
+- Writes everything to `--report` (JSON). `--compare old.json` prints the summary next to an
+  earlier report, e.g. from the previous release.
+
+The harness is a client too: if its own loop lag is high, its latencies are not the server's.
+Run it on a different machine than the worker for large runs, or keep `--clients` modest.
+Clients do not negotiate permessage-deflate unless `--compression` is given. Browsers do
+negotiate it, and it costs the worker a lot of memory per connection.
+
+Needs the app's Postgres with at least `--clients` active users
+(`python -m scripts.generate_dataset --users 20000`) and Redis.
+
+Run from the backend folder (Linux, reads /proc):
+    python -m scripts.soak_ws --clients 20000 --step 5000 --duration 1800 --report soak.json
+    python -m scripts.soak_ws --clients 20000 --report soak-new.json --compare soak.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import resource
+import secrets
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Optional
+
+from sqlalchemy import text
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, WebSocketException
+
+from app.core.security import create_access_token
+
+# --- Worker process ---
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class Worker:
+    def __init__(self, nofile: int):
+        self.port = _free_port()
+        self.admin_key = secrets.token_hex(16)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.port),
+             "--log-level", "error", "--no-access-log"],
+            env={**os.environ, "LOG_LEVEL": "WARNING", "ADMIN_API_KEY": self.admin_key},
+            preexec_fn=lambda: resource.setrlimit(resource.RLIMIT_NOFILE, (nofile, nofile)),
+        )
+        for _ in range(300):
+            try:
+                self._get("/")
+                return
+            except OSError:
+                time.sleep(0.1)
+        self.stop()
+        sys.exit("server did not start")
+
+    def _get(self, path: str) -> str:
+        return urllib.request.urlopen(f"http://127.0.0.1:{self.port}{path}", timeout=5).read().decode()
+
+    def rss_kib(self) -> int:
+        with open(f"/proc/{self.process.pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        raise RuntimeError("VmRSS not found")
+
+    def metrics(self) -> dict[str, float]:
+        found = re.findall(r"^(event_loop_lag_seconds|event_loop_lag_max_seconds|ws_connections) (\S+)$",
+                           self._get("/metrics"), re.MULTILINE)
+        return {name: float(value) for name, value in found}
+
+    def broadcast(self, message: dict) -> None:
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{self.port}/api/v1/admin/ws/broadcast",
+            data=json.dumps(message).encode(),
+            headers={"Content-Type": "application/json", "X-Admin-Key": self.admin_key},
+            method="POST",
+        )
+        urllib.request.urlopen(request, timeout=60).close()
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.wait()
+
+# --- Measurements ---
+def _percentile(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+class Window:
+    """
+    What happened since the last sample.
+    """
+
+    def __init__(self):
+        self.echo: list[float] = []
+        self.broadcast: list[float] = []
+        self.sent = 0
+        self.disconnects = 0
+        self.harness_lag = 0.0
+
+    def row(self) -> dict:
+        return {
+            "echo_p50_ms": _percentile(self.echo, 0.50),
+            "echo_p99_ms": _percentile(self.echo, 0.99),
+            "echo_p999_ms": _percentile(self.echo, 0.999),
+            "broadcast_p50_ms": _percentile(self.broadcast, 0.50),
+            "broadcast_p99_ms": _percentile(self.broadcast, 0.99),
+            "messages_sent": self.sent,
+            "messages_lost": max(self.sent - len(self.echo), 0),
+            "disconnects": self.disconnects,
+            "harness_lag_max_ms": round(self.harness_lag * 1000, 3),
+        }
+
+# --- Clients ---
+class Harness:
+    def __init__(self, worker: Worker, args):
+        self.worker = worker
+        self.args = args
+        self.clients: list = []
+        self.window = Window()
+        self.pending: dict[int, float] = {}  # Echo message id -> sent at
+        self._ids = 0
+        self._closing = False
+
+    async def _read(self, websocket) -> None:
+        try:
+            async for message in websocket:
+                received = time.perf_counter()
+                if message.startswith("Echo: "):
+                    sent_at = self.pending.pop(int(message[6:]), None)
+                    if sent_at is not None:
+                        self.window.echo.append(received - sent_at)
+                else:
+                    event = json.loads(message)
+                    if event.get("type") == "soak":
+                        self.window.broadcast.append(time.time() - event["sent_at"])
+        except ConnectionClosed:
+            pass
+        if not self._closing:
+            self.window.disconnects += 1
+            self.clients.remove(websocket)
+
+    async def connect(self, tokens: list[str]) -> int:
+        """
+        Open one client per token (`--ramp-rate` per second). Returns how many failed.
+        """
+        failures = 0
+        semaphore = asyncio.Semaphore(self.args.ramp_rate)
+
+        async def open_one(token: str) -> None:
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    websocket = await connect(
+                        f"ws://127.0.0.1:{self.worker.port}/ws/presence",
+                        subprotocols=["bearer", token],
+                        compression="deflate" if self.args.compression else None,
+                        open_timeout=30,
+                    )
+                except (OSError, WebSocketException, asyncio.TimeoutError):
+                    failures += 1
+                    return
+                self.clients.append(websocket)
+                asyncio.get_running_loop().create_task(self._read(websocket))
+                await asyncio.sleep(max(1.0 - (time.perf_counter() - started), 0))
+
+        await asyncio.gather(*(open_one(token) for token in tokens))
+        return failures
+
+    async def drive_messages(self) -> None:
+        tick = 0.1
+        budget = 0.0
+        while True:
+            await asyncio.sleep(tick)
+            budget += self.args.message_rate * tick
+            while budget >= 1 and self.clients:
+                budget -= 1
+                self._ids += 1
+                self.pending[self._ids] = time.perf_counter()
+                self.window.sent += 1
+                try:
+                    await random.choice(self.clients).send(str(self._ids))
+                except ConnectionClosed:
+                    self.pending.pop(self._ids, None)
+
+    async def drive_broadcasts(self) -> None:
+        if self.args.broadcast_rate <= 0:
+            return
+        while True:
+            await asyncio.sleep(1 / self.args.broadcast_rate)
+            await asyncio.to_thread(self.worker.broadcast, {"type": "soak", "sent_at": time.time()})
+
+    async def watch_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(0.1)
+            self.window.harness_lag = max(self.window.harness_lag, loop.time() - started - 0.1)
+
+    async def sample(self, seconds: float, baseline_kib: int) -> dict:
+        self.window = Window()
+        await asyncio.sleep(seconds)
+        rss = await asyncio.to_thread(self.worker.rss_kib)
+        server = await asyncio.to_thread(self.worker.metrics)
+        connections = len(self.clients)
+        return {
+            "t": round(time.time(), 1),
+            "connections": connections,
+            "rss_mib": round(rss / 1024, 1),
+            "kib_per_connection": round((rss - baseline_kib) / connections, 2) if connections else None,
+            "server_loop_lag_ms": round(server.get("event_loop_lag_seconds", 0) * 1000, 3),
+            "server_loop_lag_max_ms": round(server.get("event_loop_lag_max_seconds", 0) * 1000, 3),
+            "server_ws_connections": int(server.get("ws_connections", 0)),
+            **self.window.row(),
+        }
+
+    async def close(self) -> None:
+        self._closing = True
+        await asyncio.gather(*(websocket.close() for websocket in self.clients), return_exceptions=True)
+
+async def _run(args, tokens: list[str], worker: Worker) -> dict:
+    harness = Harness(worker, args)
+    baseline = worker.rss_kib()
+    drivers = [asyncio.create_task(d()) for d in (harness.drive_messages, harness.drive_broadcasts, harness.watch_lag)]
+    ramp, soak, degraded_at = [], [], None
+    try:
+        for start in range(0, len(tokens), args.step):
+            failures = await harness.connect(tokens[start:start + args.step])
+            row = {**await harness.sample(args.settle, baseline), "connect_failures": failures}
+            ramp.append(row)
+            print(f"ramp  {row['connections']:>7} conns  {row['rss_mib']:>8} MiB  "
+                  f"{row['kib_per_connection']} KiB/conn  echo p99 {row['echo_p99_ms']} ms  "
+                  f"loop lag max {row['server_loop_lag_max_ms']} ms  failures {failures}")
+            if failures or (row["echo_p99_ms"] or 0) > args.max_p99_ms:
+                degraded_at = row["connections"]
+                break
+
+        ends_at = time.monotonic() + args.duration
+        while time.monotonic() < ends_at:
+            row = await harness.sample(min(args.sample_every, max(ends_at - time.monotonic(), 0.1)), baseline)
+            soak.append(row)
+            print(f"soak  {row['connections']:>7} conns  {row['rss_mib']:>8} MiB  "
+                  f"echo p50/p99 {row['echo_p50_ms']}/{row['echo_p99_ms']} ms  "
+                  f"broadcast p99 {row['broadcast_p99_ms']} ms  disconnects {row['disconnects']}")
+    finally:
+        for driver in drivers:
+            driver.cancel()
+        await harness.close()
+
+    return {"ramp": ramp, "soak": soak, "summary": _summarize(ramp, soak, baseline, degraded_at)}
+
+def _worst(rows: list[dict], key: str) -> Optional[float]:
+    values = [row[key] for row in rows if row.get(key) is not None]
+    return max(values) if values else None
+
+def _summarize(ramp: list[dict], soak: list[dict], baseline_kib: int, degraded_at: Optional[int]) -> dict:
+    rows = soak or ramp
+    return {
+        "max_connections": max((row["connections"] for row in ramp), default=0),
+        "degraded_at": degraded_at,
+        "baseline_rss_mib": round(baseline_kib / 1024, 1),
+        "kib_per_connection": ramp[-1]["kib_per_connection"] if ramp else None,
+        "soak_rss_growth_mib": round(soak[-1]["rss_mib"] - soak[0]["rss_mib"], 1) if soak else None,
+        "echo_p50_ms_worst": _worst(rows, "echo_p50_ms"),
+        "echo_p99_ms_worst": _worst(rows, "echo_p99_ms"),
+        "broadcast_p99_ms_worst": _worst(rows, "broadcast_p99_ms"),
+        "server_loop_lag_max_ms": _worst(rows, "server_loop_lag_max_ms"),
+        "harness_lag_max_ms": _worst(ramp + soak, "harness_lag_max_ms"),
+        "disconnects": sum(row["disconnects"] for row in ramp + soak),
+        "messages_lost": sum(row["messages_lost"] for row in ramp + soak),
+    }
+
+def _compare(current: dict, previous_path: str) -> None:
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\n{'':<26}{'previous':>14}{'current':>14}{'change':>10}")
+    for key, value in current["summary"].items():
+        old = previous.get("summary", {}).get(key)
+        change = ""
+        if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            change = f"{(value - old) / old * 100:+.1f}%"
+        print(f"{key:<26}{str(old):>14}{str(value):>14}{change:>10}")
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--step", type=int, default=5_000, help="Clients added per ramp step")
+    parser.add_argument("--ramp-rate", type=int, default=500, help="New connections per second")
+    parser.add_argument("--settle", type=float, default=15.0, help="Seconds measured after each ramp step")
+    parser.add_argument("--message-rate", type=float, default=200.0, help="Echo messages per second (total)")
+    parser.add_argument("--broadcast-rate", type=float, default=0.2, help="Broadcasts per second")
+    parser.add_argument("--duration", type=float, default=1800.0, help="Soak seconds after the ramp")
+    parser.add_argument("--sample-every", type=float, default=30.0)
+    parser.add_argument("--max-p99-ms", type=float, default=250.0, help="Echo p99 that counts as degraded")
+    parser.add_argument("--compression", action="store_true", help="Negotiate permessage-deflate like browsers")
+    parser.add_argument("--report", default="ws_soak_report.json")
+    parser.add_argument("--compare", help="Earlier report to compare the summary with")
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.clients + 100 > hard:
+        sys.exit(f"Open file limit is {hard}; raise it (ulimit -n) or use fewer --clients")
+
+    from app.db.session import engine
+
+    with engine.connect() as conn:
+        user_ids = conn.execute(
+            text("SELECT id FROM users WHERE is_active ORDER BY id LIMIT :n"), {"n": args.clients}
+        ).scalars().all()
+    if len(user_ids) < args.clients:
+        sys.exit(f"Only {len(user_ids)} active users; generate more (python -m scripts.generate_dataset)")
+    tokens = [create_access_token({"sub": str(user_id)}) for user_id in user_ids]
+
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    worker = Worker(hard)
+    try:
+        results = asyncio.run(_run(args, tokens, worker))
+    finally:
+        worker.stop()
+
+    report = {
+        "meta": {
+            "revision": _revision(),
+            "started_at": started_at,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        **results,
+    }
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nreport written to {args.report}")
+    for key, value in report["summary"].items():
+        print(f"{key:<26}{value}")
+    if args.compare:
+        _compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()